@@ -4,10 +4,12 @@ RTZR STT API와 OpenAI를 사용하여 음성을 텍스트로 변환하고 정
 """
 
 import os
-import yaml
+import asyncio
 import openai
 from dotenv import load_dotenv
 from rtzr_client import RTZRClient
+from prompt_registry import prompt_registry
+from text_normalizer import NormalizationCache, cache_key, needs_llm_correction, rule_normalize
 
 
 class VoiceToText:
@@ -23,29 +25,63 @@ class VoiceToText:
         openai.api_key = os.getenv("OPENAI_API_KEY")
         self.client = openai.OpenAI(api_key=openai.api_key)
 
-        # 교정 프롬프트 로드
-        correction_config = yaml.safe_load(
-            open("./configs/sentence_correction_prompts.yaml", "r", encoding="utf-8")
-        )
-        self.correction_prompt = [correction_config["sentence_correction1"]]
+        # LLM 교정 결과 캐시 (원문 + 교정 프롬프트 기준)
+        self.cache = NormalizationCache()
+
+    @property
+    def correction_prompt(self) -> list:
+        """교정 프롬프트 (프롬프트 레지스트리의 현재 스냅샷)"""
+        return [prompt_registry.get().correction_prompt]
 
-    def listen(self, audio_path: str) -> str:
+    async def listen(self, audio_path: str) -> str:
         """
         사용자의 음성을 받아 텍스트로 변환하고, 정제된 문장을 반환하는 함수
         - audio_path: .wav 파일 경로
         RTZR STT API의 sommers 모델을 사용합니다.
         """
+        raw_text = await self.transcribe(audio_path)
+        if raw_text is None:
+            return "[음성 인식 오류]"
+        return await self.refine(raw_text)
+
+    async def transcribe(self, audio_path: str) -> str | None:
+        """녹음 파일의 STT 원문 반환 (정제 없음, 오류 시 None)"""
         try:
-            raw_text = self.rtzr_client.transcribe_file(
-                audio_path, model_name="sommers"
-            )
-            if not raw_text:
-                return "[음성 인식 실패]"
-            normalized = self.normalize(raw_text)
-            return normalized
+            return await self.rtzr_client.transcribe_file(audio_path, model_name="sommers")
         except Exception as e:
             print(f"[RTZR STT 오류] {str(e)}")
-            return "[음성 인식 오류]"
+            return None
+
+    async def refine(self, raw_text: str | None) -> str:
+        """
+        STT 원문을 정제된 문장으로 변환
+        (배치 STT와 스트리밍 STT가 공통으로 사용)
+        - 규칙 정리가 공백/문장부호만 고친 깨끗한 원문은 LLM 교정 생략
+        - 같은 원문의 교정 결과는 캐시에서 재사용
+        """
+        if not raw_text:
+            return "[음성 인식 실패]"
+
+        cleaned = rule_normalize(raw_text)
+        if not cleaned:
+            return "[음성 인식 실패]"
+        if not needs_llm_correction(raw_text, cleaned):
+            print(f"[정제] 규칙 정리만 적용: '{cleaned}'")
+            return cleaned
+
+        return await asyncio.to_thread(self._normalize_cached, cleaned)
+
+    def _normalize_cached(self, text: str) -> str:
+        """캐시를 확인한 뒤 없으면 LLM으로 교정하고 저장"""
+        key = cache_key(text, self.correction_prompt[0])
+        refined = self.cache.get(key)
+        if refined is not None:
+            print(f"[정제] 캐시 사용 (hit {self.cache.hits} / miss {self.cache.misses})")
+            return refined
+
+        refined = self.normalize(text)
+        self.cache.put(key, refined)
+        return refined
 
     def normalize(self, text: str) -> str:
         """OpenAI GPT를 사용하여 STT 결과를 문법적으로 정제"""
@@ -0,0 +1,144 @@
+"""
+통화 준비 지연 벤치마크 - 서버 시작 비용과 첫 /voice webhook 응답 시간
+
+- startup:        서버 시작(warm_up) 비용 (프로세스당 1회), 아래 단계로 나누어 측정
+  - prompt load:    프롬프트 레지스트리 로드 (YAML 4개)
+  - client pool:    공유 LLM/STT 클라이언트 생성
+  - server warm-up: 나머지 준비 (워크플로우 컴파일, HTTP 클라이언트, 추천 워커 예열)
+- legacy setup:   기존 방식처럼 통화마다 YAML 4개 로드 + ChatOpenAI/VoiceToText 생성
+- shared setup:   공유 레지스트리/클라이언트로 conversation_logic 생성
+- first webhook:  새 Call SID로 POST /voice 후 첫 TwiML을 받기까지 걸린 시간
+
+외부 API는 호출하지 않으며, API 키가 없으면 더미 값을 사용합니다.
+프로젝트 루트에서 실행합니다:
+    python benchmarks/call_setup_bench.py --calls 20
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+for key, value in {
+    "OPENAI_API_KEY": "sk-bench",
+    "RTZR_API_ID": "bench",
+    "RTZR_API_KEY": "bench",
+    "TWILIO_ACCOUNT_SID": "ACbench",
+    "TWILIO_AUTH_TOKEN": "bench",
+    "SERVER_URL": "https://bench.invalid",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx
+import yaml
+from langchain_openai import ChatOpenAI
+
+import client_pool
+import server
+from conversation_logic import conversation_logic
+from prompt_registry import prompt_registry
+from schemas.ElderlyUser import ElderlyUser
+from schemas.ValidationResponse import ValidationResponse
+from VoiceToText import VoiceToText
+
+
+def legacy_call_setup():
+    """기존 conversation_logic.__init__ 와 동일한 통화별 작업"""
+    for path in (
+        "./configs/essential_question_prompts.yaml",
+        "./configs/validation_prompts.yaml",
+        "./configs/output_format_prompt.yaml",
+        "./configs/fixed_utterance_prompts.yaml",
+    ):
+        with open(path, "r", encoding="utf-8") as f:
+            yaml.safe_load(f)
+    gpt = ChatOpenAI(model="gpt-4o-mini")
+    gpt.with_structured_output(ValidationResponse)
+    gpt.with_structured_output(ElderlyUser)
+    VoiceToText()
+
+
+def _summary(name: str, samples: list):
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    print(
+        f"{name:<16} mean {statistics.mean(samples_ms):8.2f}ms  "
+        f"p50 {samples_ms[len(samples_ms) // 2]:8.2f}ms  max {samples_ms[-1]:8.2f}ms"
+    )
+
+
+async def first_webhook_latency(calls: int) -> list:
+    """ASGI 앱에 직접 /voice 요청을 보내 첫 응답까지의 시간 측정"""
+    latencies = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for i in range(calls):
+            start = time.perf_counter()
+            response = await http.post("/voice", data={"CallSid": f"CAbench{i:04d}"})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    # 녹음 대기 중인 대화 로직 정리
+    for session in list(server.active_sessions.values()):
+        if session.logic_task:
+            session.logic_task.cancel()
+    server.active_sessions.clear()
+    return latencies
+
+
+async def run(calls: int):
+    # server.warm_up과 같은 순서로 단계별 측정 (앞 단계에서 만든 객체는 warm_up에서 재사용됨)
+    steps = {}
+    start = time.perf_counter()
+    prompt_registry.load()
+    steps["prompt load"] = time.perf_counter() - start
+    start = time.perf_counter()
+    client_pool.warm_up()
+    steps["client pool"] = time.perf_counter() - start
+    start = time.perf_counter()
+    await server.warm_up()
+    steps["server warm-up"] = time.perf_counter() - start
+    for name, elapsed in steps.items():
+        print(f"{name:<16} {elapsed * 1000:8.2f}ms")
+    print(f"{'startup':<16} {sum(steps.values()) * 1000:8.2f}ms (1회)")
+
+    legacy = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        legacy_call_setup()
+        legacy.append(time.perf_counter() - start)
+    _summary("legacy setup", legacy)
+
+    shared = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        conversation_logic(call_sid="CAbench", client_instance=None)
+        shared.append(time.perf_counter() - start)
+    _summary("shared setup", shared)
+
+    _summary("first webhook", await first_webhook_latency(calls))
+    await server.shut_down()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="통화 준비 지연 벤치마크")
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    existing_sessions = set(os.listdir("recordings")) if os.path.isdir("recordings") else set()
+    try:
+        asyncio.run(run(args.calls))
+    finally:
+        # 벤치마크 중 생성된 빈 녹음 폴더 삭제
+        for name in set(os.listdir("recordings")) - existing_sessions:
+            path = os.path.join("recordings", name)
+            if os.path.isdir(path) and not os.listdir(path):
+                shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
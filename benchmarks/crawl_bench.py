@@ -0,0 +1,207 @@
+"""
+공고 상세 수집 처리량 벤치마크 - 로컬 가짜 SenuriService 서버 사용
+
+[상세 조회] --jobs개 ID를 미리 주고 상세 조회만 비교
+- gather:    기존 방식처럼 50개씩 asyncio.gather 후 0.1초 대기 (예외는 만료로 집계)
+- streaming: 동시 요청 수를 유지하는 슬라이딩 윈도우 + 토큰 버킷 + 재시도 (collect_job_details_stream)
+
+[전체 수집] 목록 조회(getJobList)부터 상세 조회까지
+- sequential: 목록 페이지를 순차 조회(페이지마다 0.05초 대기)한 뒤 상세 조회 시작
+- pipelined:  목록 페이지를 동시에 조회하며 찾은 ID를 바로 상세 조회 (collect_new_openings_async)
+
+가짜 서버는 요청마다 --latency 근처의 지연을 주고, --slow-rate 확률로 --slow-latency 만큼 느리게 응답하며,
+--error-rate 확률로 503을 반환합니다. job_id가 3의 배수인 공고는 모집 기간이 지난 공고입니다.
+
+프로젝트 루트에서 실행합니다:
+    python benchmarks/crawl_bench.py --jobs 1000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "recommendation")))
+
+from aiohttp import web
+
+import job_crawler
+from job_crawler import JobDataCollector
+
+TODAY = datetime.now()
+ACTIVE_PERIOD = ((TODAY - timedelta(days=3)).strftime("%Y%m%d"), (TODAY + timedelta(days=10)).strftime("%Y%m%d"))
+EXPIRED_PERIOD = ((TODAY - timedelta(days=30)).strftime("%Y%m%d"), (TODAY - timedelta(days=1)).strftime("%Y%m%d"))
+
+
+def job_info_xml(job_id: str) -> str:
+    start, end = EXPIRED_PERIOD if int(job_id) % 3 == 0 else ACTIVE_PERIOD
+    return (
+        "<response><header><resultCode>00</resultCode><resultMsg>NORMAL SERVICE.</resultMsg></header>"
+        f"<body><items><item><jobId>{job_id}</jobId><wantedTitle>공고 {job_id}</wantedTitle>"
+        f"<plbizNm>사업장 {job_id}</plbizNm><plDetAddr>서울특별시 강남구 테헤란로 {job_id}</plDetAddr>"
+        f"<frAcptDd>{start}</frAcptDd><toAcptDd>{end}</toAcptDd><detCnts>업무 설명 {job_id}</detCnts>"
+        "</item></items></body></response>"
+    )
+
+
+def job_list_xml(page_no: int, rows: int, total: int) -> str:
+    first = (page_no - 1) * rows
+    items = "".join(f"<item><jobId>{job_id}</jobId></item>" for job_id in range(first + 1, min(first + rows, total) + 1))
+    return (
+        "<response><header><resultCode>00</resultCode><resultMsg>NORMAL SERVICE.</resultMsg></header>"
+        f"<body><items>{items}</items><numOfRows>{rows}</numOfRows><pageNo>{page_no}</pageNo>"
+        f"<totalCount>{total}</totalCount></body></response>"
+    )
+
+
+def create_fake_server(args, stats: dict) -> web.Application:
+    async def delay():
+        stats["requests"] += 1
+        slow = random.random() < args.slow_rate
+        await asyncio.sleep(args.slow_latency if slow else args.latency * random.uniform(0.5, 1.5))
+        return random.random() < args.error_rate
+
+    async def get_job_info(request: web.Request) -> web.Response:
+        if await delay():
+            return web.Response(status=503, text="Service Unavailable")
+        return web.Response(text=job_info_xml(request.query["id"]), content_type="application/xml")
+
+    async def get_job_list(request: web.Request) -> web.Response:
+        if await delay():
+            return web.Response(status=503, text="Service Unavailable")
+        page_no, rows = int(request.query.get("pageNo", 1)), int(request.query.get("numOfRows", 50))
+        return web.Response(text=job_list_xml(page_no, rows, args.jobs), content_type="application/xml")
+
+    app = web.Application()
+    app.router.add_get("/getJobInfo", get_job_info)
+    app.router.add_get("/getJobList", get_job_list)
+    return app
+
+
+def start_server_thread(app: web.Application, port: int):
+    """가짜 서버를 별도 스레드의 이벤트 루프에서 실행"""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+
+
+async def sequential_full_crawl(collector: JobDataCollector, max_pages: int, rate: float):
+    """기존 방식: 목록 페이지를 끝까지 순차 조회한 뒤 상세 조회"""
+    job_ids = []
+    async with collector._create_session() as session:
+        for page_no in range(1, max_pages + 1):
+            for attempt in range(job_crawler.CRAWL_MAX_RETRIES + 1):
+                try:
+                    page_ids, _ = await collector.fetch_job_list_async(session, page_no)
+                    break
+                except job_crawler.TransientCrawlError:
+                    page_ids = []
+            if not page_ids:
+                break
+            job_ids += page_ids
+            await asyncio.sleep(0.05)
+        return await collector.collect_job_details_stream(
+            job_ids, session, rate_per_sec=rate, early_stop_threshold=len(job_ids) + 1
+        )
+
+
+async def gather_batches(collector: JobDataCollector, job_ids, batch_size: int = 50):
+    """기존 방식: 고정 크기 배치를 gather하고 배치 사이에 0.1초 대기 (예외는 None → 만료로 집계)"""
+    async def fetch(session, job_id):
+        try:
+            return await collector.fetch_job_detail_async(session, job_id)
+        except Exception:
+            return None
+
+    active, expired = [], 0
+    async with collector._create_session() as session:
+        for i in range(0, len(job_ids), batch_size):
+            results = await asyncio.gather(*[fetch(session, job_id) for job_id in job_ids[i:i + batch_size]])
+            active += [result for result in results if result is not None]
+            expired += sum(1 for result in results if result is None)
+            if i + batch_size < len(job_ids):
+                await asyncio.sleep(0.1)
+    return active, expired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공고 상세 수집 처리량 벤치마크")
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 서버 요청당 평균 지연 (초)")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="느린 응답 비율")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="느린 응답 지연 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="가짜 서버 503 비율")
+    parser.add_argument("--concurrency", type=int, default=job_crawler.CRAWL_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=0, help="초당 요청 한도 (0이면 제한 없음)")
+    parser.add_argument("--port", type=int, default=18081)
+    args = parser.parse_args()
+
+    stats = {"requests": 0}
+    start_server_thread(create_fake_server(args, stats), args.port)
+
+    # 가짜 서버 사용, 데이터 폴더는 임시 폴더에 생성
+    job_crawler.SENURI_API_URL = f"http://127.0.0.1:{args.port}"
+    job_crawler.CRAWL_RETRY_BASE_DELAY = 0.05
+    os.environ["ELDERLY_JOB_API_KEY"] = "bench"
+    os.chdir(tempfile.mkdtemp())
+    collector = JobDataCollector()
+
+    job_ids = [str(job_id) for job_id in range(1, args.jobs + 1)]
+    expected_active = sum(1 for job_id in job_ids if int(job_id) % 3 != 0)
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    active, expired = asyncio.run(gather_batches(collector, job_ids))
+    gather_time = time.perf_counter() - start
+    gather_requests = stats["requests"]
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    streamed = asyncio.run(collector.collect_job_details_stream(
+        job_ids, concurrency=args.concurrency, rate_per_sec=args.rate, early_stop_threshold=args.jobs + 1
+    ))
+    stream_time = time.perf_counter() - start
+
+    print()
+    print(f"{'gather':<10} {gather_time:7.2f}s  {args.jobs / gather_time:7.1f}건/초  requests {gather_requests:5d}  "
+          f"active {len(active)}/{expected_active}  expired(+failed) {expired}")
+    print(f"{'streaming':<10} {stream_time:7.2f}s  {args.jobs / stream_time:7.1f}건/초  requests {stats['requests']:5d}  "
+          f"active {len(streamed)}/{expected_active}")
+
+    # 전체 수집: 목록 조회 + 상세 조회
+    max_pages = -(-args.jobs // job_crawler.LIST_PAGE_ROWS)
+    job_crawler.CRAWL_RATE_PER_SEC = args.rate
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    sequential = asyncio.run(sequential_full_crawl(collector, max_pages, args.rate))
+    sequential_time = time.perf_counter() - start
+    sequential_requests = stats["requests"]
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    pipelined, _ = asyncio.run(collector.collect_new_openings_async(set(), max_pages, early_stop_threshold=args.jobs + 1))
+    pipelined_time = time.perf_counter() - start
+
+    print()
+    print(f"{'sequential':<10} {sequential_time:7.2f}s  requests {sequential_requests:5d}  active {len(sequential)}/{expected_active}")
+    print(f"{'pipelined':<10} {pipelined_time:7.2f}s  requests {stats['requests']:5d}  active {len(pipelined)}/{expected_active}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Upstage 임베딩 배치 요청 벤치마크 - 로컬 가짜 임베딩 서버 사용
+
+- sequential: 기존 방식처럼 텍스트마다 requests.post 한 번씩 (_call_api_single)
+- batched:    BATCH_SIZE 단위 배열 요청을 MAX_CONCURRENCY개씩 동시 전송 (get_embeddings_batch)
+
+가짜 서버는 요청마다 --latency 만큼 지연하고, --error-rate 확률로 503을 반환합니다.
+'FAIL'이 포함된 텍스트가 들어 있는 요청은 400을 반환하여, 배치 실패 시 항목별 재요청과
+부분 결과 유지(입력 순서 정렬, 실패 항목만 None)를 함께 확인합니다.
+
+프로젝트 루트에서 실행합니다:
+    python benchmarks/embedding_batch_bench.py --texts 300 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "recommendation")))
+
+# 이전 실행 결과가 재사용되지 않도록 임시 임베딩 캐시 사용
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite3")
+
+from aiohttp import web
+
+from text_embedding import UpstageEmbeddingService
+
+DIMENSION = 16
+
+
+def fake_embedding(text: str) -> list:
+    """텍스트마다 고정된 벡터 (응답 순서 검증용)"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [digest[i] / 255 for i in range(DIMENSION)]
+
+
+def create_fake_server(latency: float, error_rate: float, stats: dict) -> web.Application:
+    async def embeddings(request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        if any("FAIL" in text for text in inputs):
+            return web.json_response({"error": "invalid input"}, status=400)
+        if random.random() < error_rate:
+            return web.json_response({"error": "temporarily unavailable"}, status=503)
+        # 실제 API처럼 index 필드를 포함하고, 순서를 섞어 응답
+        data = [{"index": i, "embedding": fake_embedding(text)} for i, text in enumerate(inputs)]
+        random.shuffle(data)
+        return web.json_response({"data": data, "model": body["model"]})
+
+    app = web.Application()
+    app.router.add_post("/v1/embeddings", embeddings)
+    return app
+
+
+def start_server_thread(app: web.Application, port: int) -> threading.Event:
+    """가짜 서버를 별도 스레드의 이벤트 루프에서 실행"""
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upstage 임베딩 배치 요청 벤치마크")
+    parser.add_argument("--texts", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 서버 요청당 지연 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="가짜 서버 503 비율")
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    stats = {"requests": 0}
+    start_server_thread(create_fake_server(args.latency, args.error_rate, stats), args.port)
+
+    os.environ["UPSTAGE_API_KEY"] = "bench"
+    os.environ["UPSTAGE_API_URL"] = f"http://127.0.0.1:{args.port}/v1/embeddings"
+    service = UpstageEmbeddingService()
+    service.RETRY_BASE_DELAY = 0.01
+
+    texts = [f"채용 제목: 공고 {i}. 상세 내용: 업무 설명 {i}" for i in range(args.texts)]
+    texts[len(texts) // 2] = "FAIL 처리되는 공고"
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    sequential = [service._call_api_single(text, "embedding-passage") for text in texts]
+    sequential_time = time.perf_counter() - start
+    sequential_requests = stats["requests"]
+
+    stats["requests"] = 0
+    start = time.perf_counter()
+    batched = service.get_embeddings_batch(texts, "embedding-passage")
+    batched_time = time.perf_counter() - start
+
+    sequential_ok = sum(1 for embedding in sequential if embedding)
+    batched_ok = sum(1 for embedding in batched if embedding is not None)
+    aligned = all(
+        embedding == fake_embedding(text)
+        for text, embedding in zip(texts, batched)
+        if embedding is not None
+    )
+
+    print(f"{'sequential':<12} {sequential_time * 1000:9.1f}ms  requests {sequential_requests:4d}  ok {sequential_ok}/{len(texts)}")
+    print(f"{'batched':<12} {batched_time * 1000:9.1f}ms  requests {stats['requests']:4d}  ok {batched_ok}/{len(texts)}")
+    print(f"batched results aligned to inputs: {aligned}")
+
+
+if __name__ == "__main__":
+    main()
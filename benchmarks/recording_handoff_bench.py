@@ -0,0 +1,132 @@
+"""
+녹음 완료 전달 경로 벤치마크 - HTTP 폴링 vs 프로세스 내 큐
+
+N개의 동시 통화를 시뮬레이션하여, Twilio의 /recording-callback 도착 시점부터
+대화 로직이 녹음 URL을 손에 넣기까지의 지연 시간과 HTTP 요청 수를 비교합니다.
+
+- polling: recording_event 대기 후 GET /get-recording-url 을 0.5초 간격으로 폴링
+           (SERVER_URL이 ngrok 등 외부 터널을 거치므로 요청마다 --rtt-ms 만큼 지연)
+- push:    /recording-callback이 통화별 asyncio.Queue에 녹음 정보를 직접 전달
+
+사용법:
+    python benchmarks/recording_handoff_bench.py --calls 200 --turns 9 --rtt-ms 150
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+POLL_INTERVAL = 0.5
+POLL_TIMEOUT = 30
+
+
+class PollingCall:
+    """기존 방식: 이벤트 + HTTP 폴링"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.recording_event = asyncio.Event()
+        self.recording_info = {"status": "pending"}
+        self.http_requests = 0
+
+    def on_callback(self, recording_url: str):
+        self.recording_info = {"status": "ready", "recording_url": recording_url}
+        self.recording_event.set()
+
+    async def _get_recording_url(self) -> dict:
+        # 루프백 HTTP 왕복 (요청 + 응답)
+        self.http_requests += 1
+        await asyncio.sleep(self.rtt / 2)
+        snapshot = dict(self.recording_info)
+        await asyncio.sleep(self.rtt / 2)
+        return snapshot
+
+    async def wait_recording(self) -> str | None:
+        self.recording_event.clear()
+        await self.recording_event.wait()
+        start = time.perf_counter()
+        while time.perf_counter() - start < POLL_TIMEOUT:
+            data = await self._get_recording_url()
+            if data.get("status") == "ready":
+                return data["recording_url"]
+            await asyncio.sleep(POLL_INTERVAL)
+        return None
+
+
+class PushCall:
+    """신규 방식: 프로세스 내 큐"""
+
+    def __init__(self, rtt: float):
+        self.recording_queue = asyncio.Queue()
+        self.http_requests = 0
+
+    def on_callback(self, recording_url: str):
+        self.recording_queue.put_nowait({"recording_url": recording_url})
+
+    async def wait_recording(self) -> str | None:
+        recording = await self.recording_queue.get()
+        return recording.get("recording_url")
+
+
+async def _simulate_call(call, turns: int, latencies: list, rng: random.Random):
+    for turn in range(turns):
+        callback_at = {}
+
+        async def twilio_callback():
+            # 사용자가 말하는 시간 (짧게 압축)
+            await asyncio.sleep(rng.uniform(0.05, 0.3))
+            callback_at["t"] = time.perf_counter()
+            call.on_callback(f"https://api.twilio.com/recordings/{id(call)}_{turn}")
+
+        callback_task = asyncio.create_task(twilio_callback())
+        url = await call.wait_recording()
+        received_at = time.perf_counter()
+        await callback_task
+        if url:
+            latencies.append(received_at - callback_at["t"])
+
+
+async def run_mode(call_cls, calls: int, turns: int, rtt: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies = []
+    instances = [call_cls(rtt) for _ in range(calls)]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_simulate_call(call, turns, latencies, rng) for call in instances)
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "http_requests": sum(call.http_requests for call in instances),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=100, help="동시 통화 수")
+    parser.add_argument("--turns", type=int, default=9, help="통화당 녹음 횟수")
+    parser.add_argument("--rtt-ms", type=float, default=150.0, help="SERVER_URL 왕복 지연 (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rtt = args.rtt_ms / 1000
+    print(f"calls={args.calls} turns={args.turns} rtt={args.rtt_ms:.0f}ms")
+    print(f"{'mode':<8} {'mean(ms)':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'http':>8} {'wall(s)':>8}")
+    for name, call_cls in (("polling", PollingCall), ("push", PushCall)):
+        result = asyncio.run(run_mode(call_cls, args.calls, args.turns, rtt, args.seed))
+        print(
+            f"{name:<8} {result['mean_ms']:>10.2f} {result['p50_ms']:>10.2f} "
+            f"{result['p95_ms']:>10.2f} {result['http_requests']:>8} {result['elapsed']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
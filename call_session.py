@@ -0,0 +1,138 @@
+"""
+통화별 상태 관리 - Call SID 하나당 CallSession 객체 하나
+TTS/녹음/종료 명령 큐와 통화 이벤트를 한 곳에서 관리합니다.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+
+class Say:
+    """TTS로 출력할 텍스트 명령"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self):
+        return f"Say({self.text!r})"
+
+
+class Record:
+    """사용자 음성 녹음 시작 명령"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Record()"
+
+
+class Listen:
+    """스트리밍 STT로 사용자 답변 듣기 시작 명령 (Media Streams 사용 시)"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Listen()"
+
+
+class Hangup:
+    """통화 종료 명령 (앞선 명령이 모두 재생된 뒤 실행)"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Hangup()"
+
+
+class CallSession:
+    """통화 하나의 대화 로직, 명령 큐, 이벤트를 보관하는 객체"""
+
+    __slots__ = (
+        "call_sid",
+        "logic_instance",
+        "client",
+        "instructions",
+        "voice_event",
+        "recording_queue",
+        "recording_info",
+        "logic_task",
+        "hangup_requested",
+        "instruction_event",
+        "idle_since",
+        "dead_air",
+        "stream_started",
+        "stt_stream",
+        "stt_task",
+        "stt_turns",
+    )
+
+    def __init__(self, call_sid: str):
+        self.call_sid = call_sid
+        self.logic_instance = None  # conversation_logic 인스턴스
+        self.client = None  # TwilioClient 인스턴스
+        self.instructions = deque()  # Say / Record / Hangup 명령 큐
+        self.voice_event = asyncio.Event()  # TwiML 응답 생성 이벤트
+        self.recording_queue = asyncio.Queue()  # 녹음 완료 알림 채널
+        self.recording_info = None  # 외부 조회용 녹음 상태 (/get-recording-url)
+        self.logic_task = None  # 대화 로직 실행 태스크
+        self.hangup_requested = False  # 대화 로직이 정상적으로 통화 종료를 요청했는지 여부
+        self.instruction_event = asyncio.Event()  # 새 명령 도착 이벤트 (/voice long-poll)
+        self.idle_since = None  # 큐가 비어 통화가 무음 상태가 된 시각
+        self.dead_air = []  # 턴별 무음 시간 (초)
+        self.stream_started = False  # Media Stream(<Start><Stream>) 시작 여부
+        self.stt_stream = None  # 현재 답변을 받고 있는 스트리밍 STT 어댑터
+        self.stt_task = None  # 스트리밍 STT 턴 처리 태스크
+        self.stt_turns = 0  # 스트리밍 STT 턴 수
+
+    def enqueue(self, instruction):
+        """명령을 큐 뒤에 추가하고 대기 중인 /voice 요청을 깨움"""
+        self.instructions.append(instruction)
+        self.instruction_event.set()
+
+    async def wait_for_instruction(self, timeout: float) -> bool:
+        """명령이 도착할 때까지 최대 timeout초 대기 (도착 여부 반환)"""
+        if self.instructions:
+            return True
+        self.instruction_event.clear()
+        try:
+            await asyncio.wait_for(self.instruction_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return bool(self.instructions)
+
+    def mark_idle(self):
+        """무음 구간 시작 기록 (pause/redirect 반복 중에는 최초 시각 유지)"""
+        if self.idle_since is None:
+            self.idle_since = time.perf_counter()
+
+    def mark_active(self) -> float | None:
+        """무음 구간 종료 기록 후 해당 턴의 무음 시간 반환"""
+        if self.idle_since is None:
+            return None
+        elapsed = time.perf_counter() - self.idle_since
+        self.idle_since = None
+        self.dead_air.append(elapsed)
+        return elapsed
+
+    def drain(self, max_say: int) -> list:
+        """
+        하나의 TwiML 응답에 담을 명령들을 꺼냄
+        - 연속된 Say를 최대 max_say개까지 합침
+        - 바로 뒤의 Record / Hangup은 응답을 끝맺는 명령이므로 함께 꺼냄
+        - Listen은 앞선 안내 재생이 끝난 뒤 듣기 시작해야 하므로 단독 응답으로 꺼냄
+        """
+        if self.instructions and isinstance(self.instructions[0], Listen):
+            return [self.instructions.popleft()]
+
+        batch = []
+        while self.instructions and len(batch) < max_say:
+            if not isinstance(self.instructions[0], Say):
+                break
+            batch.append(self.instructions.popleft())
+
+        if self.instructions and isinstance(self.instructions[0], (Record, Hangup)):
+            batch.append(self.instructions.popleft())
+        return batch
@@ -6,12 +6,84 @@ TTS, STT, 파일 다운로드를 처리합니다.
 import httpx
 import os
 import asyncio
-import time
+from abc import ABC, abstractmethod
+from typing import Callable
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 녹음/인식 결과 알림을 기다리는 최대 시간 (초과 시 None 반환, 통화가 끊긴 경우 대비)
+RECORDING_WAIT_TIMEOUT = float(os.getenv("RECORDING_WAIT_TIMEOUT", 30))
+
+
+class CallTransport(ABC):
+    """TwilioClient의 say/listen 명령을 서버의 통화별 상태로 전달하는 인터페이스"""
+
+    @abstractmethod
+    async def enqueue_say(self, call_sid: str, text: str) -> dict:
+        """TTS 텍스트를 통화 큐에 추가"""
+
+    @abstractmethod
+    async def enqueue_listen(self, call_sid: str) -> dict:
+        """녹음 시작 명령을 통화 큐에 추가"""
+
+    @abstractmethod
+    async def enqueue_hangup(self, call_sid: str) -> dict:
+        """통화 종료 명령을 통화 큐에 추가"""
+
+
+class HTTPTransport(CallTransport):
+    """서버 API(/say-text, /listen-to-user)를 호출하는 전송 방식 (서버와 로직이 분리 배포된 경우)"""
+
+    def __init__(self, server_base_url: str, http_client: httpx.AsyncClient):
+        self.server_base_url = server_base_url
+        self.http_client = http_client
+
+    async def enqueue_say(self, call_sid: str, text: str) -> dict:
+        url = f"{self.server_base_url}/say-text"
+        payload = {"call_sid": call_sid, "text": text}
+        response = await self.http_client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def enqueue_listen(self, call_sid: str) -> dict:
+        url = f"{self.server_base_url}/listen-to-user"
+        payload = {"call_sid": call_sid}
+        response = await self.http_client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def enqueue_hangup(self, call_sid: str) -> dict:
+        url = f"{self.server_base_url}/hangup"
+        payload = {"call_sid": call_sid}
+        response = await self.http_client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+
+class InProcessTransport(CallTransport):
+    """같은 프로세스의 서버 상태에 직접 명령을 추가하는 전송 방식 (루프백 HTTP 생략)"""
+
+    def __init__(
+        self,
+        say_handler: Callable[[str, str], dict],
+        listen_handler: Callable[[str], dict],
+        hangup_handler: Callable[[str], dict],
+    ):
+        self.say_handler = say_handler
+        self.listen_handler = listen_handler
+        self.hangup_handler = hangup_handler
+
+    async def enqueue_say(self, call_sid: str, text: str) -> dict:
+        return self.say_handler(call_sid, text)
+
+    async def enqueue_listen(self, call_sid: str) -> dict:
+        return self.listen_handler(call_sid)
+
+    async def enqueue_hangup(self, call_sid: str) -> dict:
+        return self.hangup_handler(call_sid)
+
 
 class TwilioClient:
     """Twilio API와 상호작용하는 클라이언트"""
@@ -20,12 +92,23 @@ class TwilioClient:
         self,
         server_base_url: str,
         voice_event: asyncio.Event,
-        recording_event: asyncio.Event,
+        recording_queue: asyncio.Queue,
+        transport: CallTransport | None = None,
+        coalesce_say: bool = False,
+        http_client: httpx.AsyncClient | None = None,
+        stt_mode: str = "batch",
     ):
         self.server_base_url = server_base_url
-        self.http_client = httpx.AsyncClient()
+        # 서버가 공유 커넥션 풀을 넘겨주면 통화마다 새 클라이언트를 만들지 않음
+        self.http_client = http_client or httpx.AsyncClient()
+        # 명령 전달 방식 (기본값: 서버 API 호출)
+        self.transport = transport or HTTPTransport(server_base_url, self.http_client)
+        # True이면 say()가 큐에 추가된 즉시 반환 (서버가 여러 문장을 하나의 TwiML로 병합)
+        self.coalesce_say = coalesce_say
+        # "batch": <Record> 후 녹음 파일 다운로드, "streaming": Media Streams로 실시간 인식
+        self.stt_mode = stt_mode
         self.voice_event = voice_event  # TTS 완료 이벤트
-        self.recording_event = recording_event  # 녹음 완료 이벤트
+        self.recording_queue = recording_queue  # 녹음 완료 알림 (URL, 길이) 채널
 
         # Twilio 인증 정보 로드
         self.TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
@@ -47,20 +130,24 @@ class TwilioClient:
         self.session_dir = os.path.join(self.RECORDINGS_DIR, self.session_timestamp)
         os.makedirs(self.session_dir, exist_ok=True)
 
-    async def _wait_for_voice_event(self, call_sid: str):
-        """음성 이벤트 대기"""
-        self.voice_event.clear()
-        await self.voice_event.wait()
-
     async def say(self, call_sid: str, text: str) -> bool:
-        """TTS를 통해 텍스트를 음성으로 출력"""
+        """
+        TTS를 통해 텍스트를 음성으로 출력
+        - coalesce_say: 큐에 예약되는 즉시 반환 (재생 순서는 큐 순서로 보장)
+        - 그 외: 해당 텍스트가 TwiML로 전달될 때까지 대기
+        """
         try:
-            url = f"{self.server_base_url}/say-text"
-            payload = {"call_sid": call_sid, "text": text}
-            response = await self.http_client.post(url, json=payload)
-            response.raise_for_status()
+            # 큐에 넣기 전에 이벤트를 초기화해야 /voice가 먼저 처리되어도 신호를 놓치지 않음
+            self.voice_event.clear()
+            response_data = await self.transport.enqueue_say(call_sid, text)
+            if response_data.get("status") != "success":
+                print(
+                    f"[{call_sid}] Server failed to enqueue text: {response_data.get('message')}"
+                )
+                return False
 
-            await self._wait_for_voice_event(call_sid)
+            if not self.coalesce_say:
+                await self.voice_event.wait()
 
             return True
         except httpx.RequestError as e:
@@ -73,50 +160,37 @@ class TwilioClient:
             print(
                 f"[{call_sid}] Requesting server to start listening for user input (Phase: {phase})."
             )
-            url = f"{self.server_base_url}/listen-to-user"
-            payload = {"call_sid": call_sid}
-            response = await self.http_client.post(url, json=payload)
-            response.raise_for_status()
 
-            response_data = response.json()
+            # 이전 턴에서 소비되지 않은 녹음 알림 제거
+            while not self.recording_queue.empty():
+                self.recording_queue.get_nowait()
+
+            response_data = await self.transport.enqueue_listen(call_sid)
             if response_data.get("status") != "success":
                 print(
                     f"[{call_sid}] Server failed to initiate listen: {response_data.get('message')}"
                 )
                 return None
 
-            self.recording_event.clear()
-            await self.recording_event.wait()
-
-            print(f"[{call_sid}] Waiting for recording URL to be available...")
-            timeout = 30
-            start_time = time.time()
-
-            # Twilio에서 녹음 URL이 준비될 때까지 폴링
-            recording_url = None
-            while time.time() - start_time < timeout:
-                get_url = f"{self.server_base_url}/get-recording-url/{call_sid}"
-                recording_response = await self.http_client.get(get_url)
-                recording_response.raise_for_status()
-                recording_data = recording_response.json()
-
-                if recording_data.get("status") == "ready" and recording_data.get(
-                    "recording_url"
-                ):
-                    recording_url = recording_data["recording_url"]
-                    print(f"[{call_sid}] Recording URL received")
-                    break
-                elif recording_data.get("status") == "processing":
-                    print(f"[{call_sid}] Recording still processing, waiting...")
-
-                await asyncio.sleep(0.5)
+            # /recording-callback이 같은 프로세스에서 녹음 정보를 직접 전달
+            print(f"[{call_sid}] Waiting for recording callback...")
+            try:
+                recording = await asyncio.wait_for(
+                    self.recording_queue.get(), RECORDING_WAIT_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                print(f"[{call_sid}] Timed out waiting for recording callback.")
+                return None
+            recording_url = recording.get("recording_url")
 
             if not recording_url:
-                print(
-                    f"[{call_sid}] Listen operation timed out. No recording URL received from Twilio."
-                )
+                print(f"[{call_sid}] Recording callback did not contain a recording URL.")
                 return None
 
+            print(
+                f"[{call_sid}] Recording URL received (Duration: {recording.get('duration')}s)"
+            )
+
             local_wav_path = os.path.join(self.session_dir, f"USER_{phase+1:04d}.wav")
 
             print(f"[{call_sid}] Attempting to download recording to: {local_wav_path}")
@@ -147,6 +221,54 @@ class TwilioClient:
             print(f"An unexpected error occurred in listen: {e}")
             return None
 
+    async def listen_transcript(self, call_sid: str, phase: int) -> str | None:
+        """스트리밍 STT 모드에서 사용자 답변을 듣고 인식된 원문 텍스트를 반환"""
+        try:
+            print(
+                f"[{call_sid}] Requesting server to start streaming STT (Phase: {phase})."
+            )
+
+            # 이전 턴에서 소비되지 않은 알림 제거
+            while not self.recording_queue.empty():
+                self.recording_queue.get_nowait()
+
+            response_data = await self.transport.enqueue_listen(call_sid)
+            if response_data.get("status") != "success":
+                print(
+                    f"[{call_sid}] Server failed to initiate listen: {response_data.get('message')}"
+                )
+                return None
+
+            # 발화 종료가 감지되면 서버가 인식 결과를 직접 전달
+            try:
+                result = await asyncio.wait_for(
+                    self.recording_queue.get(), RECORDING_WAIT_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                print(f"[{call_sid}] Timed out waiting for streaming transcript.")
+                return None
+            return result.get("transcript")
+        except httpx.RequestError as e:
+            print(f"Error in listen request to server: {e}")
+            return None
+
+    async def redirect(self, call_sid: str) -> bool:
+        """
+        Twilio REST API로 진행 중인 TwiML을 중단하고 /voice로 이동시킵니다.
+        (스트리밍 STT에서 답변이 끝나면 남은 <Pause>를 건너뛰기 위해 사용)
+        """
+        try:
+            twilio_api_url = f"https://api.twilio.com/2010-04-01/Accounts/{self.TWILIO_ACCOUNT_SID}/Calls/{call_sid}.json"
+            auth = httpx.BasicAuth(self.TWILIO_ACCOUNT_SID, self.TWILIO_AUTH_TOKEN)
+            payload = {"Url": f"{self.server_base_url}/voice", "Method": "POST"}
+
+            response = await self.http_client.post(twilio_api_url, auth=auth, data=payload)
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            print(f"[{call_sid}] Error redirecting call via Twilio API: {e}")
+            return False
+
     async def _download_recording_file(
         self, recording_url: str, local_path: str, call_sid: str
     ) -> bool:
@@ -184,6 +306,23 @@ class TwilioClient:
             return False
 
     async def hangup(self, call_sid: str) -> bool:
+        """
+        통화 큐에 종료 명령을 추가하여, 앞선 TTS가 모두 재생된 뒤 통화를 종료합니다.
+        큐 추가에 실패하면 Twilio REST API로 즉시 종료합니다.
+        """
+        try:
+            response_data = await self.transport.enqueue_hangup(call_sid)
+            if response_data.get("status") == "success":
+                return True
+            print(
+                f"[{call_sid}] Server failed to enqueue hangup: {response_data.get('message')}"
+            )
+        except httpx.HTTPError as e:
+            print(f"[{call_sid}] Error sending 'hangup' request to server: {e}")
+
+        return await self._hangup_via_api(call_sid)
+
+    async def _hangup_via_api(self, call_sid: str) -> bool:
         """
         Twilio REST API를 사용하여 통화를 종료합니다.
         """
@@ -194,9 +333,8 @@ class TwilioClient:
             payload = {"Status": "completed"}
 
             print(f"[{call_sid}] Attempting to hang up call...")
-            async with self.http_client as client:
-                response = await client.post(twilio_api_url, auth=auth, data=payload)
-                response.raise_for_status()
+            response = await self.http_client.post(twilio_api_url, auth=auth, data=payload)
+            response.raise_for_status()
 
             print(f"[{call_sid}] Call successfully hung up.")
             return True
@@ -0,0 +1,76 @@
+"""
+공유 클라이언트 풀 - LLM / STT 클라이언트를 프로세스당 한 번만 생성
+서버 시작 시 warm_up()으로 미리 만들어 두고, 모든 통화가 같은 인스턴스를 사용합니다.
+"""
+
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from schemas.ValidationResponse import ValidationResponse
+from schemas.NormalizedValidationResponse import NormalizedValidationResponse
+from schemas.ElderlyUser import ElderlyUser
+from VoiceToText import VoiceToText
+from profile_extractor import build_field_models
+from rtzr_client import RTZRClient
+
+load_dotenv()
+
+
+class LLMClients:
+    """대화 로직에서 사용하는 LLM 클라이언트 묶음"""
+
+    __slots__ = (
+        "gpt",
+        "valid_gpt",
+        "valid_gpt_normalized",
+        "valid_gpt_output",
+        "field_extractors",
+    )
+
+    def __init__(self):
+        self.gpt = ChatOpenAI(
+            model="gpt-4o-mini",
+        )
+        self.valid_gpt = self.gpt.with_structured_output(ValidationResponse)  # 답변 검증용
+        self.valid_gpt_normalized = self.gpt.with_structured_output(
+            NormalizedValidationResponse
+        )  # STT 교정 + 답변 검증 통합용
+        self.valid_gpt_output = self.gpt.with_structured_output(ElderlyUser)  # 최종 데이터 추출용
+        # 질문별 필드 추출용 (필드명 → 해당 필드만 가진 구조화 출력)
+        self.field_extractors = {
+            name: self.gpt.with_structured_output(model)
+            for name, model in build_field_models().items()
+        }
+
+
+_llm_clients = None
+_voice_to_text = None
+
+
+def get_llm_clients() -> LLMClients:
+    """공유 LLM 클라이언트 반환 (최초 호출 시 생성)"""
+    global _llm_clients
+    if _llm_clients is None:
+        _llm_clients = LLMClients()
+    return _llm_clients
+
+
+def get_voice_to_text() -> VoiceToText:
+    """공유 음성-텍스트 변환 인스턴스 반환 (최초 호출 시 생성)"""
+    global _voice_to_text
+    if _voice_to_text is None:
+        _voice_to_text = VoiceToText()
+    return _voice_to_text
+
+
+def warm_up():
+    """서버 시작 시 모든 공유 클라이언트를 미리 생성"""
+    get_llm_clients()
+    get_voice_to_text()
+
+
+async def aclose():
+    """서버 종료 시 공유 커넥션 풀 정리"""
+    await RTZRClient.aclose()
+    if _voice_to_text is not None:
+        _voice_to_text.cache.close()
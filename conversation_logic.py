@@ -4,76 +4,162 @@
 """
 
 import asyncio
+from collections import defaultdict
 from schemas.ConversationState import ConversationState
-from schemas.ValidationResponse import ValidationResponse
-from schemas.ElderlyUser import ElderlyUser
-import yaml
-from dotenv import load_dotenv
 import os
 import json
-import subprocess
 import time
 
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langchain.schema.messages import HumanMessage, SystemMessage
-from VoiceToText import VoiceToText
 from client import TwilioClient
+from client_pool import get_llm_clients, get_voice_to_text
+from prompt_registry import prompt_registry
+from text_normalizer import rule_normalize
+from profile_extractor import ProfileExtractor
+from recommendation_service import recommendation_service
+
+# STT 교정과 답변 검증을 한 번의 LLM 호출로 처리할지 여부 (false면 교정 → 검증 순차 호출)
+FUSED_VALIDATION = os.environ.get("FUSED_VALIDATION", "true").lower() == "true"
+# 답변 검증과 동시에 "감사합니다."를 먼저 재생할지 여부 (검증 대기 시간을 음성 뒤로 숨김)
+# 실패(재질문)하면 어르신은 "감사합니다." 직후 재질문 안내를 듣게 되므로,
+# 실패율이 높은 질문은 선행 재생을 멈추고 검증 결과를 기다린 뒤 감사 인사를 재생
+SPECULATIVE_ACK = os.environ.get("SPECULATIVE_ACK", "true").lower() == "true"
+SPECULATION_MIN_SAMPLES = int(os.environ.get("SPECULATION_MIN_SAMPLES", 20))
+SPECULATION_MAX_MISS_RATE = float(os.environ.get("SPECULATION_MAX_MISS_RATE", 0.3))
+
+
+class SpeculationStats:
+    """
+    질문별 선행 재생 적중(유효 답변)/실패(재질문) 횟수
+    적중률은 통화가 아닌 질문의 성질이므로 모든 통화가 함께 집계하며, 서버 실행(warm_up)마다 초기화
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = defaultdict(lambda: {"hit": 0, "miss": 0})
+        self.started_at = time.time()
+
+    def record(self, phase: int, hit: bool):
+        self.counts[phase]["hit" if hit else "miss"] += 1
+
+    def should_speculate(self, phase: int) -> bool:
+        """
+        이 질문에서 감사 인사를 선행 재생할지 여부
+        표본이 SPECULATION_MIN_SAMPLES개 이상이고 실패율이 SPECULATION_MAX_MISS_RATE를 넘으면 중단
+        (중단된 질문은 더 이상 집계되지 않으므로 다음 서버 실행까지 유지)
+        """
+        counts = self.counts.get(phase)
+        if counts is None:
+            return True
+        total = counts["hit"] + counts["miss"]
+        return total < SPECULATION_MIN_SAMPLES or counts["miss"] / total <= SPECULATION_MAX_MISS_RATE
+
+    def summary(self) -> dict:
+        result = {}
+        for phase in sorted(self.counts):
+            hit = self.counts[phase]["hit"]
+            miss = self.counts[phase]["miss"]
+            result[phase] = {
+                "hit": hit,
+                "miss": miss,
+                "miss_rate": round(miss / (hit + miss), 3),
+                "speculating": self.should_speculate(phase),
+            }
+        return {"since": self.started_at, "phases": result}
+
+
+speculation_stats = SpeculationStats()
+
+
+# ---------------------------WORKFLOW --------------------------- #
+
+
+def _bind_node(method_name: str):
+    """config로 주입된 통화별 conversation_logic 인스턴스의 메서드를 호출하는 노드 생성"""
+
+    async def node(state: ConversationState, config: RunnableConfig):
+        logic = config["configurable"]["logic"]
+        return await getattr(logic, method_name)(state)
+
+    node.__name__ = method_name
+    return node
+
+
+def compose_workflow():
+    """LangGraph 워크플로우 구성 (모든 통화가 같은 그래프 구조를 사용)"""
+    workflow = StateGraph(ConversationState)
+
+    # 워크플로우 노드들 추가
+    workflow.add_node("initialize", _bind_node("initialize"))
+    workflow.add_node("conversation", _bind_node("conversation"))
+    workflow.add_node("retry", _bind_node("retry"))
+    workflow.add_node("before_next", _bind_node("before_next"))
+    workflow.add_node("before_end", _bind_node("before_end"))
+
+    # 워크플로우 엣지(연결) 정의
+    workflow.add_edge(START, "initialize")  # 시작 → 초기화
+    workflow.add_edge("initialize", "conversation")  # 초기화 → 대화
+    workflow.add_edge("retry", "conversation")  # 재시도 → 대화
+    workflow.add_conditional_edges(  # 대화 후 조건부 분기
+        "conversation",
+        _bind_node("is_valid"),
+        {"Next": "before_next", "Retry": "retry", "End": "before_end"},
+    )
+    workflow.add_edge("before_end", END)  # 종료 전 → 종료
+    workflow.add_edge("before_next", "conversation")  # 다음 질문 전 → 대화
+
+    # 그래프 컴파일 (재귀 제한은 실행 시 config로 전달)
+    return workflow.compile()
+
+
+_compiled_workflow = None
+
+
+def get_workflow():
+    """컴파일된 워크플로우 반환 (프로세스당 한 번만 컴파일)"""
+    global _compiled_workflow
+    if _compiled_workflow is None:
+        _compiled_workflow = compose_workflow()
+    return _compiled_workflow
 
 
 class conversation_logic:
     """구직 상담 대화를 관리하는 클래스"""
     
     def __init__(self, call_sid: str, client_instance: TwilioClient):
-        # YAML 설정 파일 로드
-        question_config = yaml.safe_load(
-            open("./configs/essential_question_prompts.yaml", "r", encoding="utf-8")
-        )
-        validation_config = yaml.safe_load(
-            open("./configs/validation_prompts.yaml", "r", encoding="utf-8")
-        )
-        output_config = yaml.safe_load(
-            open("./configs/output_format_prompt.yaml", "r", encoding="utf-8")
-        )
-        load_dotenv()
+        # 프롬프트와 LLM/STT 클라이언트는 프로세스 공유 인스턴스 사용 (통화별 파일 I/O 없음)
+        prompts = prompt_registry.get()
+        llm_clients = get_llm_clients()
 
         self.client = client_instance
         self.call_sid = call_sid
 
         # 질문 리스트
-        self.question_list = [
-            question_config["essential_question1"],
-            question_config["essential_question2"],
-            question_config["essential_question3"],
-            question_config["essential_question4"],
-            question_config["essential_question5"],
-            question_config["essential_question6"],
-            question_config["essential_question7"],
-            question_config["essential_question8"],
-            question_config["essential_question9"],
-        ]
+        self.question_list = prompts.question_list
 
         # 각 질문별 검증 프롬프트
-        self.validation_list = [
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-            validation_config["validation_question1"],
-        ]
-
-        # LLM 모델 초기화
-        self.output_prompt = output_config["output_format"]
-        self.gpt = ChatOpenAI(
-            model="gpt-4o-mini",
+        self.validation_list = prompts.validation_list
+
+        # 고정 안내 문구 (사전 합성 음성 캐시 대상)
+        self.utterances = prompts.utterances
+
+        # LLM 모델
+        self.output_prompt = prompts.output_prompt
+        self.gpt = llm_clients.gpt
+        self.valid_gpt = llm_clients.valid_gpt  # 답변 검증용
+        self.valid_gpt_normalized = llm_clients.valid_gpt_normalized  # STT 교정 + 답변 검증용
+        self.normalize_validation_prompt = prompts.normalize_validation_prompt
+        self.valid_gpt_output = llm_clients.valid_gpt_output  # 최종 데이터 추출용
+        self.vtt = get_voice_to_text()  # 음성-텍스트 변환 인스턴스
+
+        # 유효한 답변마다 해당 필드를 백그라운드로 추출
+        self.profile = ProfileExtractor(
+            llm_clients.field_extractors, prompts.field_extraction_prompt
         )
-        self.valid_gpt = self.gpt.with_structured_output(ValidationResponse)  # 답변 검증용
-        self.valid_gpt_output = self.gpt.with_structured_output(ElderlyUser)  # 최종 데이터 추출용
-        self.vtt = VoiceToText()  # 음성-텍스트 변환 인스턴스
 
     # ---------------------------NODES--------------------------- #
 
@@ -82,11 +168,9 @@ class conversation_logic:
         print("initialize start")
         call_sid = state["call_sid"]
 
-        msg1 = (
-            "안녕하세요. 어르신의 구직을 도와드리기 위해 몇 가지 질문을 드리겠습니다."
-        )
-        msg2 = "질문에 대한 답변은 가능한 구체적으로 말씀해주실 수록 최적의 구직 정보를 제공받으실 수 있습니다."
-        msg3 = "그럼 시작하겠습니다."
+        msg1 = self.utterances["greeting1"]
+        msg2 = self.utterances["greeting2"]
+        msg3 = self.utterances["greeting3"]
 
         await self.client.say(call_sid, msg1)
         await self.client.say(call_sid, msg2)
@@ -109,20 +193,49 @@ class conversation_logic:
         tts_time = time.time() - tts_start
         print(f"[TIMING] Phase {phase} - TTS: {tts_time:.2f}초")
 
-        # 사용자 음성 녹음 및 다운로드
+        # 사용자 답변 원문 수집
         listen_start = time.time()
-        wav_file_path = await self.client.listen(call_sid, phase=phase)
-        listen_time = time.time() - listen_start
-        print(f"[TIMING] Phase {phase} - 녹음+다운로드: {listen_time:.2f}초")
+        if self.client.stt_mode == "streaming":
+            # 통화 음성을 실시간으로 인식 (발화 종료 시점에 원문이 준비됨)
+            raw_text = await self.client.listen_transcript(call_sid, phase=phase)
+            listen_time = time.time() - listen_start
+            print(f"[TIMING] Phase {phase} - 스트리밍 인식: {listen_time:.2f}초")
+        else:
+            # 사용자 음성 녹음 및 다운로드 후 STT
+            wav_file_path = await self.client.listen(call_sid, phase=phase)
+            print("오디오 경로 :", wav_file_path)
+            raw_text = None
+            if wav_file_path:
+                raw_text = await self.vtt.transcribe(wav_file_path)
+            listen_time = time.time() - listen_start
+            print(f"[TIMING] Phase {phase} - 녹음+다운로드+STT: {listen_time:.2f}초")
+
+        # 대부분의 답변은 유효하므로 검증 결과를 기다리지 않고 감사 인사를 먼저 재생 (실패율이 높은 질문 제외)
+        ack_task = None
+        if (
+            SPECULATIVE_ACK
+            and speculation_stats.should_speculate(phase)
+            and raw_text is not None
+            and rule_normalize(raw_text)
+        ):
+            ack_task = asyncio.create_task(self.client.say(call_sid, self.utterances["ack"]))
 
-        # 녹음 파일을 STT 처리
-        print("오디오 경로 :", wav_file_path)
+        # 원문 정제 (통합 모드에서는 답변 검증까지 한 번의 LLM 호출로 처리)
         human_answer = None
-        if wav_file_path:
-            stt_start = time.time()
-            human_answer = await asyncio.to_thread(self.vtt.listen, wav_file_path)
-            stt_time = time.time() - stt_start
-            print(f"[TIMING] Phase {phase} - STT+정제: {stt_time:.2f}초")
+        verdict = None
+        if raw_text is not None:
+            refine_start = time.time()
+            if FUSED_VALIDATION:
+                human_answer, verdict = await self._normalize_and_validate(phase, raw_text)
+                label = "정제+답변검증"
+            else:
+                human_answer = await self.vtt.refine(raw_text)
+                label = "정제"
+            refine_time = time.time() - refine_start
+            print(f"[TIMING] Phase {phase} - {label}: {refine_time:.2f}초")
+
+        if ack_task is not None:
+            await ack_task
 
         # 녹음 실패 또는 STT 실패 시
         if (
@@ -130,11 +243,13 @@ class conversation_logic:
             or "[녹음 실패]" in human_answer
             or "[녹음된 음성이 없습니다]" in human_answer
         ):
-            await self.client.say(
-                call_sid,
-                "죄송합니다. 음성이 잘 들리지 않았어요. 다시 한 번 천천히 말씀해주시겠어요?",
-            )
-            return await self.retry(state)
+            await self.client.say(call_sid, self.utterances["inaudible_retry"])
+            # 이전 턴의 검증 결과가 재사용되지 않도록 초기화
+            return {
+                **await self.retry(state),
+                "validation": None,
+                "speculative_ack": ack_task is not None,
+            }
 
         # 정상 응답 처리
         print(f"[USER] {human_answer}")
@@ -142,7 +257,30 @@ class conversation_logic:
         new_history = past_history + [f"[AI] : {AIquestion}"]
         new_history = new_history + [f"[USER] : {human_answer}"]
 
-        return {"history": new_history, "last_response": human_answer}
+        return {
+            "history": new_history,
+            "last_response": human_answer,
+            "validation": verdict,
+            "speculative_ack": ack_task is not None,
+        }
+
+    async def _normalize_and_validate(self, phase: int, raw_text: str) -> tuple:
+        """
+        STT 원문 교정과 답변 검증을 하나의 구조화 출력 호출로 처리
+        반환: (교정된 답변, 검증 결과 dict) - 인식된 내용이 없으면 (None, None)
+        """
+        cleaned = rule_normalize(raw_text)
+        if not cleaned:
+            return None, None
+
+        AIquestion = self.question_list[phase]
+        validation_input = [
+            SystemMessage(f"{self.validation_list[phase]}\n{self.normalize_validation_prompt}"),
+            HumanMessage(f"질문: {AIquestion} \n답변(STT 원문): {cleaned}"),
+        ]
+        result = await self.valid_gpt_normalized.ainvoke(validation_input)
+        human_answer = result.normalized_text.strip() or cleaned
+        return human_answer, {"is_valid": result.is_valid, "message": result.message}
 
     async def is_valid(self, state: ConversationState) -> str:
         """답변의 유효성을 검증하고 다음 단계 결정"""
@@ -152,37 +290,49 @@ class conversation_logic:
         validation_prompt = self.validation_list[phase]
         human_answer = state["last_response"]
 
-        # GPT를 사용한 답변 유효성 검증
-        validation_input = [
-            SystemMessage(validation_prompt),
-            HumanMessage(f"질문: {AIquestion} \n답변: {human_answer}"),
-        ]
-        validation_start = time.time()
-        justification = await self.valid_gpt.ainvoke(validation_input)
-        validation_time = time.time() - validation_start
-        print(f"[TIMING] Phase {phase} - 답변검증: {validation_time:.2f}초")
+        # 통합 모드에서는 conversation 노드에서 이미 검증 결과를 받음
+        verdict = state.get("validation")
+        if verdict is None:
+            # GPT를 사용한 답변 유효성 검증
+            validation_input = [
+                SystemMessage(validation_prompt),
+                HumanMessage(f"질문: {AIquestion} \n답변: {human_answer}"),
+            ]
+            validation_start = time.time()
+            justification = await self.valid_gpt.ainvoke(validation_input)
+            validation_time = time.time() - validation_start
+            print(f"[TIMING] Phase {phase} - 답변검증: {validation_time:.2f}초")
+            verdict = {"is_valid": justification.is_valid, "message": justification.message}
+
+        # 선행 재생한 감사 인사가 맞았는지 기록
+        if state.get("speculative_ack"):
+            speculation_stats.record(phase, verdict["is_valid"])
+            if not verdict["is_valid"]:
+                print(f"[SPECULATION] Phase {phase} miss - 재질문으로 전환")
 
         # 답변이 유효한 경우
-        if justification.is_valid:
+        if verdict["is_valid"]:
+            # 다음 질문이 재생되는 동안 이 답변의 필드 추출
+            self.profile.submit(phase, AIquestion, human_answer)
             if state["phase"] == len(self.question_list) - 1:  # 마지막 질문인 경우
-                await self.client.say(
-                    call_sid,
-                    "모든 질문에 대한 답변이 끝났습니다. 어르신의 답변을 바탕으로 최적의 구직 정보를 빠른 시일 내에 메세지로 전달해드리겠습니다. 감사합니다.",
-                )
+                await self.client.say(call_sid, self.utterances["all_answered"])
                 return "End"
             else:  # 다음 질문으로 진행
                 return "Next"
         else:  # 답변이 불충분한 경우 재질문
-            common_prefix = "어르신, 말씀주신 내용이 충분하지 않은 것 같아요."
-            ai_prefix = justification.message
-            text = f"{common_prefix} {ai_prefix}"
-            await self.client.say(call_sid, text)
+            # 고정 문구와 LLM 안내를 나눠 보내 고정 문구는 캐시된 음성으로 재생
+            await self.client.say(call_sid, self.utterances["insufficient_prefix"])
+            await self.client.say(call_sid, verdict["message"])
             return "Retry"
 
     async def before_next(self, state: ConversationState) -> ConversationState:
         call_sid = state["call_sid"]
         next_tts_start = time.time()
-        await self.client.say(call_sid, "감사합니다. 다음 질문으로 넘어가겠습니다.")
+        if state.get("speculative_ack"):
+            # "감사합니다."는 검증 중에 이미 재생됨
+            await self.client.say(call_sid, self.utterances["next_question_lead"])
+        else:
+            await self.client.say(call_sid, self.utterances["next_question"])
         next_tts_time = time.time() - next_tts_start
         print(f"[TIMING] Phase {state['phase']} - 다음질문 TTS: {next_tts_time:.2f}초")
 
@@ -192,7 +342,7 @@ class conversation_logic:
 
     async def before_end(self, state: ConversationState) -> ConversationState:
         call_sid = state["call_sid"]
-        end_msg = "어르신, 대화가 종료되었습니다."
+        end_msg = self.utterances["call_end"]
         await self.client.say(call_sid, end_msg)
         await self.client.hangup(call_sid)
         return {
@@ -203,37 +353,6 @@ class conversation_logic:
         new_history = state["history"][:-2]
         return {"history": new_history}
 
-    # ---------------------------WORKFLOW --------------------------- #
-
-    def compose_workflow(self):
-        """LangGraph 워크플로우 구성"""
-        workflow = StateGraph(ConversationState)
-
-        # 워크플로우 노드들 추가
-        workflow.add_node(self.initialize, "initialize")
-        workflow.add_node(self.conversation, "conversation")
-        workflow.add_node(self.is_valid, "is_valid")
-        workflow.add_node(self.retry, "retry")
-        workflow.add_node(self.before_next, "before_next")
-        workflow.add_node(self.before_end, "before_end")
-
-        # 워크플로우 엣지(연결) 정의
-        workflow.add_edge(START, "initialize")  # 시작 → 초기화
-        workflow.add_edge("initialize", "conversation")  # 초기화 → 대화
-        workflow.add_edge("retry", "conversation")  # 재시도 → 대화
-        workflow.add_conditional_edges(  # 대화 후 조건부 분기
-            "conversation",
-            self.is_valid,
-            {"Next": "before_next", "Retry": "retry", "End": "before_end"},
-        )
-        workflow.add_edge("before_end", END)  # 종료 전 → 종료
-        workflow.add_edge("before_next", "conversation")  # 다음 질문 전 → 대화
-        
-        # 그래프 컴파일 및 재귀 제한 설정
-        graph = workflow.compile()
-        graph.recursion_limit = 200
-        self.graph = graph
-
     async def _run(self):
         dummy_input = {
             "phase": 0,
@@ -241,25 +360,40 @@ class conversation_logic:
             "last_response": "",
             "ai_prefix": "",
             "call_sid": self.call_sid,
+            "validation": None,
+            "speculative_ack": False,
         }
 
-        result = await self.graph.ainvoke(dummy_input)
+        # 컴파일된 공용 그래프에 이 통화의 로직 인스턴스를 config로 주입
+        result = await get_workflow().ainvoke(
+            dummy_input,
+            config={"configurable": {"logic": self}, "recursion_limit": 200},
+        )
 
         return result
 
     async def run(self):
         """대화 워크플로우 실행 및 최종 데이터 추출"""
-        result = await self._run()
+        try:
+            result = await self._run()
+        except BaseException:
+            self.profile.cancel()
+            raise
         history = result["history"]
-        
-        # 대화 내용을 구조화된 데이터로 변환
-        validation_input = [
-            SystemMessage(self.output_prompt),
-            HumanMessage(f"대화 내용 : {history}"),
-        ]
 
-        # GPT를 사용하여 최종 사용자 정보 추출
-        output = await self.valid_gpt_output.ainvoke(validation_input)
+        # 통화 중 질문별로 추출한 필드를 조립 (대부분 통화 종료 시점에 이미 완료됨)
+        extraction_start = time.time()
+        output = await self.profile.assemble()
+        if output is None:
+            # 추출 실패 필드가 있으면 기존 방식대로 전체 대화에서 추출
+            print("질문별 추출이 완료되지 않아 전체 대화에서 다시 추출합니다.")
+            validation_input = [
+                SystemMessage(self.output_prompt),
+                HumanMessage(f"대화 내용 : {history}"),
+            ]
+            output = await self.valid_gpt_output.ainvoke(validation_input)
+        extraction_time = time.time() - extraction_start
+        print(f"[TIMING] 최종 프로필 추출: {extraction_time:.2f}초")
         # Sample
         # INFO:     54.209.203.118:59782 - "POST /voice HTTP/1.1" 200 OK
         # 최종 output: {'name': '김영종', 'age': 76, 'location': '경기도 용인시 수지구',
@@ -274,7 +408,7 @@ class conversation_logic:
         return output
 
     async def _generate_files(self, history, user_data):
-        """통화 종료 후 transcript, metadata.json 생성 및 추천 시스템 실행"""
+        """통화 종료 후 transcript, metadata.json 생성 및 추천 작업 제출"""
         session_dir = self.client.session_dir
 
         # 1. transcript.txt 생성
@@ -301,29 +435,5 @@ class conversation_logic:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
         print(f"Metadata saved to: {metadata_path}")
 
-        # 3. 추천 시스템 실행
-        try:
-            print("Running recommendation system...")
-            result = subprocess.run(
-                ["python", "recommendation/main.py", session_dir],
-                capture_output=True,
-                text=True,
-                timeout=180,  # timeout: 3분
-                cwd=os.getcwd(),  # 현재 디렉토리에서 실행
-            )
-            if result.returncode == 0:
-                print("Recommendation system completed successfully")
-                if result.stdout:
-                    print(result.stdout)
-            else:
-                print(
-                    f"Recommendation system failed (return code: {result.returncode})"
-                )
-                if result.stderr:
-                    print(f"Error details: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            print("Recommendation system timed out (3분 초과)")
-        except FileNotFoundError:
-            print("Error: recommendation/main.py 파일을 찾을 수 없습니다")
-        except Exception as e:
-            print(f"Error running recommendation system: {e}")
+        # 3. 추천 시스템 실행 (상주 워커에 제출만 하고 바로 반환, 상태는 GET /recommendations/{session_id})
+        recommendation_service.submit(session_dir)
@@ -0,0 +1,82 @@
+"""
+질문별 프로필 추출 - 유효한 답변을 받을 때마다 해당 ElderlyUser 필드만 추출
+다음 질문이 재생되는 동안 백그라운드로 추출하여, 통화가 끝나는 즉시 최종 프로필을 조립합니다.
+"""
+
+import asyncio
+
+from pydantic import Field, create_model
+from langchain.schema.messages import HumanMessage, SystemMessage
+
+from schemas.ElderlyUser import ElderlyUser
+
+# 필수 질문 순서와 같은 순서의 ElderlyUser 필드 (phase i → PHASE_FIELDS[i])
+PHASE_FIELDS = (
+    "name",
+    "age",
+    "location",
+    "available_time",
+    "license",
+    "preferred_field",
+    "health_condition",
+    "career",
+    "education",
+)
+
+
+def build_field_models() -> dict:
+    """필드 하나만 가진 구조화 출력 스키마 생성 (필드명 → pydantic 모델)"""
+    models = {}
+    for name in PHASE_FIELDS:
+        annotation = ElderlyUser.model_fields[name].annotation
+        models[name] = create_model(
+            f"ElderlyUser_{name}",
+            **{name: (annotation, Field(description=f"어르신의 {name}"))},
+        )
+    return models
+
+
+class ProfileExtractor:
+    """통화 하나의 질문별 추출 태스크를 관리하고 최종 ElderlyUser를 조립"""
+
+    def __init__(self, field_extractors: dict, prompt: str):
+        self.field_extractors = field_extractors  # 필드명 → structured output LLM
+        self.prompt = prompt
+        self._tasks = {}  # phase → 추출 태스크
+
+    def submit(self, phase: int, question: str, answer: str):
+        """유효한 답변의 필드 추출을 백그라운드로 시작 (같은 질문의 이전 추출은 취소)"""
+        previous = self._tasks.get(phase)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        self._tasks[phase] = asyncio.create_task(self._extract(phase, question, answer))
+
+    async def _extract(self, phase: int, question: str, answer: str):
+        name = PHASE_FIELDS[phase]
+        extraction_input = [
+            SystemMessage(self.prompt),
+            HumanMessage(f"추출할 항목: {name}\n질문: {question}\n답변: {answer}"),
+        ]
+        try:
+            result = await self.field_extractors[name].ainvoke(extraction_input)
+            return getattr(result, name)
+        except Exception as e:
+            print(f"[프로필 추출 오류] Phase {phase} ({name}): {e}")
+            return None
+
+    async def assemble(self) -> ElderlyUser | None:
+        """모든 필드 추출이 끝나면 ElderlyUser로 조립 (누락/실패가 있으면 None)"""
+        if len(self._tasks) < len(PHASE_FIELDS):
+            return None
+
+        phases = sorted(self._tasks)
+        values = await asyncio.gather(*(self._tasks[phase] for phase in phases))
+        fields = {PHASE_FIELDS[phase]: value for phase, value in zip(phases, values)}
+        if any(value is None for value in fields.values()):
+            return None
+        return ElderlyUser(**fields)
+
+    def cancel(self):
+        """진행 중인 추출 태스크 취소"""
+        for task in self._tasks.values():
+            task.cancel()
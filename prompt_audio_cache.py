@@ -0,0 +1,157 @@
+"""
+고정 안내 문구 음성 캐시 - 사전 합성한 음성을 <Play>로 재생
+질문/인사말/재질문 등 매 통화 동일한 문구를 한 번만 합성하여 텍스트 해시로 저장합니다.
+
+사전 합성 실행:
+    python prompt_audio_cache.py                 # OpenAI TTS 사용
+    python prompt_audio_cache.py --command "piper --model ko.onnx --output_file {output}"
+"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+
+from prompt_registry import prompt_registry
+
+PROMPT_AUDIO_DIR = "prompt_audio"
+
+
+def text_key(text: str) -> str:
+    """문구의 캐시 키 (텍스트 SHA-256)"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+class TTSBackend(ABC):
+    """문구를 음성 파일로 합성하는 백엔드 인터페이스"""
+
+    extension = "mp3"  # Twilio <Play>가 지원하는 형식 (mp3 / wav)
+
+    @abstractmethod
+    def synthesize(self, text: str) -> bytes:
+        """문구를 합성한 음성 파일 내용 (extension 형식)"""
+
+
+class OpenAITTSBackend(TTSBackend):
+    """OpenAI TTS API로 합성 (사전 합성 단계에서 한 번만 호출)"""
+
+    extension = "mp3"
+
+    def __init__(self, model: str = "tts-1", voice: str = "nova"):
+        import openai
+
+        load_dotenv()
+        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.model = model
+        self.voice = voice
+
+    def synthesize(self, text: str) -> bytes:
+        response = self.client.audio.speech.create(
+            model=self.model, voice=self.voice, input=text, response_format="mp3"
+        )
+        return response.content
+
+
+class CommandTTSBackend(TTSBackend):
+    """
+    로컬 TTS 명령어로 합성 (piper, espeak-ng 등 오프라인 엔진)
+    - command: {output} 자리에 출력 파일 경로가 들어가는 명령어, 텍스트는 stdin으로 전달
+    """
+
+    def __init__(self, command: str, extension: str = "wav"):
+        self.command = command
+        self.extension = extension
+
+    def synthesize(self, text: str) -> bytes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, f"prompt.{self.extension}")
+            subprocess.run(
+                self.command.format(output=output_path),
+                input=text.encode("utf-8"),
+                shell=True,
+                check=True,
+            )
+            with open(output_path, "rb") as f:
+                return f.read()
+
+
+class PromptAudioCache:
+    """텍스트 해시 → 음성 파일 캐시 (서버 시작 시 한 번만 디렉토리를 읽음)"""
+
+    def __init__(self, cache_dir: str = PROMPT_AUDIO_DIR):
+        self.cache_dir = cache_dir
+        self._files = {}  # 캐시 키 → 파일명
+        self.refresh()
+
+    def refresh(self):
+        """캐시 디렉토리의 파일 목록을 다시 읽음"""
+        files = {}
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                key, ext = os.path.splitext(filename)
+                if ext in (".mp3", ".wav"):
+                    files[key] = filename
+        self._files = files
+
+    def lookup(self, text: str) -> str | None:
+        """문구에 해당하는 캐시 파일명 반환 (없으면 None)"""
+        return self._files.get(text_key(text))
+
+    def path_for(self, filename: str) -> str | None:
+        """캐시 파일의 로컬 경로 반환 (캐시에 없는 파일명이면 None)"""
+        key, _ = os.path.splitext(filename)
+        if self._files.get(key) != filename:
+            return None
+        return os.path.join(self.cache_dir, filename)
+
+    def render(self, texts: list[str], backend: TTSBackend, force: bool = False) -> int:
+        """캐시에 없는 문구들을 합성하여 저장하고 새로 합성한 개수를 반환"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        rendered = 0
+        for text in texts:
+            if not force and self.lookup(text):
+                continue
+            filename = f"{text_key(text)}.{backend.extension}"
+            audio = backend.synthesize(text.strip())
+
+            # 임시 파일에 쓴 뒤 교체하여 서버가 덜 쓰인 파일을 재생하지 않도록 함
+            tmp_path = os.path.join(self.cache_dir, f".{filename}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+
+            self._files[text_key(text)] = filename
+            rendered += 1
+            print(f"Rendered: {filename} ← '{text}'")
+        return rendered
+
+
+def load_fixed_prompts() -> list[str]:
+    """사전 합성 대상 고정 문구 목록 (필수 질문 + 고정 안내 문구)"""
+    prompts = prompt_registry.get()
+    return list(prompts.question_list) + [str(text) for text in prompts.utterances.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="고정 안내 문구 음성 사전 합성")
+    parser.add_argument("--command", help="로컬 TTS 명령어 ({output}: 출력 파일 경로)")
+    parser.add_argument("--extension", default="wav", help="로컬 TTS 출력 형식")
+    parser.add_argument("--force", action="store_true", help="기존 캐시도 다시 합성")
+    args = parser.parse_args()
+
+    if args.command:
+        backend = CommandTTSBackend(args.command, extension=args.extension)
+    else:
+        backend = OpenAITTSBackend()
+
+    cache = PromptAudioCache()
+    texts = load_fixed_prompts()
+    rendered = cache.render(texts, backend, force=args.force)
+    print(f"총 {len(texts)}개 문구 중 {rendered}개 합성 완료 → {os.path.abspath(cache.cache_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+프롬프트 설정 레지스트리 - YAML 설정을 프로세스당 한 번만 로드
+통화마다 파일을 읽지 않고 불변 스냅샷을 공유하며, 파일 수정 시각이 바뀌면 다시 로드합니다.
+"""
+
+import asyncio
+import os
+from types import MappingProxyType
+import yaml
+
+PROMPT_CONFIG_FILES = {
+    "questions": "./configs/essential_question_prompts.yaml",
+    "validation": "./configs/validation_prompts.yaml",
+    "output": "./configs/output_format_prompt.yaml",
+    "correction": "./configs/sentence_correction_prompts.yaml",
+    "utterances": "./configs/fixed_utterance_prompts.yaml",
+}
+
+QUESTION_COUNT = 9
+
+
+class PromptSet:
+    """한 시점의 프롬프트 설정 스냅샷 (읽기 전용)"""
+
+    __slots__ = (
+        "question_list",
+        "validation_list",
+        "output_prompt",
+        "correction_prompt",
+        "normalize_validation_prompt",
+        "field_extraction_prompt",
+        "utterances",
+        "version",
+    )
+
+    def __init__(self, configs: dict, version: tuple):
+        question_config = configs["questions"]
+        validation_config = configs["validation"]
+
+        # 질문 리스트
+        self.question_list = tuple(
+            question_config[f"essential_question{i}"] for i in range(1, QUESTION_COUNT + 1)
+        )
+        # 각 질문별 검증 프롬프트 (현재는 모든 질문이 같은 프롬프트 사용)
+        self.validation_list = tuple(
+            validation_config["validation_question1"] for _ in range(QUESTION_COUNT)
+        )
+        self.output_prompt = configs["output"]["output_format"]
+        self.field_extraction_prompt = configs["output"]["field_extraction"]
+        self.correction_prompt = configs["correction"]["sentence_correction1"]
+        # 정제 + 검증 통합 호출 시 검증 프롬프트 뒤에 붙는 교정 지시문
+        self.normalize_validation_prompt = validation_config["normalize_and_validate"]
+        self.utterances = MappingProxyType(dict(configs["utterances"]))
+        self.version = version
+
+
+class PromptRegistry:
+    """프롬프트 스냅샷을 보관하고 설정 파일 변경 시 교체하는 레지스트리"""
+
+    def __init__(self, config_files: dict = PROMPT_CONFIG_FILES):
+        self.config_files = config_files
+        self._prompts = None
+
+    def _mtimes(self) -> tuple:
+        return tuple(os.stat(path).st_mtime_ns for path in self.config_files.values())
+
+    def load(self) -> PromptSet:
+        """설정 파일을 읽어 새 스냅샷으로 교체"""
+        version = self._mtimes()
+        configs = {}
+        for name, path in self.config_files.items():
+            with open(path, "r", encoding="utf-8") as f:
+                configs[name] = yaml.safe_load(f)
+        # 참조 교체만으로 갱신 (진행 중인 통화는 기존 스냅샷을 계속 사용)
+        self._prompts = PromptSet(configs, version)
+        return self._prompts
+
+    def get(self) -> PromptSet:
+        """현재 스냅샷 반환 (로드된 이후에는 파일 I/O 없음)"""
+        if self._prompts is None:
+            return self.load()
+        return self._prompts
+
+    def reload_if_changed(self) -> bool:
+        """설정 파일 수정 시각이 바뀌었으면 다시 로드"""
+        try:
+            if self._prompts is not None and self._mtimes() == self._prompts.version:
+                return False
+            self.load()
+            return True
+        except (OSError, yaml.YAMLError, KeyError) as e:
+            # 수정 중인 파일 등 잘못된 설정은 무시하고 기존 스냅샷 유지
+            print(f"Prompt reload failed, keeping previous prompts: {e}")
+            return False
+
+    async def watch(self, interval: float = 5.0):
+        """주기적으로 설정 파일 변경을 확인하는 백그라운드 태스크"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.reload_if_changed():
+                print("Prompt configs changed on disk. Reloaded prompt registry.")
+
+
+prompt_registry = PromptRegistry()
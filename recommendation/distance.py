@@ -0,0 +1,38 @@
+"""
+거리 계산 엔진 - 사용자 좌표와 공고 좌표 배열 간 거리/거리 점수를 한 번에 계산
+- 공고 좌표: (N, 2) float 배열 [위도, 경도], 좌표를 모르는 공고는 NaN
+- 거리는 km 단위 숫자로 유지하고, 출력할 때만 format_distance로 문자열 변환
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+FULL_SCORE_DISTANCE_KM = 1.0  # 이 거리 이내는 만점
+MAX_DISTANCE_KM = 30.0        # 이 거리 초과(또는 위치 미상)는 0점
+
+
+def haversine_km(origin: Tuple[float, float], coords: np.ndarray) -> np.ndarray:
+    """하버사인 공식으로 origin(위도, 경도)과 각 좌표 간 거리(km) 계산 (NaN 좌표는 NaN)"""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2, lon2 = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_scores(distances: np.ndarray) -> np.ndarray:
+    """거리를 0~1 점수로 변환 (1km 이내 1점, 30km까지 선형 감소, 초과/미상은 0점)"""
+    distances = np.asarray(distances, dtype=np.float64)
+    scores = 1.0 - (distances - FULL_SCORE_DISTANCE_KM) / (MAX_DISTANCE_KM - FULL_SCORE_DISTANCE_KM)
+    scores = np.clip(scores, 0.0, 1.0)
+    return np.where(np.isnan(distances), 0.0, scores)
+
+
+def format_distance(distance_km: Optional[float]) -> str:
+    """출력용 거리 문자열 (예: '12.34km', 위치 미상은 '-')"""
+    if distance_km is None or np.isnan(distance_km):
+        return "-"
+    return f"{distance_km:.2f}km"
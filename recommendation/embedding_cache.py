@@ -0,0 +1,198 @@
+"""
+임베딩 캐시 - (모델명, 텍스트 SHA-256) 기준으로 임베딩 벡터를 재사용
+- 메모리 LRU + 디스크(SQLite) 2단계 캐시
+- 디스크 캐시는 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+- 벡터는 float32 바이트로 저장 (4096차원 기준 약 16KB), 메모리 LRU도 float32 배열(array('f'))로 보관
+  (파이썬 float 리스트는 4096차원 기준 약 130KB이므로 조회 결과를 반환할 때만 리스트로 변환)
+
+같은 공고 텍스트나 같은 사용자 프로필로 추천을 다시 실행하면 임베딩 API를 호출하지 않습니다.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(BASE_DIR, "data", "embedding_cache.sqlite3")
+)
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", 2048))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 50000))
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """캐시 키 (모델명 + 텍스트 SHA-256)"""
+    return f"{model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def _to_array(embedding) -> array:
+    return embedding if isinstance(embedding, array) else array("f", embedding)
+
+
+def _from_blob(blob: bytes) -> array:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector
+
+
+class EmbeddingCache:
+    """메모리 LRU + SQLite 임베딩 캐시 (스레드 안전)"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH,
+                 memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # 키 → array('f')
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_count = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._db
+
+    def _remember(self, key: str, embedding: array):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[int, List[float]]:
+        """캐시에 있는 텍스트의 임베딩 조회 (반환: 입력 위치 → 임베딩)"""
+        found = {}
+        with self._lock:
+            disk_lookup = {}
+            for position, text in enumerate(texts):
+                key = cache_key(model_name, text)
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[position] = embedding.tolist()
+                else:
+                    disk_lookup.setdefault(key, []).append(position)
+
+            if disk_lookup:
+                try:
+                    db = self._connect()
+                    keys = list(disk_lookup)
+                    rows = []
+                    # SQLite 변수 개수 제한 이내로 나눠 조회
+                    for i in range(0, len(keys), 500):
+                        chunk = keys[i:i + 500]
+                        rows += db.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        ).fetchall()
+                    if rows:
+                        now = time.time()
+                        db.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                            [(now, key) for key, _ in rows],
+                        )
+                        db.commit()
+                except sqlite3.Error as e:
+                    print(f">> 임베딩 캐시 조회 실패: {e}")
+                    rows = []
+
+                for key, blob in rows:
+                    embedding = _from_blob(blob)
+                    self._remember(key, embedding)
+                    embedding = embedding.tolist()
+                    for position in disk_lookup.pop(key):
+                        found[position] = embedding
+                        self.disk_hits += 1
+
+                self.misses += sum(len(positions) for positions in disk_lookup.values())
+        return found
+
+    def put_many(self, model_name: str, texts: List[str], embeddings: List[Optional[List[float]]]):
+        """임베딩 저장 (None은 건너뜀), 최대 개수를 넘으면 오래된 항목 삭제"""
+        now = time.time()
+        records = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                if embedding is None:
+                    continue
+                key = cache_key(model_name, text)
+                vector = _to_array(embedding)
+                self._remember(key, vector)
+                records.append((key, vector.tobytes(), now))
+            if not records:
+                return
+            try:
+                db = self._connect()
+                # 같은 키는 같은 텍스트의 임베딩이므로 새로 추가된 행만 세어 항목 수를 추적 (COUNT(*) 생략)
+                inserted = db.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", records
+                ).rowcount
+                if inserted < len(records):
+                    db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _, _ in records],
+                    )
+                self._disk_count += max(inserted, 0)
+                if self._disk_count > self.max_entries:
+                    # 한 번에 10%를 더 비워 매 저장마다 삭제가 일어나지 않도록 함
+                    excess = self._disk_count - int(self.max_entries * 0.9)
+                    deleted = db.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    ).rowcount
+                    self.evictions += deleted
+                    self._disk_count -= deleted
+                db.commit()
+            except sqlite3.Error as e:
+                # 디스크 캐시 실패는 임베딩 결과에 영향을 주지 않음
+                print(f">> 임베딩 캐시 저장 실패: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/실패 횟수"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_count or 0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_caches = {}  # 파일 경로 → 캐시 (같은 프로세스의 서비스들이 공유)
+
+
+def get_embedding_cache(path: str = EMBEDDING_CACHE_PATH) -> EmbeddingCache:
+    """경로별 공유 임베딩 캐시 반환"""
+    path = os.path.abspath(path)
+    if path not in _caches:
+        _caches[path] = EmbeddingCache(path)
+    return _caches[path]
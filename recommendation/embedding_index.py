@@ -0,0 +1,174 @@
+"""
+공고 임베딩 인덱스 - 크롤링 시점에 공고 임베딩을 계산하여 job_openings.pkl 옆에 저장
+- 추천 시에는 사용자 프로필 1건만 임베딩하고, 저장된 행렬과 한 번의 행렬-벡터 곱으로 유사도 계산
+- 출력: ./data/job_embeddings.npy (float32, L2 정규화, 메모리 매핑 가능)
+        ./data/job_embeddings_ids.json (행 순서의 job_id, 임베딩 텍스트 해시, 모델명)
+
+[갱신 방식]
+ - 크롤러가 새 공고 목록을 저장하면 텍스트 해시가 같은 공고는 기존 벡터를 재사용
+ - 신규/변경된 공고만 Upstage API로 임베딩
+ - 행렬 파일을 먼저 교체하고 id 파일을 마지막에 교체 (id 파일 수정 시각 = 인덱스 버전)
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PASSAGE_MODEL = "embedding-passage"
+
+
+def job_text(job: Dict[str, Any]) -> str:
+    """공고의 임베딩 입력 텍스트"""
+    return f"채용 제목: {job.get('채용제목', '')}. 상세 내용: {job.get('상세내용', '')}"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """코사인 유사도를 내적으로 계산할 수 있도록 행별 L2 정규화"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class EmbeddingIndex:
+    """job_id 순서에 맞춰 정렬된 공고 임베딩 행렬 (읽기 전용)"""
+
+    def __init__(self, matrix: np.ndarray, job_ids: List[str], hashes: List[str],
+                 model: str = PASSAGE_MODEL, version: Optional[int] = None):
+        self.matrix = matrix
+        self.job_ids = job_ids
+        self.hashes = hashes
+        self.model = model
+        self.version = version
+        self.row_of = {job_id: row for row, job_id in enumerate(job_ids)}
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def lookup(self, jobs: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+        """
+        공고 목록의 행 번호 조회 (텍스트가 바뀐 공고는 없는 것으로 처리)
+        반환: (인덱스에 있는 공고의 행 번호 목록, 인덱스에 없는 공고의 위치 목록)
+        """
+        rows, missing = [], []
+        for position, job in enumerate(jobs):
+            row = self.row_of.get(job.get("job_id"))
+            if row is None or self.hashes[row] != text_hash(job_text(job)):
+                missing.append(position)
+                rows.append(-1)
+            else:
+                rows.append(row)
+        return rows, missing
+
+
+class EmbeddingIndexFiles:
+    """데이터 폴더의 인덱스 파일 읽기/쓰기 (id 파일 수정 시각이 바뀌면 다시 로드)"""
+
+    def __init__(self, data_dir: str):
+        self.matrix_file = os.path.join(data_dir, "job_embeddings.npy")
+        self.ids_file = os.path.join(data_dir, "job_embeddings_ids.json")
+        self._index = None
+
+    def _version(self) -> Optional[int]:
+        try:
+            return os.stat(self.ids_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> Optional[EmbeddingIndex]:
+        """현재 인덱스 반환 (파일이 없거나 행 수가 맞지 않으면 None)"""
+        version = self._version()
+        if version is None:
+            return None
+        if self._index is not None and self._index.version == version:
+            return self._index
+
+        try:
+            with open(self.ids_file, "r", encoding="utf-8") as f:
+                ids_data = json.load(f)
+            # 전체를 메모리에 올리지 않고 필요한 행만 읽음
+            matrix = np.load(self.matrix_file, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f">>> 임베딩 인덱스 로드 중 오류: {e}")
+            return self._index
+
+        if matrix.shape[0] != len(ids_data["job_ids"]):
+            print(">>> 임베딩 인덱스의 행 수와 job_id 수가 달라 사용하지 않습니다.")
+            return self._index
+
+        self._index = EmbeddingIndex(
+            matrix, ids_data["job_ids"], ids_data["hashes"], ids_data.get("model", PASSAGE_MODEL), version
+        )
+        print(f">>> 임베딩 인덱스 로드: {len(self._index)}개 공고, {matrix.shape[1]}차원")
+        return self._index
+
+    def save(self, matrix: np.ndarray, job_ids: List[str], hashes: List[str], model: str = PASSAGE_MODEL):
+        """행렬 → id 순서로 임시 파일 저장 후 교체"""
+        tmp_matrix = f"{self.matrix_file}.tmp"
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix.astype(np.float32))
+        os.replace(tmp_matrix, self.matrix_file)
+
+        tmp_ids = f"{self.ids_file}.tmp"
+        with open(tmp_ids, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "job_ids": job_ids, "hashes": hashes}, f, ensure_ascii=False)
+        os.replace(tmp_ids, self.ids_file)
+
+
+def build_index(openings: List[Dict[str, Any]], embedding_service,
+                files: EmbeddingIndexFiles) -> Optional[EmbeddingIndex]:
+    """
+    공고 목록의 임베딩 인덱스를 만들어 저장 (기존 인덱스에서 텍스트가 같은 공고는 재사용)
+    임베딩에 실패한 공고는 인덱스에서 제외되며 추천 시 즉석에서 임베딩됩니다.
+    """
+    previous = files.load()
+    texts = [job_text(job) for job in openings]
+    hashes = [text_hash(text) for text in texts]
+
+    vectors: List[Optional[np.ndarray]] = [None] * len(openings)
+    to_embed = []
+    for position, job in enumerate(openings):
+        row = previous.row_of.get(job.get("job_id")) if previous is not None else None
+        if row is not None and previous.hashes[row] == hashes[position]:
+            vectors[position] = np.asarray(previous.matrix[row], dtype=np.float32)
+        else:
+            to_embed.append(position)
+
+    print(f">>> 임베딩 인덱스 갱신: 재사용 {len(openings) - len(to_embed)}개, 신규 임베딩 {len(to_embed)}개")
+    if to_embed:
+        # 배치 요청으로 임베딩 (실패한 공고만 None)
+        embeddings = embedding_service.get_embeddings_batch(
+            [texts[position] for position in to_embed], model_name=PASSAGE_MODEL
+        )
+        for position, embedding in zip(to_embed, embeddings):
+            if embedding is not None:
+                vectors[position] = normalize_rows(np.asarray([embedding], dtype=np.float32))[0]
+
+    kept = [position for position, vector in enumerate(vectors) if vector is not None]
+    if not kept:
+        print(">>> 임베딩된 공고가 없어 인덱스를 저장하지 않습니다.")
+        return None
+    if len(kept) < len(openings):
+        print(f">>> 임베딩 실패 공고 {len(openings) - len(kept)}개는 인덱스에서 제외")
+
+    matrix = np.vstack([vectors[position] for position in kept])
+    job_ids = [openings[position]["job_id"] for position in kept]
+    files.save(matrix, job_ids, [hashes[position] for position in kept])
+    return files.load()
+
+
+_files = {}  # 데이터 폴더 → 인덱스 파일 (같은 프로세스에서 공유)
+
+
+def get_embedding_index_files(data_dir: str) -> EmbeddingIndexFiles:
+    """데이터 폴더별 공유 인덱스 파일 객체 반환"""
+    data_dir = os.path.abspath(data_dir)
+    if data_dir not in _files:
+        _files[data_dir] = EmbeddingIndexFiles(data_dir)
+    return _files[data_dir]
@@ -0,0 +1,213 @@
+"""
+주소 → 좌표 변환 (Kakao 주소 검색 API) 및 영구 좌표 캐시
+- 정규화된 주소(공백 정리)를 키로 SQLite에 저장하여 프로세스가 종료되어도 재사용
+- 검색 결과가 없는 주소도 저장 (negative caching, 짧은 TTL로 재시도)
+- 항목마다 TTL을 두고, 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제
+
+크롤러가 공고를 수집할 때 미리 좌표를 저장해 두므로, 추천 시에는 사용자 주소만 조회합니다.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+KAKAO_ADDRESS_URL = "https://dapi.kakao.com/v2/local/search/address.json"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(BASE_DIR, "data", "geocode_cache.sqlite3"))
+GEOCODE_TTL_DAYS = float(os.getenv("GEOCODE_TTL_DAYS", 90))
+GEOCODE_NEGATIVE_TTL_HOURS = float(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", 24))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 100000))
+GEOCODE_CACHE_MEMORY_SIZE = int(os.getenv("GEOCODE_CACHE_MEMORY_SIZE", 4096))
+GEOCODE_CONCURRENCY = int(os.getenv("GEOCODE_CONCURRENCY", 4))
+
+Coords = Tuple[float, float]
+
+
+def normalize_address(address: str) -> str:
+    """캐시 키용 주소 정규화 (앞뒤 공백 제거, 연속 공백을 하나로)"""
+    return re.sub(r"\s+", " ", address or "").strip()
+
+
+class GeocodeCache:
+    """메모리 LRU + SQLite 좌표 캐시 (스레드 안전, 좌표가 None이면 검색 결과 없음)"""
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH,
+                 ttl_seconds: float = GEOCODE_TTL_DAYS * 86400,
+                 negative_ttl_seconds: float = GEOCODE_NEGATIVE_TTL_HOURS * 3600,
+                 max_entries: int = GEOCODE_CACHE_MAX_ENTRIES,
+                 memory_size: int = GEOCODE_CACHE_MEMORY_SIZE):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # 주소 → (좌표 또는 None, 만료 시각)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes "
+                "(address TEXT PRIMARY KEY, lat REAL, lon REAL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS geocodes_last_used ON geocodes (last_used)")
+            self._db.commit()
+        return self._db
+
+    def _remember(self, address: str, coords: Optional[Coords], expires_at: float):
+        self._memory[address] = (coords, expires_at)
+        self._memory.move_to_end(address)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, address: str) -> Tuple[bool, Optional[Coords]]:
+        """반환: (캐시 적중 여부, 좌표) - 적중했는데 좌표가 None이면 검색 결과가 없던 주소"""
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(address)
+            if cached is not None and cached[1] > now:
+                self._memory.move_to_end(address)
+                self.hits += 1
+                return True, cached[0]
+
+            try:
+                db = self._connect()
+                row = db.execute(
+                    "SELECT lat, lon, expires_at FROM geocodes WHERE address = ?", (address,)
+                ).fetchone()
+                if row is not None and row[2] > now:
+                    db.execute("UPDATE geocodes SET last_used = ? WHERE address = ?", (now, address))
+                    db.commit()
+                    coords = (row[0], row[1]) if row[0] is not None else None
+                    self._remember(address, coords, row[2])
+                    self.hits += 1
+                    return True, coords
+            except sqlite3.Error as e:
+                print(f">> 좌표 캐시 조회 실패: {e}")
+
+            self.misses += 1
+            return False, None
+
+    def put(self, address: str, coords: Optional[Coords]):
+        """좌표 저장 (None은 검색 결과 없음으로 짧은 TTL 적용), 최대 개수를 넘으면 오래된 항목 삭제"""
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if coords is not None else self.negative_ttl_seconds)
+        lat, lon = coords if coords is not None else (None, None)
+        with self._lock:
+            self._remember(address, coords, expires_at)
+            try:
+                db = self._connect()
+                db.execute(
+                    "INSERT OR REPLACE INTO geocodes (address, lat, lon, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (address, lat, lon, expires_at, now),
+                )
+                count = db.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+                if count > self.max_entries:
+                    # 만료된 항목을 먼저 지우고, 그래도 넘치면 10%를 더 비움
+                    db.execute("DELETE FROM geocodes WHERE expires_at <= ?", (now,))
+                    count = db.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+                    excess = count - int(self.max_entries * 0.9)
+                    if excess > 0:
+                        db.execute(
+                            "DELETE FROM geocodes WHERE address IN "
+                            "(SELECT address FROM geocodes ORDER BY last_used LIMIT ?)",
+                            (excess,),
+                        )
+                        self.evictions += excess
+                db.commit()
+            except sqlite3.Error as e:
+                print(f">> 좌표 캐시 저장 실패: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class Geocoder:
+    """Kakao 주소 검색 + 영구 캐시"""
+
+    def __init__(self, api_key: Optional[str], cache: GeocodeCache):
+        self.api_key = api_key
+        self.cache = cache
+
+    def _search(self, query: str) -> Optional[Coords]:
+        """Kakao 주소 검색 (결과 없음은 None, 요청 실패는 예외)"""
+        response = requests.get(
+            KAKAO_ADDRESS_URL,
+            headers={"Authorization": f"KakaoAK {self.api_key}"},
+            params={"query": query},
+            timeout=10,
+        )
+        response.raise_for_status()
+        documents = response.json().get("documents")
+        if documents:
+            return float(documents[0]['y']), float(documents[0]['x'])
+        return None
+
+    def geocode(self, address: str) -> Optional[Coords]:
+        """주소를 (위도, 경도)로 변환 (캐시 우선, 검색 결과가 없던 주소는 TTL 동안 다시 요청하지 않음)"""
+        address = normalize_address(address)
+        if not address:
+            return None
+
+        hit, coords = self.cache.get(address)
+        if hit:
+            return coords
+        if not self.api_key:
+            return None
+
+        try:
+            coords = self._search(address)
+            # [폴백 로직] 초기 검색 실패 시, 지역명 뒤에 '청'을 붙여 재시도
+            if coords is None and address.endswith(('구', '시', '군')):
+                print(f"[알림] '{address}' 검색 실패. '{address}청'(으)로 재시도합니다.")
+                coords = self._search(address + '청')
+        except Exception as e:
+            # 네트워크/API 오류는 캐시하지 않음 (다음 요청에서 재시도)
+            print(f"주소 좌표 변환 중 오류 발생: {e}")
+            return None
+
+        self.cache.put(address, coords)
+        return coords
+
+    def geocode_many(self, addresses: List[str]) -> Dict[str, Optional[Coords]]:
+        """여러 주소를 중복 제거 후 변환 (캐시에 없는 주소만 GEOCODE_CONCURRENCY개씩 동시 요청)"""
+        unique = list(dict.fromkeys(normalize_address(address) for address in addresses if address))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, GEOCODE_CONCURRENCY)) as executor:
+            return dict(zip(unique, executor.map(self.geocode, unique)))
+
+
+_geocoders = {}  # 캐시 파일 경로 → 변환기 (같은 프로세스에서 공유)
+
+
+def get_geocoder(api_key: Optional[str], path: str = GEOCODE_CACHE_PATH) -> Geocoder:
+    """캐시 파일별 공유 변환기 반환"""
+    path = os.path.abspath(path)
+    if path not in _geocoders:
+        _geocoders[path] = Geocoder(api_key, GeocodeCache(path))
+    elif api_key and not _geocoders[path].api_key:
+        _geocoders[path].api_key = api_key
+    return _geocoders[path]
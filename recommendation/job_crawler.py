@@ -11,29 +11,97 @@
   - 기존 데이터에서 만료된 공고 제거
 
  2단계: 공고 ID 수집
-  - 최신 공고부터 순차적으로 수집 (1페이지 = 50개)
-  - 연속 3페이지 비어있으면 종료
+  - 첫 페이지의 전체 공고 수로 페이지 수를 구한 뒤 나머지 페이지를 동시에 조회 (1페이지 = 50개)
+  - 찾은 신규 공고 ID는 목록 조회가 끝나기 전에 바로 3단계로 전달
 
  3단계: 모집중인 공고만 필터링
-  - 상세 정보 조회하여 모집기간 확인
+  - 상세 정보 조회하여 모집기간 확인 (동시 요청 수/초당 요청 수 제한, 일시 오류 재시도)
   - 현재 모집중인 공고만 저장
 
  4단계: 최종 저장
   - 기존 유효 데이터 + 신규 모집중 데이터 병합
+  - 좌표가 없는 공고의 주소를 변환하여 위도/경도 저장 (geocoder.py, 영구 캐시)
   - job_openings.pkl로 저장
+
+ 5단계: 공고 임베딩 인덱스 갱신
+  - 신규/변경된 공고만 임베딩하여 job_embeddings.npy로 저장 (embedding_index.py)
 """
 
-import requests
+import math
 import pickle
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Union, Iterable, AsyncIterable, AsyncIterator, Awaitable, Callable, Set
 from xml.etree import ElementTree
 from dotenv import load_dotenv
 import time
+import random
 import asyncio
 import aiohttp
 
+from embedding_index import build_index, get_embedding_index_files
+from text_embedding import UpstageEmbeddingService
+from geocoder import get_geocoder, normalize_address
+from job_store import clean_address
+
+SENURI_API_URL = os.getenv("SENURI_API_URL", "http://apis.data.go.kr/B552474/SenuriService")
+# 상세 조회 동시 요청 수와 초당 요청 한도 (data.go.kr 트래픽 한도에 맞춰 조정)
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 20))
+CRAWL_RATE_PER_SEC = float(os.getenv("CRAWL_RATE_PER_SEC", 25))
+CRAWL_MAX_RETRIES = int(os.getenv("CRAWL_MAX_RETRIES", 3))
+# 공고 목록 페이지 동시 조회 수와 페이지당 공고 수
+CRAWL_LIST_CONCURRENCY = int(os.getenv("CRAWL_LIST_CONCURRENCY", 5))
+LIST_PAGE_ROWS = 50
+CRAWL_RETRY_BASE_DELAY = 0.5
+
+
+class TransientCrawlError(Exception):
+    """재시도할 수 있는 오류 (HTTP 429/5xx, 연결 오류, 타임아웃)"""
+
+
+class TokenBucket:
+    """초당 rate개 요청을 허용하는 토큰 버킷 (순간 최대 capacity개, rate가 0 이하면 제한 없음)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CrawlStats:
+    """수집 결과 집계 (상세 조회의 모집중/만료/실패, 목록·상세 조회의 재시도 횟수)"""
+
+    def __init__(self):
+        self.active = 0
+        self.expired = 0
+        self.failed = 0
+        self.retries = 0
+        self.started = time.monotonic()
+
+    @property
+    def done(self) -> int:
+        return self.active + self.expired + self.failed
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"모집중 {self.active}개, 만료 {self.expired}개, 실패 {self.failed}개, "
+                f"재시도 {self.retries}회, {self.done / elapsed:.1f}건/초")
+
 class JobDataCollector:
     # 데이터 키 상수 정의
     JOB_KEYS = {
@@ -54,11 +122,14 @@ class JobDataCollector:
         'HOMEPAGE': '홈페이지',
         'CREATE_DATE': '생성일자',
         'UPDATE_DATE': '변경일자',
-        'COLLECT_TIME': '수집일시'
+        'COLLECT_TIME': '수집일시',
+        'LAT': '위도',
+        'LON': '경도'
     }
     def __init__(self):
         load_dotenv()
         self.elderly_job_api_key = os.getenv('ELDERLY_JOB_API_KEY')
+        self.kakao_api_key = os.getenv('KAKAO_API_KEY')
         self.data_dir = "data"
         self.pkl_file = os.path.join(self.data_dir, "job_openings.pkl")
         self.meta_file = os.path.join(self.data_dir, "collection_meta.pkl")
@@ -100,218 +171,331 @@ class JobDataCollector:
         
         return valid_openings
         
+    async def fetch_job_list_async(self, session: aiohttp.ClientSession, page_no: int) -> Tuple[List[str], Optional[int]]:
+        """공고 목록 한 페이지 조회 (반환: 페이지의 채용공고ID 목록, 전체 공고 수)"""
+        list_params = {
+            "serviceKey": self.elderly_job_api_key,
+            "pageNo": str(page_no),
+            "numOfRows": str(LIST_PAGE_ROWS),
+            "type": "xml"
+        }
+        list_root = await self._get_xml(session, f"{SENURI_API_URL}/getJobList", list_params)
+
+        job_ids = [item.find("jobId").text for item in list_root.findall(".//item") if item.find("jobId") is not None]
+        total_count = list_root.find(".//totalCount")
+        if total_count is not None and (total_count.text or "").strip().isdigit():
+            return job_ids, int(total_count.text)
+        return job_ids, None
+
+    async def stream_recent_job_ids(self, session: aiohttp.ClientSession, rate_limiter: TokenBucket,
+                                    max_pages: int = 100, exclude: Optional[Set[str]] = None,
+                                    progress: Optional[Dict[str, int]] = None,
+                                    stats: Optional[CrawlStats] = None) -> AsyncIterator[str]:
+        """
+        최근 공고 ID를 페이지 순서대로 흘려보냅니다. (exclude에 있는 ID와 중복 ID는 제외)
+        - 첫 페이지의 totalCount로 전체 페이지 수를 구한 뒤 나머지 페이지를 동시에 조회
+        - 상세 조회 단계가 ID를 받아 가는 동안에도 다음 페이지들을 미리 받아 둠
+        - totalCount가 없으면 빈 페이지가 나올 때까지 순차 조회
+        progress에는 찾은 ID 수(ids), 상세 조회로 넘긴 신규 ID 수(new), 실패한 페이지 수(failed_pages)를 기록
+        목록 조회 재시도는 stats에 더해짐 (상세 조회와 같은 stats를 넘기면 한 번에 보고)
+        """
+        exclude = exclude or set()
+        progress = progress if progress is not None else {}
+        progress.update(ids=0, new=0, failed_pages=0)
+        stats = stats if stats is not None else CrawlStats()
+        seen = set()
+        semaphore = asyncio.Semaphore(CRAWL_LIST_CONCURRENCY)
+
+        async def fetch(page_no: int) -> Optional[List[str]]:
+            async with semaphore:
+                try:
+                    page_ids, _ = await self._with_retry(
+                        rate_limiter, stats, lambda: self.fetch_job_list_async(session, page_no)
+                    )
+                    return page_ids
+                except Exception as e:
+                    print(f"\n>>> {page_no}페이지 조회 중 오류: {e}")
+                    progress["failed_pages"] += 1
+                    return None
+
+        def new_ids(page_ids: List[str]) -> List[str]:
+            fresh = [job_id for job_id in page_ids if job_id not in seen]
+            seen.update(fresh)
+            progress["ids"] += len(fresh)
+            fresh = [job_id for job_id in fresh if job_id not in exclude]
+            progress["new"] += len(fresh)
+            return fresh
+
+        print(f"=== 최근 {max_pages}페이지 공고 ID 수집 시작 ===")
+        try:
+            first_ids, total_count = await self._with_retry(
+                rate_limiter, stats, lambda: self.fetch_job_list_async(session, 1)
+            )
+        except Exception as e:
+            print(f"\n>>> API 오류: {e}")
+            return
+
+        for job_id in new_ids(first_ids):
+            yield job_id
+
+        if total_count is None:
+            # 전체 건수를 모르면 빈 페이지가 나올 때까지 순차 조회
+            for page_no in range(2, max_pages + 1):
+                page_ids = await fetch(page_no)
+                if page_ids == []:
+                    break
+                for job_id in new_ids(page_ids or []):
+                    yield job_id
+        else:
+            pages = min(max_pages, math.ceil(total_count / LIST_PAGE_ROWS))
+            print(f">>> 전체 공고 {total_count}개, {pages}페이지를 최대 {CRAWL_LIST_CONCURRENCY}개씩 동시에 조회합니다.")
+            tasks = [asyncio.create_task(fetch(page_no)) for page_no in range(2, pages + 1)]
+            try:
+                # 페이지 순서(최신 공고 순)대로 전달하여 상세 조회의 조기 종료 기준을 유지
+                for task in tasks:
+                    for job_id in new_ids(await task or []):
+                        yield job_id
+            finally:
+                # 상세 조회가 조기 종료하면 남은 페이지 요청 취소
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        print(f"\n=== ID 수집 완료: 총 {progress['ids']}개 (신규 {progress['new']}개, 실패 페이지 {progress['failed_pages']}개) ===")
+
     def collect_recent_job_ids(self, max_pages: int = 100) -> List[str]:
-        """최근 공고 ID만 효율적으로 수집합니다."""
+        """최근 공고 ID를 수집합니다. (stream_recent_job_ids를 끝까지 받아 리스트로 반환)"""
         if not self.elderly_job_api_key:
             print(">>> API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
             return []
-            
-        all_job_ids = []
-        page_no = 1
-        consecutive_empty_pages = 0
-        max_consecutive_empty = 3
-        
-        print(f"=== 최근 {max_pages}페이지 공고 ID 수집 시작 ===")
-        
-        while consecutive_empty_pages < max_consecutive_empty and page_no <= max_pages:
-            try:
-                list_url = "http://apis.data.go.kr/B552474/SenuriService/getJobList"
-                list_params = {
-                    "serviceKey": self.elderly_job_api_key,
-                    "pageNo": str(page_no),
-                    "numOfRows": "50",
-                    "type": "xml"
-                }
-                
-                print(f">>> {page_no}페이지 조회 중...", end=" ")
-                list_response = requests.get(list_url, params=list_params, timeout=30)
-                list_response.raise_for_status()
-                
-                # XML 파싱
-                list_root = ElementTree.fromstring(list_response.content)
-                
-                # 에러 메시지 확인
-                result_code = list_root.find(".//resultCode")
-                if result_code is not None and result_code.text != "00":
-                    if page_no == 1:
-                        result_msg = list_root.find(".//resultMsg")
-                        error_msg = result_msg.text if result_msg is not None else '알 수 없는 API 오류'
-                        print(f"\n>>> API 오류: {error_msg}")
-                        return []
-                    else:
-                        consecutive_empty_pages += 1
-                        print(f"오류 (연속 빈 페이지: {consecutive_empty_pages})")
-                        page_no += 1
-                        continue
-                
-                # 현재 페이지의 채용공고ID 수집
-                items = list_root.findall(".//item")
-                page_job_ids = []
-                
-                for item in items:
-                    job_id = item.find("jobId")
-                    if job_id is not None:
-                        page_job_ids.append(job_id.text)
-                
-                if not page_job_ids:
-                    consecutive_empty_pages += 1
-                    print(f"빈 페이지 (연속 빈 페이지: {consecutive_empty_pages})")
-                else:
-                    consecutive_empty_pages = 0
-                    all_job_ids.extend(page_job_ids)
-                    print(f"{len(page_job_ids)}개 ID 수집 (누적: {len(all_job_ids)}개)")
-                
-                page_no += 1
-                time.sleep(0.05)
-                
-            except Exception as e:
-                print(f"\n>>> {page_no}페이지 조회 중 오류: {e}")
-                consecutive_empty_pages += 1
-                page_no += 1
-                continue
-        
-        if page_no > max_pages:
-            print(f">>> 최대 페이지 수({max_pages}) 도달")
-        
-        print(f"\n=== ID 수집 완료: 총 {len(all_job_ids)}개 ===")
-        return all_job_ids
-    
-    async def fetch_job_detail_async(self, session: aiohttp.ClientSession, job_id: str) -> Dict[str, Any]:
-        """비동기적으로 단일 채용공고 상세 정보를 가져옵니다."""
-        detail_url = "http://apis.data.go.kr/B552474/SenuriService/getJobInfo"
+
+        async def collect() -> List[str]:
+            async with self._create_session() as session:
+                rate_limiter = TokenBucket(CRAWL_RATE_PER_SEC)
+                return [job_id async for job_id in self.stream_recent_job_ids(session, rate_limiter, max_pages)]
+
+        return asyncio.run(collect())
+
+    async def collect_new_openings_async(self, existing_ids: Set[str], max_pages: int = 100,
+                                         early_stop_threshold: int = 300) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        목록 조회와 상세 조회를 겹쳐서 실행합니다. (목록에서 찾은 신규 ID를 바로 상세 조회)
+        반환: (신규 모집중 공고, 목록 조회 진행 상황)
+        """
+        progress = {}
+        async with self._create_session() as session:
+            # 두 단계가 같은 API 키의 호출 한도를 나눠 씀
+            rate_limiter = TokenBucket(CRAWL_RATE_PER_SEC)
+            # 목록/상세 조회의 재시도를 하나의 집계로 보고
+            stats = CrawlStats()
+            job_ids = self.stream_recent_job_ids(session, rate_limiter, max_pages, existing_ids, progress, stats)
+            openings = await self.collect_job_details_stream(
+                job_ids, session, early_stop_threshold=early_stop_threshold, rate_limiter=rate_limiter,
+                stats=stats,
+            )
+        return openings, progress
+
+    @staticmethod
+    async def _get_xml(session: aiohttp.ClientSession, url: str, params: Dict[str, str]) -> ElementTree.Element:
+        """
+        SenuriService API를 호출하여 XML 루트를 반환합니다.
+        429/5xx/네트워크 오류는 TransientCrawlError, 그 외 응답 오류와 API 오류 코드는 ValueError
+        """
+        try:
+            # 타임아웃은 세션에 설정된 값을 공유
+            async with session.get(url, params=params) as response:
+                if response.status == 429 or response.status >= 500:
+                    raise TransientCrawlError(f"HTTP {response.status}")
+                response.raise_for_status()
+                content = await response.read()
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            raise TransientCrawlError(f"{type(e).__name__}: {e}") from e
+        except aiohttp.ClientResponseError as e:
+            raise ValueError(f"HTTP {e.status}") from e
+
+        # XML 파싱
+        try:
+            root = ElementTree.fromstring(content)
+        except ElementTree.ParseError as e:
+            raise ValueError(f"XML 파싱 오류: {e}") from e
+
+        # API 오류 응답 (인증 실패, 호출 한도 초과 등)
+        result_code = root.find(".//resultCode")
+        if result_code is not None and result_code.text != "00":
+            result_msg = root.find(".//resultMsg")
+            raise ValueError(f"API 오류 {result_code.text}: {result_msg.text if result_msg is not None else ''}")
+        return root
+
+    async def fetch_job_detail_async(self, session: aiohttp.ClientSession, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        비동기적으로 단일 채용공고 상세 정보를 가져옵니다.
+        반환: 모집중인 공고 dict, 만료/필수 정보 누락 공고는 None
+        실패 시 예외 (429/5xx/네트워크 오류는 TransientCrawlError, 그 외 응답 오류는 ValueError)
+        """
         detail_params = {
             "serviceKey": self.elderly_job_api_key,
             "type": "xml",
             "id": job_id
         }
+        detail_root = await self._get_xml(session, f"{SENURI_API_URL}/getJobInfo", detail_params)
         
-        try:
-            async with session.get(detail_url, params=detail_params, timeout=10) as response:
-                response.raise_for_status()
-                content = await response.read()
-                
-                # XML 파싱
-                detail_root = ElementTree.fromstring(content)
-                
-                # 상세 정보 파싱
-                item = detail_root.find(".//item")
-                if item is not None and self._validate_job_data(item):
-                    # 모집기간 추출
-                    start_date = item.find("frAcptDd").text if item.find("frAcptDd") is not None else ""
-                    end_date = item.find("toAcptDd").text if item.find("toAcptDd") is not None else ""
-                    
-                    # 현재 모집중인 공고만 반환
-                    if self.is_recruitment_active(start_date, end_date):
-                        return {
-                            self.JOB_KEYS['ID']: job_id,
-                            self.JOB_KEYS['TITLE']: item.find("wantedTitle").text if item.find("wantedTitle") is not None else "-",
-                            self.JOB_KEYS['COMPANY']: item.find("plbizNm").text if item.find("plbizNm") is not None else "-",
-                            self.JOB_KEYS['ADDRESS']: item.find("plDetAddr").text if item.find("plDetAddr") is not None else "-",
-                            self.JOB_KEYS['METHOD']: item.find("acptMthdCd").text if item.find("acptMthdCd") is not None else "-",
-                            self.JOB_KEYS['START_DATE']: start_date,
-                            self.JOB_KEYS['END_DATE']: end_date,
-                            self.JOB_KEYS['AGE']: item.find("age").text if item.find("age") is not None else "-",
-                            self.JOB_KEYS['AGE_LIMIT']: item.find("ageLim").text if item.find("ageLim") is not None else "-",
-                            self.JOB_KEYS['RECRUIT_NUM']: item.find("clltPrnnum").text if item.find("clltPrnnum") is not None else "-",
-                            self.JOB_KEYS['MANAGER']: item.find("clerk").text if item.find("clerk") is not None else "-",
-                            self.JOB_KEYS['CONTACT']: item.find("clerkContt").text if item.find("clerkContt") is not None else "-",
-                            self.JOB_KEYS['DETAILS']: item.find("detCnts").text if item.find("detCnts") is not None else "-",
-                            self.JOB_KEYS['ETC']: item.find("etcItm").text if item.find("etcItm") is not None else "-",
-                            self.JOB_KEYS['HOMEPAGE']: item.find("homepage").text if item.find("homepage") is not None else "-",
-                            self.JOB_KEYS['CREATE_DATE']: item.find("createDy").text if item.find("createDy") is not None else "-",
-                            self.JOB_KEYS['UPDATE_DATE']: item.find("updDy").text if item.find("updDy") is not None else "-",
-                            self.JOB_KEYS['COLLECT_TIME']: datetime.now().isoformat()
-                        }
-                return None
-        except Exception:
-            return None
-
-    async def collect_job_details_batch(self, job_ids: List[str], batch_size: int = 50, early_stop_threshold: int = 100) -> List[Dict[str, Any]]:
-        """배치 단위로 비동기적으로 현재 모집중인 채용공고만 수집합니다. (조기 종료 지원)"""
-        print(f"\n=== 모집중인 공고 수집 시작: {len(job_ids)}개 공고 확인 ===")
-        print(f">>> 배치 크기: {batch_size}, 조기 종료 임계값: {early_stop_threshold}")
-        
+        # 상세 정보 파싱
+        item = detail_root.find(".//item")
+        if item is not None and self._validate_job_data(item):
+            # 모집기간 추출
+            start_date = item.find("frAcptDd").text if item.find("frAcptDd") is not None else ""
+            end_date = item.find("toAcptDd").text if item.find("toAcptDd") is not None else ""
+            
+            # 현재 모집중인 공고만 반환
+            if self.is_recruitment_active(start_date, end_date):
+                return {
+                    self.JOB_KEYS['ID']: job_id,
+                    self.JOB_KEYS['TITLE']: item.find("wantedTitle").text if item.find("wantedTitle") is not None else "-",
+                    self.JOB_KEYS['COMPANY']: item.find("plbizNm").text if item.find("plbizNm") is not None else "-",
+                    self.JOB_KEYS['ADDRESS']: item.find("plDetAddr").text if item.find("plDetAddr") is not None else "-",
+                    self.JOB_KEYS['METHOD']: item.find("acptMthdCd").text if item.find("acptMthdCd") is not None else "-",
+                    self.JOB_KEYS['START_DATE']: start_date,
+                    self.JOB_KEYS['END_DATE']: end_date,
+                    self.JOB_KEYS['AGE']: item.find("age").text if item.find("age") is not None else "-",
+                    self.JOB_KEYS['AGE_LIMIT']: item.find("ageLim").text if item.find("ageLim") is not None else "-",
+                    self.JOB_KEYS['RECRUIT_NUM']: item.find("clltPrnnum").text if item.find("clltPrnnum") is not None else "-",
+                    self.JOB_KEYS['MANAGER']: item.find("clerk").text if item.find("clerk") is not None else "-",
+                    self.JOB_KEYS['CONTACT']: item.find("clerkContt").text if item.find("clerkContt") is not None else "-",
+                    self.JOB_KEYS['DETAILS']: item.find("detCnts").text if item.find("detCnts") is not None else "-",
+                    self.JOB_KEYS['ETC']: item.find("etcItm").text if item.find("etcItm") is not None else "-",
+                    self.JOB_KEYS['HOMEPAGE']: item.find("homepage").text if item.find("homepage") is not None else "-",
+                    self.JOB_KEYS['CREATE_DATE']: item.find("createDy").text if item.find("createDy") is not None else "-",
+                    self.JOB_KEYS['UPDATE_DATE']: item.find("updDy").text if item.find("updDy") is not None else "-",
+                    self.JOB_KEYS['COLLECT_TIME']: datetime.now().isoformat()
+                }
+        return None
+
+    @staticmethod
+    async def _with_retry(rate_limiter: "TokenBucket", stats: "CrawlStats", request: Callable[[], Awaitable]):
+        """일시적인 오류는 지수 백오프 + 지터로 재시도 (요청마다 토큰 버킷 통과)"""
+        for attempt in range(CRAWL_MAX_RETRIES + 1):
+            await rate_limiter.acquire()
+            try:
+                return await request()
+            except TransientCrawlError:
+                if attempt == CRAWL_MAX_RETRIES:
+                    raise
+                stats.retries += 1
+                await asyncio.sleep(CRAWL_RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+
+    @staticmethod
+    async def _iterate(job_ids: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+        """리스트와 비동기 스트림을 같은 방식으로 순회 (순회를 멈추면 비동기 스트림도 닫음)"""
+        if hasattr(job_ids, "__aiter__"):
+            try:
+                async for job_id in job_ids:
+                    yield job_id
+            finally:
+                if hasattr(job_ids, "aclose"):
+                    await job_ids.aclose()
+        else:
+            for job_id in job_ids:
+                yield job_id
+
+    async def collect_job_details_stream(self, job_ids: Union[Iterable[str], AsyncIterable[str]],
+                                         session: Optional[aiohttp.ClientSession] = None,
+                                         concurrency: int = CRAWL_CONCURRENCY,
+                                         rate_per_sec: float = CRAWL_RATE_PER_SEC,
+                                         early_stop_threshold: int = 300,
+                                         rate_limiter: Optional["TokenBucket"] = None,
+                                         stats: Optional[CrawlStats] = None) -> List[Dict[str, Any]]:
+        """
+        현재 모집중인 채용공고만 수집합니다. (조기 종료 지원)
+        - 최대 concurrency개 요청을 동시에 유지하는 슬라이딩 윈도우: 요청 하나가 끝나면 바로 다음 공고 요청
+        - 토큰 버킷으로 초당 요청 수를 data.go.kr 호출 한도 이내로 제한
+        - job_ids는 리스트 또는 비동기 스트림 (stream_recent_job_ids의 ID가 도착하는 대로 상세 조회 시작)
+        - stats를 넘기면 목록 조회 재시도와 같은 집계에 기록
+        """
+        if session is None:
+            async with self._create_session() as own_session:
+                return await self.collect_job_details_stream(
+                    job_ids, own_session, concurrency, rate_per_sec, early_stop_threshold, rate_limiter, stats
+                )
+
+        stats = stats if stats is not None else CrawlStats()
+        # 목록 조회와 함께 실행할 때는 같은 토큰 버킷을 공유 (API 키 단위 호출 한도)
+        rate_limiter = rate_limiter or TokenBucket(rate_per_sec)
+        print(f"\n=== 모집중인 공고 수집 시작 ===")
+        print(f">>> 동시 요청: {concurrency}, 초당 요청 한도: {rate_limiter.rate:g}, 조기 종료 임계값: {early_stop_threshold}")
+        semaphore = asyncio.Semaphore(concurrency)
         active_openings = []
-        expired_count = 0
-        failed_count = 0
-        consecutive_expired = 0
-        
-        # 커넥션 제한 설정
-        connector = aiohttp.TCPConnector(limit=200, limit_per_host=100, ttl_dns_cache=300, use_dns_cache=True)
-        timeout = aiohttp.ClientTimeout(total=15, connect=5)
-        
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # 배치 단위로 처리
-            for i in range(0, len(job_ids), batch_size):
-                batch = job_ids[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (len(job_ids) + batch_size - 1) // batch_size
-                
-                print(f">>> 배치 {batch_num}/{total_batches} 처리 중... ({len(batch)}개)")
-                
-                # 배치 병렬 처리
-                tasks = [self.fetch_job_detail_async(session, job_id) for job_id in batch]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # 배치 내 결과 분석
-                batch_active_count = 0
-                batch_expired_count = 0
-                batch_failed_count = 0
-                
-                # 결과 처리
-                for result in results:
-                    if isinstance(result, dict) and result is not None:
-                        active_openings.append(result)
-                        batch_active_count += 1
-                    elif result is None:
-                        expired_count += 1
-                        batch_expired_count += 1
-                    else:
-                        failed_count += 1
-                        batch_failed_count += 1
-                
-                # 연속 만료 카운터 업데이트 (활성 공고가 있으면 리셋)
-                if batch_active_count > 0:
-                    consecutive_expired = 0
-                else:
-                    # 배치 전체가 만료/실패인 경우만 카운터 증가
-                    consecutive_expired += len(batch)
-                
-                # 진행상황 출력
-                print(f"    모집중: {len(active_openings)}개, 만료: {expired_count}개, 실패: {failed_count}개")
-                
-                # 조기 종료 조건 확인
-                if consecutive_expired >= early_stop_threshold:
-                    print(f">>> 연속 {consecutive_expired}개 공고가 만료됨. 조기 종료합니다.")
-                    print(f">>> 남은 {len(job_ids) - i - batch_size}개 공고 스킵")
+        pending = set()
+        state = {"consecutive_expired": 0, "stop": False}
+
+        def on_done(task: asyncio.Task):
+            pending.discard(task)
+            semaphore.release()
+            if task.cancelled():
+                return
+            error = task.exception()
+            if error is not None:
+                stats.failed += 1
+                if stats.failed <= 5:
+                    print(f">>> 상세 조회 실패: {error}")
+            elif task.result() is not None:
+                active_openings.append(task.result())
+                stats.active += 1
+                state["consecutive_expired"] = 0
+            else:
+                stats.expired += 1
+                # 최신 공고부터 조회하므로 만료 공고가 계속 이어지면 이후 공고도 만료된 것으로 판단
+                state["consecutive_expired"] += 1
+                if state["consecutive_expired"] >= early_stop_threshold and not state["stop"]:
+                    state["stop"] = True
+                    print(f">>> 연속 {state['consecutive_expired']}개 공고가 만료됨. 조기 종료합니다.")
+            if stats.done % 100 == 0:
+                print(f"    {stats.summary()}")
+
+        source = self._iterate(job_ids)
+        try:
+            async for job_id in source:
+                await semaphore.acquire()
+                if state["stop"]:
+                    semaphore.release()
                     break
-                
-                # 배치 간 간격 조절
-                if i + batch_size < len(job_ids):
-                    await asyncio.sleep(0.1)
-        
+                task = asyncio.create_task(self._with_retry(
+                    rate_limiter, stats, lambda job_id=job_id: self.fetch_job_detail_async(session, job_id)
+                ))
+                pending.add(task)
+                task.add_done_callback(on_done)
+        finally:
+            await source.aclose()
+            if state["stop"]:
+                for task in pending:
+                    task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
         print(f"\n=== 모집중인 공고 수집 완료 ===")
-        print(f">>> 현재 모집중: {len(active_openings)}개")
-        print(f">>> 모집 만료: {expired_count}개")  
-        print(f">>> API 실패: {failed_count}개")
+        print(f">>> 현재 모집중: {stats.active}개")
+        print(f">>> 모집 만료: {stats.expired}개")  
+        print(f">>> API 실패: {stats.failed}개 (목록/상세 조회 재시도 {stats.retries}회)")
+        print(f">>> 처리 속도: {stats.summary()}")
         
         return active_openings
 
+    @staticmethod
+    def _create_session() -> aiohttp.ClientSession:
+        """커넥션 풀과 타임아웃을 공유하는 세션"""
+        connector = aiohttp.TCPConnector(limit=200, limit_per_host=100, ttl_dns_cache=300, use_dns_cache=True)
+        timeout = aiohttp.ClientTimeout(total=15, connect=5)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
     def collect_job_details(self, job_ids: List[str]) -> List[Dict[str, Any]]:
         """채용공고 ID 목록으로부터 상세 정보를 수집합니다. (효율적 수집)"""
         if not job_ids:
             return []
         
         # 적응적 파라미터 설정
-        if len(job_ids) > 1000:
-            batch_size = 30  # 대량 데이터시 작은 배치
-            early_stop = 200  # 조기 종료 임계값 증가
-        else:
-            batch_size = 50  # 일반적인 배치 크기
-            early_stop = 300 # 조기 종료 임계값 증가
+        early_stop = 200 if len(job_ids) > 1000 else 300
         
         # 비동기 함수 실행
-        return asyncio.run(self.collect_job_details_batch(job_ids, batch_size, early_stop))
+        return asyncio.run(self.collect_job_details_stream(job_ids, early_stop_threshold=early_stop))
     
     def save_data(self, openings: List[Dict[str, Any]]):
         """수집된 데이터를 pkl 파일로 저장합니다."""
@@ -320,19 +504,17 @@ class JobDataCollector:
             return
             
         try:
-            # 메인 데이터 저장
-            with open(self.pkl_file, 'wb') as f:
-                pickle.dump(openings, f)
+            # 메인 데이터 저장 (추천 서버가 읽는 중에도 완전한 파일만 보이도록 임시 파일 후 교체)
+            self._atomic_pickle_dump(openings, self.pkl_file)
             
-            # 메타데이터 저장
+            # 메타데이터 저장 (마지막에 교체 → 추천 서버의 job_store가 새 버전으로 인식)
             meta_data = {
                 "collection_time": datetime.now().isoformat(),
                 "total_count": len(openings),
                 "file_path": self.pkl_file
             }
             
-            with open(self.meta_file, 'wb') as f:
-                pickle.dump(meta_data, f)
+            self._atomic_pickle_dump(meta_data, self.meta_file)
             
             print(f">>> 데이터 저장 완료:")
             print(f"    - 파일: {self.pkl_file}")
@@ -342,6 +524,50 @@ class JobDataCollector:
         except Exception as e:
             print(f">>> 데이터 저장 중 오류: {e}")
     
+    def geocode_openings(self, openings: List[Dict[str, Any]]):
+        """좌표가 없는 공고의 주소를 변환하여 위도/경도를 공고에 저장합니다. (추천 시 공고 좌표 조회 제거)"""
+        lat_key, lon_key = self.JOB_KEYS['LAT'], self.JOB_KEYS['LON']
+        pending = [job for job in openings if job.get(lat_key) is None or job.get(lon_key) is None]
+        if not pending:
+            return
+        if not self.kakao_api_key:
+            print(">>> KAKAO_API_KEY가 없어 공고 좌표 변환을 건너뜁니다.")
+            return
+
+        try:
+            geocoder = get_geocoder(self.kakao_api_key)
+            addresses = [clean_address(job.get(self.JOB_KEYS['ADDRESS'], '') or '') for job in pending]
+            coords_by_address = geocoder.geocode_many(addresses)
+
+            geocoded = 0
+            for job, address in zip(pending, addresses):
+                coords = coords_by_address.get(normalize_address(address))
+                if coords is not None:
+                    job[lat_key], job[lon_key] = coords
+                    geocoded += 1
+            print(f">>> 공고 좌표 변환: {geocoded}/{len(pending)}개 성공 (캐시 {geocoder.cache.stats()})")
+        except Exception as e:
+            print(f">>> 공고 좌표 변환 중 오류: {e}")
+
+    def update_embedding_index(self, openings: List[Dict[str, Any]]):
+        """저장된 공고의 임베딩 인덱스를 갱신합니다. (추천 시 공고 임베딩 API 호출 제거)"""
+        try:
+            embedding_service = UpstageEmbeddingService()
+            if not embedding_service.api_key:
+                print(">>> UPSTAGE_API_KEY가 없어 임베딩 인덱스 갱신을 건너뜁니다.")
+                return
+            build_index(openings, embedding_service, get_embedding_index_files(self.data_dir))
+        except Exception as e:
+            print(f">>> 임베딩 인덱스 갱신 중 오류: {e}")
+
+    @staticmethod
+    def _atomic_pickle_dump(data, path: str):
+        """임시 파일에 저장한 뒤 os.replace로 교체합니다."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, path)
+
     def load_existing_data(self) -> Tuple[List[Dict[str, Any]], dict]:
         """기존 pkl 파일에서 데이터를 로드합니다."""
         openings = []
@@ -392,31 +618,31 @@ class JobDataCollector:
             valid_existing = []
             print(">>> 기존 데이터 없음")
         
-        # 2단계: 최근 공고 ID 수집 (효율성을 위해 최근 100페이지만)
-        job_ids = self.collect_recent_job_ids(max_pages=100)
-        if not job_ids:
+        # 2~3단계: 최근 공고 ID 수집(최근 100페이지)과 신규 공고 상세 조회를 동시에 진행
+        existing_ids = {opening.get(self.JOB_KEYS['ID']) for opening in valid_existing if opening.get(self.JOB_KEYS['ID'])}
+        if self.elderly_job_api_key:
+            new_active_openings, progress = asyncio.run(self.collect_new_openings_async(existing_ids, max_pages=100))
+        else:
+            print(">>> API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+            new_active_openings, progress = [], {}
+
+        if not progress.get("ids"):
             print(">>> 공고 ID 수집 실패.")
             if valid_existing:
                 print(">>> 기존 유효 데이터만 저장합니다.")
                 self.save_data(valid_existing)
             return
-        
-        # 3단계: 신규 공고 중 모집중인 것만 수집
-        existing_ids = {opening.get(self.JOB_KEYS['ID']) for opening in valid_existing if opening.get(self.JOB_KEYS['ID'])}
-        new_job_ids = [job_id for job_id in job_ids if job_id not in existing_ids]
-        
-        if new_job_ids:
-            print(f">>> 신규 공고 {len(new_job_ids)}개 확인 중...")
-            new_active_openings = self.collect_job_details(new_job_ids)
-        else:
-            new_active_openings = []
+        if not progress.get("new"):
             print(">>> 신규 공고 없음")
         
         # 4단계: 유효한 기존 데이터 + 신규 모집중 데이터 병합
         all_active_openings = valid_existing + new_active_openings
         
         if all_active_openings:
+            self.geocode_openings(all_active_openings)
             self.save_data(all_active_openings)
+            # 5단계: 공고 임베딩 인덱스 갱신
+            self.update_embedding_index(all_active_openings)
         else:
             print(">>> 저장할 유효한 공고가 없습니다.")
         
@@ -5,49 +5,45 @@
 
 [전체 프로세스]
  1단계: 데이터 로드
-  - job_openings.pkl에서 전체 공고 데이터 로드
-  - 메타데이터 확인 (수집 시간, 총 개수)
+  - job_store의 메모리 상주 스냅샷에서 전체 공고 데이터 조회
+  - job_openings.pkl은 크롤러가 새 버전을 저장했을 때만 다시 로드
 
  2단계: 조건별 필터링
   - 희망 분야(preferred_field) 기반 키워드 매칭
-  - 지역(location) 기반 주소 필터링
+  - 사용자 위치 반경(SEARCH_RADIUS_KM) 이내 공고를 공간 인덱스로 조회 (spatial_index.py)
+  - 좌표가 없는 공고나 사용자 좌표를 모르는 경우에는 지역(location) 기반 주소 필터링
   - 유효한 공고만 선별 (필수 정보 누락 제외)
 
  3단계: 거리 계산
-  - 카카오 지도 API를 이용한 좌표 변환
-  - 사용자 위치와 각 사업장 간의 직선 거리 계산
-  - 거리 정보를 공고 데이터에 추가
+  - 공고 좌표는 크롤링 시 미리 변환된 값 사용 (없는 공고만 카카오 지도 API로 변환)
+  - 사용자 주소 좌표는 geocoder의 영구 캐시에서 조회
+  - 사용자 위치와 전체 사업장 간의 직선 거리를 배열 연산으로 한 번에 계산 (distance.py)
+  - 거리(km 숫자)를 공고 데이터에 추가
 
  4단계: 최종 공고 리스트 반환
   - 필터링 + 거리 정보가 포함된 공고 데이터
   - job_recommender.py에서 AI 매칭에 사용
 """
 
-import requests
-import math
-import re
-import pickle
+import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from xml.etree import ElementTree
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 
+from job_store import (
+    JobSnapshot, get_job_store, clean_address, is_valid_opening, opening_coords, region_matches, region_tokens,
+    strip_region_suffix
+)
+from geocoder import get_geocoder
+from distance import haversine_km
+from spatial_index import build_spatial_index
+
+# 후보 공고를 찾는 반경 (km, get_filtered_job_openings의 radius_km로 호출마다 바꿀 수 있음)
+SEARCH_RADIUS_KM = float(os.getenv("SEARCH_RADIUS_KM", 30))
+
 class JobOpeningService:
-    @staticmethod
-    def parse_distance(distance_str: str) -> float:
-        """거리 문자열을 float로 안전하게 변환합니다."""
-        try:
-            if isinstance(distance_str, (int, float)):
-                return float(distance_str)
-            if isinstance(distance_str, str):
-                # 'km' 제거하고 숫자만 추출
-                cleaned = distance_str.replace('km', '').strip()
-                return float(cleaned)
-            return 999.0  # 기본값
-        except (ValueError, AttributeError):
-            return 999.0
-    
     def __init__(self):
         load_dotenv()
         self.elderly_job_api_key = os.getenv('ELDERLY_JOB_API_KEY')
@@ -59,169 +55,125 @@ class JobOpeningService:
         self.pkl_file = os.path.join(self.data_dir, "job_openings.pkl")
         self.meta_file = os.path.join(self.data_dir, "collection_meta.pkl")
         
-        # 좌표 캐시 (메모리 캐싱)
-        self._coords_cache = {}
-        self._max_cache_size = 1000
+        # 메모리 상주 공고 스냅샷 (크롤러가 새 버전을 저장하면 교체)
+        self.store = get_job_store(self.data_dir)
 
-    def _get_coords_from_address(self, address: str) -> Optional[Tuple[float, float]]:
-        """Kakao Maps API를 사용하여 주소를 좌표로 변환합니다. (캐싱, 폴백 로직 적용)"""
-        if not address or not self.kakao_api_key:
-            return None
-        
-        # 캐시 확인
-        if address in self._coords_cache:
-            return self._coords_cache[address]
-        
-        url = "https://dapi.kakao.com/v2/local/search/address.json"
-        headers = {"Authorization": f"KakaoAK {self.kakao_api_key}"}
-        params = {"query": address}
-
-
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("documents"):
-                coords = data["documents"][0]
-                result = (float(coords['y']), float(coords['x']))
-                
-                # 성공한 경우에만 캐시 저장
-                if len(self._coords_cache) < self._max_cache_size:
-                    self._coords_cache[address] = result
-                return result
-            
-            # [폴백 로직] 초기 검색 실패 시, 지역명 뒤에 '청'을 붙여 재시도
-            elif address.endswith(('구', '시', '군')) and not address.endswith('청'):
-                fallback_address = address + '청'
-                print(f"[알림] '{address}' 검색 실패. '{fallback_address}'(으)로 재시도합니다.")
-                params["query"] = fallback_address
-                response = requests.get(url, headers=headers, params=params)
-                response.raise_for_status()
-                data = response.json()
+        # 주소 → 좌표 변환기 (SQLite 영구 캐시, 프로세스가 바뀌어도 재사용)
+        self.geocoder = get_geocoder(self.kakao_api_key)
 
-                if data.get("documents"):
-                    coords = data["documents"][0]
-                    result = (float(coords['y']), float(coords['x']))
-                    
-                    # 성공한 경우에만 캐시 저장
-                    if len(self._coords_cache) < self._max_cache_size:
-                        self._coords_cache[address] = result
-                    return result
-
-            # 최종 실패 시 None 반환 (캐시 저장 안 함)
-            return None
+        # 스냅샷 버전별 공간 인덱스 (스냅샷 버전, 공간 인덱스, 좌표가 없는 공고 목록)
+        self._spatial_index = None
 
-        except Exception as e:
-            print(f"주소 좌표 변환 중 오류 발생: {e}")
-            return None
+    def _get_coords_from_address(self, address: str) -> Optional[Tuple[float, float]]:
+        """주소를 좌표로 변환합니다. (영구 캐시, 폴백 로직은 geocoder에서 처리)"""
+        return self.geocoder.geocode(address)
+
+    def _get_job_coords(self, job: Dict[str, Any], snapshot: Optional[JobSnapshot]) -> Optional[Tuple[float, float]]:
+        """공고 좌표 (크롤링 시 저장된 좌표 우선, 없으면 정제 주소로 변환)"""
+        info = snapshot.info.get(job.get("job_id")) if snapshot is not None else None
+        coords = info.coords if info is not None else opening_coords(job)
+        if coords is not None:
+            return coords
+        return self._get_coords_from_address(self._cleaned_address(job, snapshot))
+
+    def get_job_coords_array(self, job_openings: List[Dict[str, Any]],
+                             snapshot: Optional[JobSnapshot] = None) -> np.ndarray:
+        """
+        공고 좌표 배열 (N, 2) [위도, 경도] - 좌표를 모르는 공고는 NaN
+        snapshot을 주지 않으면 현재 스냅샷을 한 번만 가져와 모든 공고에 사용
+        """
+        if snapshot is None:
+            snapshot = self.store.get()
+        coords = np.full((len(job_openings), 2), np.nan)
+        for i, job in enumerate(job_openings):
+            job_coords = self._get_job_coords(job, snapshot)
+            if job_coords:
+                coords[i] = job_coords
+        return coords
 
-    def _calculate_haversine_distance(self, lat1, lon1, lat2, lon2) -> float:
-        """하버사인 공식을 이용해 두 좌표 간의 거리를 km 단위로 계산합니다."""
-        R = 6371  # 지구 반지름 (km)
-        
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        dlon = lon2_rad - lon1_rad
-        dlat = lat2_rad - lat1_rad
-        
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        distance = R * c
-        return distance
+    def calculate_distances(self, user_address: str, job_openings: List[Dict[str, Any]],
+                            snapshot: Optional[JobSnapshot] = None) -> np.ndarray:
+        """사용자 주소와 각 공고 간의 거리(km) 배열 - 사용자 주소는 한 번만 변환, 위치 미상은 NaN"""
+        user_coords = self._get_coords_from_address(user_address)
+        if not user_coords:
+            return np.full(len(job_openings), np.nan)
+        return haversine_km(user_coords, self.get_job_coords_array(job_openings, snapshot))
 
-    def sort_by_distance(self, user_address: str, job_openings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def sort_by_distance(self, user_address: str, job_openings: List[Dict[str, Any]],
+                         snapshot: Optional[JobSnapshot] = None) -> List[Dict[str, Any]]:
         """사용자 주소와 구인 정보 주소의 좌표를 기반으로 거리를 계산하고 정렬합니다."""
         if not job_openings:
             return []
 
-        user_coords = self._get_coords_from_address(user_address)
-        if not user_coords:
+        distances = self.calculate_distances(user_address, job_openings, snapshot)
+        if np.isnan(distances).all():
             print("사용자 주소의 좌표를 찾을 수 없어 거리순 정렬을 건너뜁니다.")
             return job_openings
 
-        openings_with_dist = []
-        for job in job_openings:
-            job_address = job.get("주소", "")
-            # 주소 앞의 5자리 우편번호와 공백 제거 (예: "12345 서울시...")
-            cleaned_address = re.sub(r"^\d{5}\s+", "", job_address)
-            
-            job_coords = self._get_coords_from_address(cleaned_address)
-            
-            if job_coords:
-                distance = self._calculate_haversine_distance(
-                    user_coords[0], user_coords[1],
-                    job_coords[0], job_coords[1]
-                )
-                job["거리"] = f"{distance:.2f}km"
-            else:
-                job["거리"] = "999km" # 좌표 변환 실패 시
-            
-            openings_with_dist.append(job)
-            
-        # 거리(숫자 부분)를 기준으로 오름차순 정렬
-        sorted_openings = sorted(
-            openings_with_dist, 
-            key=lambda x: self.parse_distance(x.get("거리", "999"))
-        )
-        
+        # 거리 오름차순 정렬 (위치 미상은 뒤로), 스냅샷 공고는 공유되므로 복사본에 거리 추가
+        sorted_openings = []
+        for i in np.argsort(distances, kind="stable"):
+            job = job_openings[i].copy()
+            job["거리"] = None if np.isnan(distances[i]) else float(distances[i])
+            sorted_openings.append(job)
         return sorted_openings
 
-    def calculate_distance(self, user_address: str, job_address: str) -> float:
-        """사용자 주소와 특정 공고 간의 거리를 계산합니다."""
-        user_coords = self._get_coords_from_address(user_address)
-        if not user_coords:
-            return None
-            
-        # 주소에서 도로명 주소 부분만 추출
-        match = re.match(r"^\d{5}\s+([^,]+)", job_address)
-        if match:
-            cleaned_address = match.group(1)
-        else:
-            cleaned_address = re.sub(r"^\d{5}\s+", "", job_address)
-        
-        job_coords = self._get_coords_from_address(cleaned_address)
-        if not job_coords:
-            return None
-            
-        distance = self._calculate_haversine_distance(
-            user_coords[0], user_coords[1],
-            job_coords[0], job_coords[1]
-        )
-        
-        return distance
+    def calculate_distance(self, user_address: str, job: Dict[str, Any]) -> Optional[float]:
+        """사용자 주소와 특정 공고 간의 거리(km)를 계산합니다."""
+        distance = self.calculate_distances(user_address, [job])[0]
+        return None if np.isnan(distance) else float(distance)
 
-    def _filter_by_region(self, openings: List[Dict[str, Any]], target_region: str) -> List[Dict[str, Any]]:
+    def _filter_by_region(self, openings: List[Dict[str, Any]], target_region: str,
+                          snapshot: Optional[JobSnapshot]) -> List[Dict[str, Any]]:
         """지역 기반으로 공고를 필터링합니다. (완화된 필터링)"""
         if not target_region:
             return openings
         
+        # 지역 정보를 단계적으로 추출하여 시/도 또는 구/군 중 하나만 일치해도 허용 (접미사를 뗀 토큰끼리 비교)
+        # 예: '서울특별시 강남구' → ['서울', '강남']
+        region_parts = [strip_region_suffix(token) for token in target_region.split()[:2]]
+        region_parts = [part for part in region_parts if part]
+
         filtered = []
-        # 지역 정보를 단계적으로 추출하여 부분 일치 허용
-        region_parts = []
-        
-        # 시/도 추출
-        target_city = target_region.split()[0].replace("특별시", "").replace("광역시", "").replace("도", "")
-        region_parts.append(target_city)
-        
-        # 구/군 추출 (있는 경우)
-        region_tokens = target_region.split()
-        if len(region_tokens) > 1:
-            district = region_tokens[1].replace("구", "").replace("군", "")
-            region_parts.append(district)
-        
         for opening in openings:
-            address = opening.get("주소", "")
-            # 지역 부분 중 하나라도 매칭되면 포함
-            if any(part in address for part in region_parts if part):
+            info = snapshot.info.get(opening.get("job_id")) if snapshot is not None else None
+            tokens = info.region_tokens if info is not None else region_tokens(clean_address(opening.get("주소", "")))
+            # 지역 부분 중 하나라도 주소의 지역 토큰과 일치하면 포함
+            if region_matches(tokens, region_parts):
                 filtered.append(opening)
         
         return filtered
     
+    def _get_spatial_index(self, snapshot):
+        """스냅샷이 바뀌었을 때만 공간 인덱스를 다시 생성"""
+        if self._spatial_index is None or self._spatial_index[0] != snapshot.version:
+            without_coords = [job for job in snapshot.openings if snapshot.info[job["job_id"]].coords is None]
+            self._spatial_index = (snapshot.version, build_spatial_index(snapshot), without_coords)
+        return self._spatial_index[1], self._spatial_index[2]
+
+    def _filter_by_radius(self, user_address: str, radius_km: float,
+                          snapshot: JobSnapshot) -> Optional[List[Dict[str, Any]]]:
+        """
+        사용자 위치 반경 radius_km 이내 공고 (가까운 순)
+        좌표가 없는 공고는 지역명 필터링으로 보충하며, 반경 검색을 할 수 없으면 None
+        """
+        spatial_index, without_coords = self._get_spatial_index(snapshot)
+        if spatial_index is None:
+            return None
+        user_coords = self._get_coords_from_address(user_address)
+        if not user_coords:
+            print(">>> 사용자 주소의 좌표를 찾을 수 없어 지역명으로 필터링합니다.")
+            return None
+
+        nearby = spatial_index.within_radius(user_coords, radius_km)
+        if not nearby:
+            print(f">>> 반경 {radius_km:g}km 이내 공고가 없어 지역명으로 필터링합니다.")
+            return None
+        filtered = [snapshot.by_id[job_id] for job_id, _ in nearby]
+        filtered += self._filter_by_region(without_coords, user_address, snapshot)
+        print(f">>> 반경 {radius_km:g}km 이내 공고 {len(nearby)}개 (좌표 없는 공고 {len(filtered) - len(nearby)}개 추가)")
+        return filtered
+
     def _prepare_openings_for_recommendation(self, openings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """추천 시스템을 위해 공고 데이터를 준비 (하드코딩된 키워드 없이)"""
         if not openings:
@@ -237,63 +189,51 @@ class JobOpeningService:
         return prepared_openings
 
     def load_job_openings_from_pkl(self) -> List[Dict[str, Any]]:
-        """pkl 파일에서 일자리 공고 데이터를 로드합니다."""
-        try:
-            if not os.path.exists(self.pkl_file):
-                print(">>> pkl 파일이 존재하지 않습니다. job_crawler.py를 먼저 실행해주세요.")
-                return []
-            
-            # 메타데이터 확인
-            if os.path.exists(self.meta_file):
-                with open(self.meta_file, 'rb') as f:
-                    meta_data = pickle.load(f)
-                    collection_time = meta_data.get('collection_time', '알 수 없음')
-                    total_count = meta_data.get('total_count', 0)
-                    print(f">>> 저장된 데이터 로드: {total_count}개 공고")
-                    print(f">>> 수집 시간: {collection_time}")
-            
-            # 실제 데이터 로드
-            with open(self.pkl_file, 'rb') as f:
-                openings = pickle.load(f)
-            
-            print(f">>> pkl 파일에서 {len(openings)}개 공고 로드 완료")
-            # 데이터 검증 후 유효한 공고만 반환
-            valid_openings = [job for job in openings if self._validate_job_opening(job)]
-            invalid_count = len(openings) - len(valid_openings)
-            if invalid_count > 0:
-                print(f">>> 유효하지 않은 공고 {invalid_count}개 제외됨")
-            
-            return valid_openings
-            
-        except Exception as e:
-            print(f">>> pkl 파일 로드 중 오류: {e}")
+        """메모리 상주 스냅샷에서 일자리 공고 데이터를 가져옵니다. (pkl은 갱신됐을 때만 다시 로드)"""
+        snapshot = self.store.get()
+        if snapshot is None:
+            print(">>> pkl 파일이 존재하지 않습니다. job_crawler.py를 먼저 실행해주세요.")
             return []
+        return list(snapshot.openings)
     
     def _validate_job_opening(self, job: Dict[str, Any]) -> bool:
         """공고 데이터가 유효한지 검증합니다."""
-        required_fields = ['job_id', '채용제목', '사업장명', '접수시작일', '접수종료일']
-        for field in required_fields:
-            if not job.get(field) or job.get(field).strip() in ["-", ""]:
-                return False
-        return True
+        return is_valid_opening(job)
+
+    def _cleaned_address(self, job: Dict[str, Any], snapshot: Optional[JobSnapshot]) -> str:
+        """스냅샷에 미리 계산된 정제 주소 (스냅샷에 없는 공고는 즉석에서 계산)"""
+        info = snapshot.info.get(job.get("job_id")) if snapshot is not None else None
+        if info is not None:
+            return info.cleaned_address
+        return clean_address(job.get("주소", ""))
 
     def get_job_openings(self, job_title: str = "", region: str = "") -> List[Dict[str, Any]]:
         """pkl 파일에서 일자리 공고 데이터를 로드합니다. (기존 API 호출 방식 대체)"""
         return self.load_job_openings_from_pkl()
     
 
-    def get_filtered_job_openings(self, preferred_fields: List[str], region: str) -> List[Dict[str, Any]]:
-        """전체 공고를 검색한 후 지역과 키워드로 필터링합니다."""
+    def get_filtered_job_openings(self, preferred_fields: List[str], region: str,
+                                  radius_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        전체 공고를 검색한 후 사용자 반경(radius_km, 기본 SEARCH_RADIUS_KM)과 키워드로 필터링합니다.
+        스냅샷은 요청 시작 시 한 번만 가져와 끝까지 사용 (도중에 새 버전이 저장돼도 섞이지 않음)
+        """
         # 1. 전체 공고 검색
-        all_openings = self.get_job_openings()
+        snapshot = self.store.get()
+        if snapshot is None:
+            print(">>> pkl 파일이 존재하지 않습니다. job_crawler.py를 먼저 실행해주세요.")
+            return []
+        all_openings = snapshot.openings
         
         if not all_openings:
             return []
         
         print(f">>> 총 {len(all_openings)}개 공고 검색 완료, 필터링 시작...")
         
-        # 2. 지역별 필터링
-        region_filtered = self._filter_by_region(all_openings, region)
+        # 2. 반경 기반 필터링 (반경 검색이 불가능하면 지역명 필터링)
+        region_filtered = self._filter_by_radius(region, radius_km or SEARCH_RADIUS_KM, snapshot)
+        if region_filtered is None:
+            region_filtered = self._filter_by_region(all_openings, region, snapshot)
         
         # 3. 추천을 위한 공고 데이터 준비 (임베딩 매칭은 job_recommender에서 처리)
         prepared_openings = self._prepare_openings_for_recommendation(region_filtered)
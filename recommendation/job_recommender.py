@@ -10,14 +10,22 @@ Classes:
 Functions:
     get_recommendations: 사용자에게 맞춤형 일자리 추천 생성
     _calculate_profile_similarity: 사용자와 공고 간 프로필 유사도 계산
+    _retrieve_candidates: 후보가 많을 때 벡터 인덱스로 유사도 상위 공고만 선별
     _calculate_distance_score: 거리 기반 점수 계산
 """
 
+import os
 import numpy as np
 from typing import List, Dict, Any
 from text_embedding import UpstageEmbeddingService
 from job_filter import JobOpeningService
 from ai_explainer import GeminiService
+from embedding_index import get_embedding_index_files, job_text, normalize_rows, PASSAGE_MODEL
+from vector_index import SearchFilter, create_vector_index
+from distance import distance_scores
+
+# 후보 공고가 이보다 많으면 벡터 인덱스로 유사도 상위 N개만 거리 점수 계산에 사용
+VECTOR_RETRIEVAL_K = int(os.getenv("VECTOR_RETRIEVAL_K", 200))
 
 class JobRecommender:
     """일자리 추천 시스템의 메인 클래스"""
@@ -27,52 +35,110 @@ class JobRecommender:
         self.embedding_service = UpstageEmbeddingService()
         self.job_filter = JobOpeningService()
         self.ai_explainer = GeminiService()
+        # 크롤링 시 계산된 공고 임베딩 (job_openings.pkl과 같은 폴더)
+        self.embedding_index = get_embedding_index_files(self.job_filter.data_dir)
+        self._vector_index = None  # (임베딩 인덱스 버전, 벡터 인덱스)
 
-    def _calculate_profile_similarity(self, user_vector: List[float], job_vectors: List[List[float]]) -> List[float]:
+    def _calculate_profile_similarity(self, user_vector: List[float], job_vectors: np.ndarray) -> List[float]:
         """
         사용자 프로필과 공고 간 코사인 유사도 계산
         
         Args:
             user_vector: 사용자 프로필 임베딩 벡터
-            job_vectors: 공고들의 임베딩 벡터 리스트
+            job_vectors: 공고들의 임베딩 행렬 (행마다 공고 하나)
             
         Returns:
             List[float]: 각 공고와의 유사도 점수 리스트
         """
-        user_vec = np.array(user_vector)
-        job_vecs = np.array(job_vectors)
+        user_vec = np.asarray(user_vector, dtype=np.float32)
+        job_vecs = np.asarray(job_vectors, dtype=np.float32)
         
-        # 코사인 유사도 계산
-        dot_product = np.dot(job_vecs, user_vec)
+        # 코사인 유사도 계산 (한 번의 행렬-벡터 곱)
+        dot_product = job_vecs @ user_vec
         user_norm = np.linalg.norm(user_vec)
         job_norms = np.linalg.norm(job_vecs, axis=1)
+        job_norms[job_norms == 0] = 1.0
         
-        similarity = dot_product / (user_norm * job_norms)
+        similarity = dot_product / (user_norm or 1.0) / job_norms
         return similarity.tolist()
 
-    def _calculate_distance_score(self, distances: List[float]) -> List[float]:
+    def _calculate_distance_score(self, distances: np.ndarray) -> np.ndarray:
         """
         거리를 점수로 변환 (가까울수록 높은 점수)
         
         Args:
-            distances: 거리 리스트 (km 단위)
+            distances: 거리 배열 (km 단위, 위치 미상은 NaN)
             
         Returns:
-            List[float]: 0~1 사이의 거리 점수 리스트
+            np.ndarray: 0~1 사이의 거리 점수 배열 (1km 이내 만점, 30km 초과/위치 미상 0점)
         """
-        scores = []
-        max_dist = 30.0  # 최대 거리 30km
-        
-        for dist in distances:
-            if dist <= 1.0:  # 1km 이내는 만점
-                score = 1.0
-            elif dist > max_dist:  # 30km 초과는 0점
-                score = 0.0
-            else:
-                # 선형적으로 점수 감소
-                score = 1.0 - ((dist - 1.0) / (max_dist - 1.0))
-            scores.append(score)
-        return scores
+        return distance_scores(distances)
+
+    def _get_vector_index(self, index):
+        """임베딩 인덱스 버전별 벡터 인덱스 (지역/모집기간 메타데이터 포함, 버전이 바뀔 때만 다시 생성)"""
+        if self._vector_index is None or self._vector_index[0] != index.version:
+            snapshot = self.job_filter.store.get()
+            infos = [snapshot.info.get(job_id) if snapshot is not None else None for job_id in index.job_ids]
+            vector_index = create_vector_index(
+                index.matrix,
+                region_tokens=[info.region_tokens if info else () for info in infos],
+                start_dates=[info.start_date if info else "" for info in infos],
+                end_dates=[info.end_date if info else "" for info in infos],
+                normalized=True,
+            )
+            self._vector_index = (index.version, vector_index)
+        return self._vector_index[1]
+
+    def _retrieve_candidates(self, user_vector: List[float], job_openings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        후보 공고가 VECTOR_RETRIEVAL_K개를 넘으면 벡터 인덱스에서 유사도 상위 K개만 남김
+        인덱스에 없는 공고는 유사도를 알 수 없으므로 그대로 후보에 유지합니다.
+        """
+        if len(job_openings) <= VECTOR_RETRIEVAL_K:
+            return job_openings
+        index = self.embedding_index.load()
+        if index is None:
+            return job_openings
+
+        rows, missing = index.lookup(job_openings)
+        position_of = {row: position for position, row in enumerate(rows) if row >= 0}
+        top_rows, _ = self._get_vector_index(index).search(
+            np.asarray(user_vector, dtype=np.float32), VECTOR_RETRIEVAL_K,
+            SearchFilter(rows=list(position_of)),
+        )
+        keep = sorted([position_of[row] for row in top_rows.tolist()] + missing)
+        print(f">> 벡터 인덱스로 후보 공고 {len(job_openings)}개 중 {len(keep)}개 선별")
+        return [job_openings[position] for position in keep]
+
+    def _get_job_vectors(self, job_openings: List[Dict[str, Any]]):
+        """
+        후보 공고의 임베딩 행렬 (공고 순서와 동일한 행 순서)
+        인덱스에 없거나 내용이 바뀐 공고만 즉석에서 임베딩하며, 하나라도 실패하면 None
+        """
+        index = self.embedding_index.load()
+        if index is not None:
+            rows, missing = index.lookup(job_openings)
+        else:
+            rows, missing = [-1] * len(job_openings), list(range(len(job_openings)))
+
+        job_vectors = np.zeros((len(job_openings), index.matrix.shape[1] if index is not None else 0), dtype=np.float32)
+        present = [position for position, row in enumerate(rows) if row >= 0]
+        if present:
+            job_vectors[present] = index.matrix[[rows[position] for position in present]]
+
+        if missing:
+            print(f">> 임베딩 인덱스에 없는 공고 {len(missing)}개를 즉석에서 임베딩합니다.")
+            embedded = self.embedding_service.get_embeddings_batch(
+                [job_text(job_openings[position]) for position in missing], model_name=PASSAGE_MODEL
+            )
+            if any(embedding is None for embedding in embedded):
+                return None
+            embedded = normalize_rows(np.asarray(embedded, dtype=np.float32))
+            if job_vectors.shape[1] == 0:
+                job_vectors = np.zeros((len(job_openings), embedded.shape[1]), dtype=np.float32)
+            job_vectors[missing] = embedded
+
+        return job_vectors
 
     def get_recommendations(self, user, job_openings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -87,6 +153,8 @@ class JobRecommender:
         """
         if not job_openings:
             return []
+        # 거리 계산에 쓸 공고 스냅샷 (요청 중에는 같은 스냅샷 사용)
+        snapshot = self.job_filter.store.get()
         
         # 사용자 프로필 텍스트 생성
         user_profile_text = (
@@ -97,48 +165,37 @@ class JobRecommender:
             f"학력: {user.education}."
         )
         
-        # 공고 텍스트 생성
-        job_texts = [
-            f"채용 제목: {job.get('채용제목', '')}. 상세 내용: {job.get('상세내용', '')}"
-            for job in job_openings
-        ]
-
-        # 임베딩 벡터 생성
+        # 임베딩 벡터 생성 (사용자 프로필 1건만 API 호출, 공고는 인덱스에서 조회)
         try:
             user_vector = self.embedding_service.get_embeddings(user_profile_text, model_name="embedding-query")[0]
-            job_vectors = self.embedding_service.get_embeddings(job_texts, model_name="embedding-passage")
+            if user_vector:
+                job_openings = self._retrieve_candidates(user_vector, job_openings)
+            job_vectors = self._get_job_vectors(job_openings)
         except Exception as e:
             print(f">> 임베딩 생성 중 오류 발생: {e}")
-            return self.job_filter.sort_by_distance(user.location, job_openings)[:5]
+            return self.job_filter.sort_by_distance(user.location, job_openings, snapshot)[:5]
 
-        if not user_vector or not job_vectors:
+        if not user_vector or job_vectors is None:
             print(">> 임베딩 벡터를 가져오지 못했습니다.")
-            return self.job_filter.sort_by_distance(user.location, job_openings)[:5]
+            return self.job_filter.sort_by_distance(user.location, job_openings, snapshot)[:5]
 
         # 프로필 유사도 계산
         profile_scores = self._calculate_profile_similarity(user_vector, job_vectors)
 
-        # 거리 정보 추가 및 거리 점수 계산
-        job_openings_with_dist = []
-        for job in job_openings:
-            job_with_dist = job.copy()
-            distance = self.job_filter.calculate_distance(user.location, job.get('주소', ''))
-            job_with_dist['거리'] = f"{distance:.2f}km" if distance is not None else "999km"
-            job_openings_with_dist.append(job_with_dist)
-        
-        distances = [self.job_filter.parse_distance(job.get('거리', '999')) for job in job_openings_with_dist]
-        distance_scores = self._calculate_distance_score(distances)
+        # 거리 및 거리 점수 계산 (사용자 주소 1회 변환, 전체 공고를 배열 연산으로 계산)
+        distances = self.job_filter.calculate_distances(user.location, job_openings, snapshot)
+        dist_scores = self._calculate_distance_score(distances)
 
         # 통합 점수 계산 (프로필 60% + 거리 40%)
-        combined_scores = []
-        for i, job in enumerate(job_openings_with_dist):
-            score = (profile_scores[i] * 0.6) + (distance_scores[i] * 0.4)
-            job['score'] = score
-            combined_scores.append(job)
-
-        # 점수순 정렬 및 상위 10개 선별
-        ranked_jobs = sorted(combined_scores, key=lambda x: x['score'], reverse=True)
-        top_10_jobs = ranked_jobs[:10]
+        combined_scores = np.asarray(profile_scores) * 0.6 + dist_scores * 0.4
+
+        # 점수순 정렬 및 상위 10개 선별 (거리는 km 숫자로 저장, 출력 시에만 문자열 변환)
+        top_10_jobs = []
+        for i in np.argsort(-combined_scores, kind="stable")[:10]:
+            job = job_openings[i].copy()
+            job['거리'] = None if np.isnan(distances[i]) else float(distances[i])
+            job['score'] = float(combined_scores[i])
+            top_10_jobs.append(job)
         
         # AI 추천 이유 생성을 위한 프롬프트 구성
         prompt = f"""
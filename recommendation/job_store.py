@@ -0,0 +1,173 @@
+"""
+메모리 상주 공고 저장소 - job_openings.pkl을 한 번만 로드하여 스냅샷으로 보관
+- 유효성 검증과 파생 필드(정제 주소, 지역 토큰, 모집 기간) 계산은 로드 시 한 번만 수행
+- job_crawler.py의 save_data가 새 버전을 저장하면(메타 파일 갱신) 새 스냅샷으로 통째로 교체
+
+[버전 판단]
+ - 크롤러는 공고 파일을 먼저 교체한 뒤 메타 파일을 마지막에 교체함
+ - 따라서 메타 파일의 수정 시각이 바뀌었다면 공고 파일은 이미 완전히 저장된 상태
+"""
+
+import os
+import pickle
+import re
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+REQUIRED_FIELDS = ('job_id', '채용제목', '사업장명', '접수시작일', '접수종료일')
+
+# 지역 토큰에서 떼어낼 행정구역 접미사 (긴 것부터)
+_REGION_SUFFIXES = ("특별자치도", "특별자치시", "특별시", "광역시", "도", "시", "구", "군")
+
+
+def is_valid_opening(job: Dict[str, Any]) -> bool:
+    """필수 필드가 모두 채워진 공고인지 검증합니다."""
+    for field in REQUIRED_FIELDS:
+        value = job.get(field)
+        if not value or value.strip() in ["-", ""]:
+            return False
+    return True
+
+
+def clean_address(address: str) -> str:
+    """주소 앞의 우편번호와 쉼표 뒤 상세 주소를 제거 (좌표 변환용 도로명 주소)"""
+    match = re.match(r"^\d{5}\s+([^,]+)", address)
+    if match:
+        return match.group(1).strip()
+    return re.sub(r"^\d{5}\s+", "", address).strip()
+
+
+def strip_region_suffix(token: str) -> str:
+    """행정구역 접미사 제거 (예: '서울특별시' → '서울', '강남구' → '강남')"""
+    for suffix in _REGION_SUFFIXES:
+        if token.endswith(suffix) and len(token) > len(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def region_tokens(address: str) -> Tuple[str, ...]:
+    """주소 앞 세 어절의 지역 토큰 (예: '경기도 성남시 분당구 ...' → ('경기', '성남', '분당'))"""
+    return tuple(strip_region_suffix(token) for token in address.split()[:3])
+
+
+def region_matches(tokens: Sequence[str], region_parts: Sequence[str]) -> bool:
+    """
+    지역 부분 중 하나라도 주소의 지역 토큰과 정확히 같으면 True
+    접미사를 뗀 토큰끼리 비교하므로 접두어로 비교하면 '중'(중구)이 '중랑'(중랑구)과 일치하는 문제가 없음
+
+    >>> region_matches(region_tokens('서울특별시 중랑구 망우로 1'), ['중'])
+    False
+    >>> region_matches(region_tokens('서울특별시 중구 세종대로 110'), ['중'])
+    True
+    >>> region_matches(region_tokens('서울특별시 서초구 서초대로 1'), ['인천', '서'])
+    False
+    >>> region_matches(region_tokens('경기도 남양주시 경춘로 1'), ['대구', '남'])
+    False
+    """
+    return any(part in tokens for part in region_parts)
+
+
+def opening_coords(job: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """공고에 저장된 (위도, 경도) - 크롤러가 좌표 변환에 실패했거나 이전 버전 데이터면 None"""
+    lat, lon = job.get("위도"), job.get("경도")
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+class OpeningInfo:
+    """공고별 파생 필드 (로드 시 한 번만 계산)"""
+
+    __slots__ = ("cleaned_address", "region_tokens", "start_date", "end_date", "coords")
+
+    def __init__(self, job: Dict[str, Any]):
+        self.cleaned_address = clean_address(job.get("주소", "") or "")
+        self.region_tokens = region_tokens(self.cleaned_address)
+        self.start_date = job.get("접수시작일", "").strip()
+        self.end_date = job.get("접수종료일", "").strip()
+        # 크롤링 시 미리 변환된 좌표 (없으면 None)
+        self.coords = opening_coords(job)
+
+    def is_active(self, today: str) -> bool:
+        """모집 기간 내인지 확인 (today: YYYYMMDD)"""
+        return self.start_date <= today <= self.end_date
+
+
+class JobSnapshot:
+    """한 시점의 공고 데이터 (읽기 전용으로 공유)"""
+
+    __slots__ = ("version", "meta", "openings", "by_id", "info")
+
+    def __init__(self, version: tuple, meta: dict, openings: List[Dict[str, Any]]):
+        self.version = version
+        self.meta = meta
+        self.openings = tuple(openings)
+        self.by_id = MappingProxyType({job["job_id"]: job for job in openings})
+        self.info = MappingProxyType({job["job_id"]: OpeningInfo(job) for job in openings})
+
+
+class JobStore:
+    """공고 스냅샷을 보관하고 크롤러가 새 버전을 저장하면 교체하는 저장소"""
+
+    def __init__(self, data_dir: str):
+        self.pkl_file = os.path.join(data_dir, "job_openings.pkl")
+        self.meta_file = os.path.join(data_dir, "collection_meta.pkl")
+        self._snapshot = None
+
+    def _version(self) -> Optional[tuple]:
+        """메타 파일과 공고 파일의 수정 시각 (공고 파일이 없으면 None)"""
+        try:
+            pkl_mtime = os.stat(self.pkl_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        try:
+            meta_mtime = os.stat(self.meta_file).st_mtime_ns
+        except FileNotFoundError:
+            meta_mtime = 0
+        return (meta_mtime, pkl_mtime)
+
+    def _load(self, version: tuple) -> JobSnapshot:
+        meta = {}
+        if os.path.exists(self.meta_file):
+            with open(self.meta_file, 'rb') as f:
+                meta = pickle.load(f)
+
+        with open(self.pkl_file, 'rb') as f:
+            openings = pickle.load(f)
+
+        valid_openings = [job for job in openings if is_valid_opening(job)]
+        invalid_count = len(openings) - len(valid_openings)
+
+        print(f">>> 공고 스냅샷 로드: {len(valid_openings)}개 공고 (수집 시간: {meta.get('collection_time', '알 수 없음')})")
+        if invalid_count > 0:
+            print(f">>> 유효하지 않은 공고 {invalid_count}개 제외됨")
+        return JobSnapshot(version, meta, valid_openings)
+
+    def get(self) -> Optional[JobSnapshot]:
+        """
+        현재 스냅샷 반환 (파일이 바뀌지 않았으면 stat 두 번 외에 I/O 없음)
+        새 버전 로드에 실패하면 기존 스냅샷을 계속 사용합니다.
+        """
+        version = self._version()
+        if version is None:
+            return self._snapshot
+        if self._snapshot is not None and self._snapshot.version == version:
+            return self._snapshot
+
+        try:
+            # 참조 교체만으로 갱신 (진행 중인 추천은 기존 스냅샷을 계속 사용)
+            self._snapshot = self._load(version)
+        except Exception as e:
+            print(f">>> 공고 스냅샷 로드 중 오류, 기존 스냅샷 유지: {e}")
+        return self._snapshot
+
+
+_stores = {}  # 데이터 폴더 → 저장소 (같은 프로세스의 서비스들이 하나의 스냅샷을 공유)
+
+
+def get_job_store(data_dir: str) -> JobStore:
+    """데이터 폴더별 공유 저장소 반환"""
+    data_dir = os.path.abspath(data_dir)
+    if data_dir not in _stores:
+        _stores[data_dir] = JobStore(data_dir)
+    return _stores[data_dir]
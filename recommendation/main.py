@@ -25,6 +25,10 @@
 [실행 조건]
  - job_crawler.py를 통해 job_openings.pkl 파일이 생성되어 있어야 함
  - recordings/YYYYMMDD_HHMMSS/ 폴더에 metadata.json 파일이 있어야 함
+
+[서버에서 사용]
+ - run_recommendation()에 미리 생성한 JobOpeningService/JobRecommender를 넘겨 재사용
+ - 통화 서버는 recommendation_service.py의 상주 워커 프로세스에서 호출
 """
 
 import os
@@ -36,6 +40,7 @@ from pydantic import BaseModel, Field
 
 from job_recommender import JobRecommender
 from job_filter import JobOpeningService
+from distance import format_distance
 
 class ElderlyUser(BaseModel):
     """구직자 정보를 담는 데이터 클래스"""
@@ -67,7 +72,7 @@ def print_recommendation_results(user: ElderlyUser, ranked_openings: List[dict])
             print(f"\n--- {i}순위: {opening.get('채용제목', '정보 없음')} (점수: {opening.get('score', 0):.2f}) ---")
             print(f"  - 추천 이유: {opening.get('reason', 'AI 추천')}")
             print(f"  - 사업장: {opening.get('사업장명', '정보 없음')}")
-            print(f"  - 주소: {opening.get('주소', '정보 없음')} (거리: {opening.get('거리', '-')})")
+            print(f"  - 주소: {opening.get('주소', '정보 없음')} (거리: {format_distance(opening.get('거리'))})")
     print("\n" + "="*50)
 
 def generate_json_output(user: ElderlyUser, ranked_openings: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -84,7 +89,7 @@ def generate_json_output(user: ElderlyUser, ranked_openings: List[Dict[str, Any]
                 "title": opening.get('채용제목', ''),
                 "company": opening.get('사업장명', ''),
                 "address": opening.get('주소', ''),
-                "distanceKm": JobOpeningService.parse_distance(opening.get('거리', '999')) if opening.get('거리') else None,
+                "distanceKm": round(opening['거리'], 2) if opening.get('거리') is not None else None,
                 "details": opening.get('상세내용', '')
             }
         }
@@ -96,8 +101,8 @@ def generate_json_output(user: ElderlyUser, ranked_openings: List[Dict[str, Any]
         "recommendations": recommendations_data
     }
 
-def save_json_output(data: Dict[str, Any], user_name: str, recording_folder: str):
-    """JSON 데이터를 해당 recordings 폴더에 저장합니다."""
+def save_json_output(data: Dict[str, Any], user_name: str, recording_folder: str) -> Optional[str]:
+    """JSON 데이터를 해당 recordings 폴더에 저장하고 저장 경로를 반환합니다."""
     # 파일명을 구직자명_YYYYMMDD_HHMMSS.json 형식으로 생성
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f"{user_name}_{timestamp}.json"
@@ -107,8 +112,10 @@ def save_json_output(data: Dict[str, Any], user_name: str, recording_folder: str
         with open(full_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"\n>>> [성공] 최종 결과가 다음 경로에 저장되었습니다: {full_path}")
+        return full_path
     except Exception as e:
         print(f"\n>>> [오류] JSON 파일 저장 중 오류 발생: {e}")
+        return None
 
 def load_user_from_metadata(metadata_path: str) -> Optional[ElderlyUser]:
     """metadata.json 파일에서 사용자 정보를 로드합니다."""
@@ -159,30 +166,22 @@ def get_latest_recording_folder():
         print(f">>> [오류] 녹음 폴더를 찾는 중 예외 발생: {e}")
         return None
 
-def main():
-    print("="*40)
-    print(">>> [0] 프로그램 실행 시작")
-    
-    # 명령줄 인자로 폴더 경로가 주어졌는지 확인
-    if len(sys.argv) > 1:
-        recording_folder = sys.argv[1]
-        if not os.path.isdir(recording_folder):
-            print(f">>> [오류] 지정된 폴더를 찾을 수 없습니다: {recording_folder}")
-            return
-        print(f">>> [정보] 지정된 폴더로 처리: {os.path.basename(recording_folder)}")
-    else:
-        recording_folder = get_latest_recording_folder()
-        if not recording_folder: return
-        print(f">>> [정보] 처리 대상 폴더: {os.path.basename(recording_folder)}")
-    
+def run_recommendation(recording_folder: str,
+                       job_filter: Optional[JobOpeningService] = None,
+                       job_recommender: Optional[JobRecommender] = None) -> Optional[str]:
+    """
+    녹음 폴더 하나에 대해 1~4단계를 수행하고 결과 JSON 경로를 반환합니다.
+    job_filter/job_recommender를 넘기면 로드된 공고와 API 클라이언트를 재사용합니다.
+    """
     metadata_path = os.path.join(recording_folder, "metadata.json")
     user = load_user_from_metadata(metadata_path)
-    if not user: return
+    if not user: return None
     
     print(f">>> [1] '{user.name}' 정보 로드 완료.")
 
     print("\n>>> [2] 전체 공고 검색 후 사용자 맞춤 필터링을 시작합니다.")
-    job_filter = JobOpeningService()
+    if job_filter is None:
+        job_filter = JobOpeningService()
     
     candidate_openings = job_filter.get_filtered_job_openings(
         user.preferred_field, 
@@ -191,19 +190,39 @@ def main():
     
     if not candidate_openings:
         print(">> 검색된 구인 공고가 없습니다. 프로그램을 종료합니다.")
-        return
+        return None
 
     print(f"\n>>> 총 {len(candidate_openings)}개의 후보 공고를 찾았습니다.")
 
     print("\n>>> [3] 점수 계산 및 AI 추천을 시작합니다.")
-    job_recommender = JobRecommender()
+    if job_recommender is None:
+        job_recommender = JobRecommender()
     ranked_openings = job_recommender.get_recommendations(user, candidate_openings)
+    print(f">>> 임베딩 캐시: {job_recommender.embedding_service.cache.stats()}")
 
     print("\n>>> [4] 최종 추천 결과 출력을 시작합니다.")
     print_recommendation_results(user, ranked_openings)
     
     json_output = generate_json_output(user, ranked_openings)
-    save_json_output(json_output, user.name, recording_folder)
+    return save_json_output(json_output, user.name, recording_folder)
+
+def main():
+    print("="*40)
+    print(">>> [0] 프로그램 실행 시작")
+    
+    # 명령줄 인자로 폴더 경로가 주어졌는지 확인
+    if len(sys.argv) > 1:
+        recording_folder = sys.argv[1]
+        if not os.path.isdir(recording_folder):
+            print(f">>> [오류] 지정된 폴더를 찾을 수 없습니다: {recording_folder}")
+            return
+        print(f">>> [정보] 지정된 폴더로 처리: {os.path.basename(recording_folder)}")
+    else:
+        recording_folder = get_latest_recording_folder()
+        if not recording_folder: return
+        print(f">>> [정보] 처리 대상 폴더: {os.path.basename(recording_folder)}")
+    
+    run_recommendation(recording_folder)
 
     print("\n>>> [5] 모든 작업 완료. 프로그램을 종료합니다.")
     print("="*40)
@@ -0,0 +1,74 @@
+"""
+공고 공간 인덱스 - 위도/경도 격자(grid bucket)로 "사용자 반경 R km 이내 공고"를 빠르게 조회
+- 스냅샷 로드 후 한 번 생성: 격자 칸(cell) → 공고 행 번호 목록
+- 조회 시 반경을 덮는 칸들의 공고만 모아 하버사인 거리로 정확히 거름 (전체 공고를 훑지 않음)
+- 시/도 경계 근처의 사용자도 행정구역 이름과 관계없이 실제 거리 기준으로 후보를 찾음
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from distance import haversine_km
+
+SPATIAL_GRID_CELL_DEG = float(os.getenv("SPATIAL_GRID_CELL_DEG", 0.05))  # 위도 방향 약 5.5km
+KM_PER_DEG_LAT = 111.32
+
+
+class GridSpatialIndex:
+    """균일 위도/경도 격자 공간 인덱스 (읽기 전용)"""
+
+    def __init__(self, job_ids: List[str], coords: np.ndarray, cell_deg: float = SPATIAL_GRID_CELL_DEG):
+        self.job_ids = job_ids
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.cell_deg = cell_deg
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for row, (lat, lon) in enumerate(self.coords):
+            cells.setdefault(self._cell(lat, lon), []).append(row)
+        self._cells = {cell: np.array(rows, dtype=np.int64) for cell, rows in cells.items()}
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def within_radius(self, center: Tuple[float, float], radius_km: float) -> List[Tuple[str, float]]:
+        """center(위도, 경도)에서 radius_km 이내 공고의 (job_id, 거리 km) 목록 (가까운 순)"""
+        lat, lon = center
+        lat_span = radius_km / KM_PER_DEG_LAT
+        lon_span = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        lat_min, lon_min = self._cell(lat - lat_span, lon - lon_span)
+        lat_max, lon_max = self._cell(lat + lat_span, lon + lon_span)
+
+        buckets = [
+            self._cells[(i, j)]
+            for i in range(lat_min, lat_max + 1)
+            for j in range(lon_min, lon_max + 1)
+            if (i, j) in self._cells
+        ]
+        if not buckets:
+            return []
+
+        rows = np.concatenate(buckets)
+        distances = haversine_km(center, self.coords[rows])
+        inside = distances <= radius_km
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return [(self.job_ids[rows[i]], float(distances[i])) for i in order]
+
+
+def build_spatial_index(snapshot, cell_deg: float = SPATIAL_GRID_CELL_DEG) -> Optional[GridSpatialIndex]:
+    """스냅샷에서 좌표가 있는 공고로 공간 인덱스 생성 (좌표가 있는 공고가 없으면 None)"""
+    job_ids, coords = [], []
+    for job_id, info in snapshot.info.items():
+        if info.coords is not None:
+            job_ids.append(job_id)
+            coords.append(info.coords)
+    if not job_ids:
+        return None
+    print(f">>> 공간 인덱스 생성: 좌표가 있는 공고 {len(job_ids)}/{len(snapshot.info)}개")
+    return GridSpatialIndex(job_ids, np.array(coords), cell_deg)
@@ -10,22 +10,42 @@ Classes:
 
 Functions:
     get_embeddings: 텍스트를 임베딩 벡터로 변환
+    get_embeddings_batch: 여러 텍스트를 배치 요청으로 동시에 변환 (입력 순서에 맞춘 부분 결과 반환)
     _call_api_single: 단일 텍스트에 대한 API 호출
 """
 
+import asyncio
 import os
+import random
+import aiohttp
 import requests
-from typing import List, Union
+from typing import List, Optional, Union
 from dotenv import load_dotenv
 
+from embedding_cache import get_embedding_cache
+
+
+class _RetryableError(Exception):
+    """재시도하면 성공할 수 있는 오류 (429, 5xx, 네트워크 오류)"""
+
 class UpstageEmbeddingService:
     """Upstage AI를 사용한 텍스트 임베딩 서비스 클래스"""
+
+    MAX_TEXT_LENGTH = 8000
+    BATCH_SIZE = 100  # 요청 하나에 담는 최대 입력 수 (API 제한)
+    MAX_CONCURRENCY = 4  # 동시에 보내는 배치 요청 수
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 0.5  # 재시도 대기 시간 (0.5s → 1s → 2s, 지터 포함)
+    REQUEST_TIMEOUT = 60
     
     def __init__(self):
         """Upstage API 키 설정 및 초기화"""
         load_dotenv()
         self.api_key = os.getenv("UPSTAGE_API_KEY")
-        self.api_url = "https://api.upstage.ai/v1/embeddings"
+        # 로컬 테스트 서버 등으로 바꿀 수 있도록 환경 변수 지원
+        self.api_url = os.getenv("UPSTAGE_API_URL", "https://api.upstage.ai/v1/embeddings")
+        # (모델명, 텍스트 해시) 기준 임베딩 캐시 (메모리 LRU + SQLite)
+        self.cache = get_embedding_cache()
 
     def get_embeddings(self, texts: Union[str, List[str]], model_name: str = "embedding-passage") -> List[List[float]]:
         """
@@ -47,24 +67,137 @@ class UpstageEmbeddingService:
                 print(">> 빈 텍스트입니다.")
                 return []
             
-            return self._call_api_single(texts.strip()[:8000], model_name)
+            text = texts.strip()[:self.MAX_TEXT_LENGTH]
+            cached = self.cache.get_many(model_name, [text])
+            if cached:
+                return [cached[0]]
+            embedding = self._call_api_single(text, model_name)
+            if embedding:
+                self.cache.put_many(model_name, [text], embedding)
+            return embedding
         
         # 다중 텍스트 처리
-        valid_texts = [text.strip()[:8000] for text in texts if text and text.strip()]
+        valid_texts = [text for text in texts if text and text.strip()]
         if not valid_texts:
             print(">> 유효한 텍스트가 없습니다.")
             return []
         
-        # 각 텍스트를 개별적으로 처리
-        all_embeddings = []
-        for text in valid_texts:
-            embedding = self._call_api_single(text, model_name)
-            if embedding:
-                all_embeddings.extend(embedding)
-            else:
-                return []
+        # 배치 요청으로 처리 (기존 동작 유지: 하나라도 실패하면 빈 리스트)
+        # 실패한 항목을 제외한 부분 결과가 필요하면 get_embeddings_batch 사용
+        embeddings = self.get_embeddings_batch(valid_texts, model_name)
+        if any(embedding is None for embedding in embeddings):
+            return []
+        return embeddings
+
+    def get_embeddings_batch(self, texts: List[str], model_name: str = "embedding-passage") -> List[Optional[List[float]]]:
+        """
+        여러 텍스트를 배치 요청으로 임베딩 (동기 코드용)
         
-        return all_embeddings
+        Returns:
+            List[Optional[List[float]]]: 입력과 같은 순서의 임베딩 (빈 텍스트/최종 실패 항목은 None)
+        """
+        return asyncio.run(self.get_embeddings_batch_async(texts, model_name))
+
+    async def get_embeddings_batch_async(self, texts: List[str], model_name: str = "embedding-passage",
+                                         session: Optional[aiohttp.ClientSession] = None) -> List[Optional[List[float]]]:
+        """
+        여러 텍스트를 BATCH_SIZE 단위 배치로 나눠 최대 MAX_CONCURRENCY개씩 동시에 요청
+        - 배치 요청이 재시도 후에도 실패하면 항목별로 다시 요청하여 성공한 결과는 유지
+        - session을 넘기면 호출 측의 커넥션 풀을 재사용
+        """
+        if not self.api_key:
+            raise ValueError("UPSTAGE_API_KEY가 설정되지 않았습니다.")
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        prepared = {i: text.strip()[:self.MAX_TEXT_LENGTH] for i, text in enumerate(texts) if text and text.strip()}
+        positions = list(prepared)
+
+        # 캐시에 있는 텍스트는 API 요청에서 제외
+        cached = self.cache.get_many(model_name, [prepared[i] for i in positions])
+        for offset, embedding in cached.items():
+            results[positions[offset]] = embedding
+        positions = [i for i in positions if results[i] is None]
+        if cached:
+            print(f">> 임베딩 캐시 적중 {len(cached)}개, API 요청 {len(positions)}개")
+        if not positions:
+            return results
+
+        batches = [positions[i:i + self.BATCH_SIZE] for i in range(0, len(positions), self.BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def run_batch(client: aiohttp.ClientSession, batch: List[int]):
+            inputs = [prepared[i] for i in batch]
+            async with semaphore:
+                embeddings = await self._post_with_retry(client, inputs, model_name)
+            if embeddings is None:
+                # 배치 실패 → 항목별 재요청 (한 항목의 오류가 배치 전체를 버리지 않도록)
+                print(f">> 배치 요청 실패, {len(batch)}개 항목을 개별 요청합니다.")
+                embeddings = await asyncio.gather(*(
+                    self._embed_single_async(client, semaphore, text, model_name) for text in inputs
+                ))
+            for position, embedding in zip(batch, embeddings):
+                results[position] = embedding
+            self.cache.put_many(model_name, inputs, embeddings)
+
+        if session is not None:
+            await asyncio.gather(*(run_batch(session, batch) for batch in batches))
+        else:
+            timeout = aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT)
+            connector = aiohttp.TCPConnector(limit=self.MAX_CONCURRENCY)
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as client:
+                await asyncio.gather(*(run_batch(client, batch) for batch in batches))
+
+        failed = sum(1 for i in positions if results[i] is None)
+        if failed:
+            print(f">> 임베딩 실패 {failed}개 (성공 {len(positions) - failed}개는 유지)")
+        return results
+
+    async def _embed_single_async(self, client: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                  text: str, model_name: str) -> Optional[List[float]]:
+        async with semaphore:
+            embeddings = await self._post_with_retry(client, [text], model_name)
+        return embeddings[0] if embeddings else None
+
+    async def _post_with_retry(self, client: aiohttp.ClientSession, inputs: List[str],
+                               model_name: str) -> Optional[List[List[float]]]:
+        """재시도 가능한 오류는 지수 백오프로 재시도하고, 최종 실패 시 None 반환"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return await self._post_batch(client, inputs, model_name)
+            except _RetryableError as e:
+                if attempt == self.MAX_RETRIES:
+                    print(f">> 임베딩 요청 재시도 초과: {e}")
+                    return None
+                delay = self.RETRY_BASE_DELAY * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            except Exception as e:
+                print(f">> 임베딩 요청 실패: {e}")
+                return None
+
+    async def _post_batch(self, client: aiohttp.ClientSession, inputs: List[str],
+                          model_name: str) -> List[List[float]]:
+        """입력 배열을 한 번에 요청하고 입력 순서대로 임베딩 반환"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        try:
+            async with client.post(self.api_url, headers=headers,
+                                   json={"input": inputs, "model": model_name}) as response:
+                if response.status == 429 or response.status >= 500:
+                    raise _RetryableError(f"HTTP {response.status}")
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}: {await response.text()}")
+                result = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RetryableError(str(e)) from e
+
+        data = result.get("data") or []
+        if len(data) != len(inputs):
+            raise ValueError(f"응답 개수 불일치 (요청 {len(inputs)}개, 응답 {len(data)}개)")
+        # 응답의 index 필드 기준으로 입력 순서에 맞춤
+        ordered = sorted(data, key=lambda item: item.get("index", 0))
+        return [item["embedding"] for item in ordered]
 
     def _call_api_single(self, text: str, model_name: str) -> List[List[float]]:
         """
@@ -0,0 +1,179 @@
+"""
+공고 벡터 인덱스 - 사용자 프로필 임베딩과 가장 유사한 공고 top-k 검색
+전국 공고(수만 건)를 인덱싱해도 추천 한 건이 전체 공고와의 유사도를 매번 계산하지 않도록 합니다.
+
+Classes:
+    SearchFilter: 지역/모집기간 사전 필터
+    ExactVectorIndex: 정규화된 float32 행렬과의 내적으로 정확한 top-k 검색
+    IVFVectorIndex: k-means 군집(IVF)으로 일부 군집만 탐색하는 근사 검색 (NumPy 구현)
+
+Functions:
+    create_vector_index: 설정(VECTOR_INDEX_BACKEND)에 따라 인덱스 생성
+"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "exact")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _date_number(value: str) -> int:
+    """YYYYMMDD 문자열을 정수로 변환 (형식이 다르면 0)"""
+    value = (value or "").strip()
+    return int(value) if value.isdigit() and len(value) == 8 else 0
+
+
+class SearchFilter:
+    """
+    검색 전 적용하는 조건
+    - region_parts: 지역 토큰 (하나라도 토큰과 정확히 일치하면 통과, 예: ['서울', '강남'])
+    - active_on: YYYYMMDD, 모집 기간 안의 공고만 통과
+    - rows: 허용할 행 번호 (이미 걸러진 후보 집합)
+    """
+
+    def __init__(self, region_parts: Optional[Sequence[str]] = None,
+                 active_on: Optional[str] = None, rows: Optional[Sequence[int]] = None):
+        self.region_parts = [part for part in (region_parts or []) if part]
+        self.active_on = _date_number(active_on) if active_on else None
+        self.rows = rows
+
+
+class _BaseVectorIndex(ABC):
+    """행 메타데이터(지역 토큰, 모집 기간)와 필터 마스크 계산을 공유하는 기반 클래스"""
+
+    def __init__(self, vectors: np.ndarray, region_tokens: Optional[List[Sequence[str]]] = None,
+                 start_dates: Optional[List[str]] = None, end_dates: Optional[List[str]] = None,
+                 normalized: bool = False):
+        # 이미 정규화된 행렬(임베딩 인덱스의 memmap 등)은 복사하지 않고 그대로 사용
+        self.vectors = np.asarray(vectors, dtype=np.float32) if normalized else _normalize(vectors)
+        count = len(self.vectors)
+        self.start_dates = np.array([_date_number(d) for d in (start_dates or [""] * count)], dtype=np.int64)
+        self.end_dates = np.array([_date_number(d) for d in (end_dates or [""] * count)], dtype=np.int64)
+
+        # 지역 토큰 → 행 번호 역색인 (토큰 단위 정확 일치로 조회, '중'이 '중랑'에 걸리지 않음)
+        token_rows = {}
+        for row, tokens in enumerate(region_tokens or []):
+            for token in set(tokens):
+                token_rows.setdefault(token, []).append(row)
+        self._token_rows = {token: np.array(rows, dtype=np.int64) for token, rows in token_rows.items()}
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _mask(self, search_filter: Optional[SearchFilter]) -> Optional[np.ndarray]:
+        """필터를 통과한 행의 불리언 마스크 (필터가 없으면 None)"""
+        if search_filter is None:
+            return None
+        mask = np.ones(len(self.vectors), dtype=bool)
+        if search_filter.rows is not None:
+            allowed = np.zeros(len(self.vectors), dtype=bool)
+            allowed[np.asarray(search_filter.rows, dtype=np.int64)] = True
+            mask &= allowed
+        if search_filter.region_parts:
+            region_mask = np.zeros(len(self.vectors), dtype=bool)
+            for part in search_filter.region_parts:
+                rows = self._token_rows.get(part)
+                if rows is not None:
+                    region_mask[rows] = True
+            mask &= region_mask
+        if search_filter.active_on is not None:
+            mask &= (self.start_dates <= search_filter.active_on) & (search_filter.active_on <= self.end_dates)
+        return mask
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """점수 상위 k개 (전체 정렬 없이 argpartition 후 k개만 정렬)"""
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int,
+               search_filter: Optional[SearchFilter] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """query와 코사인 유사도가 높은 행 번호와 점수 (내림차순)"""
+
+
+class ExactVectorIndex(_BaseVectorIndex):
+    """정확한 검색 - 필터를 통과한 행만 골라 한 번의 행렬-벡터 곱"""
+
+    def search(self, query, k, search_filter=None):
+        query = _normalize(query)
+        mask = self._mask(search_filter)
+        if mask is None:
+            rows = np.arange(len(self.vectors))
+            scores = self.vectors @ query
+        else:
+            rows = np.flatnonzero(mask)
+            scores = self.vectors[rows] @ query
+        if len(rows) == 0:
+            return rows, scores
+        return self._top_k(rows, scores, k)
+
+
+class IVFVectorIndex(_BaseVectorIndex):
+    """
+    근사 검색 - 벡터를 nlist개 군집으로 나누고 질의와 가까운 nprobe개 군집만 탐색
+    필터 조건이 까다로워 탐색 군집 안의 후보가 k개보다 적으면 정확한 검색으로 전환합니다.
+    """
+
+    def __init__(self, vectors, region_tokens=None, start_dates=None, end_dates=None,
+                 normalized: bool = False, nlist: Optional[int] = None, nprobe: int = 8,
+                 iterations: int = 10, seed: int = 0):
+        super().__init__(vectors, region_tokens, start_dates, end_dates, normalized)
+        count = len(self.vectors)
+        if count == 0:
+            raise ValueError("IVF 인덱스는 최소 1개의 벡터가 필요합니다 (빈 행렬은 ExactVectorIndex 사용)")
+        self.nlist = max(1, min(count, nlist or int(np.sqrt(count))))
+        self.nprobe = min(nprobe, self.nlist)
+        self.centroids, assignments = self._train(iterations, seed)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(self.nlist)]
+
+    def _train(self, iterations: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """구면 k-means (정규화 벡터의 내적 기준 군집화)"""
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(len(self.vectors), self.nlist, replace=False)].copy()
+        assignments = np.zeros(len(self.vectors), dtype=np.int64)
+        for _ in range(iterations):
+            assignments = np.argmax(self.vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, self.vectors)
+            empty = np.bincount(assignments, minlength=self.nlist) == 0
+            # 빈 군집은 임의의 벡터로 다시 시작
+            sums[empty] = self.vectors[rng.choice(len(self.vectors), int(empty.sum()))]
+            centroids = _normalize(sums)
+        return centroids, assignments
+
+    def search(self, query, k, search_filter=None):
+        query = _normalize(query)
+        probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        rows = np.concatenate([self._lists[c] for c in probe])
+        mask = self._mask(search_filter)
+        if mask is not None:
+            rows = rows[mask[rows]]
+            if len(rows) < k:
+                rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+        return self._top_k(rows, self.vectors[rows] @ query, k)
+
+
+def create_vector_index(vectors: np.ndarray, region_tokens=None, start_dates=None, end_dates=None,
+                        normalized: bool = False, backend: str = VECTOR_INDEX_BACKEND) -> _BaseVectorIndex:
+    """backend: 'exact'(기본값) 또는 'ivf' (공고가 없으면 군집을 만들 수 없으므로 항상 exact)"""
+    if backend == "ivf" and len(vectors) > 0:
+        return IVFVectorIndex(vectors, region_tokens, start_dates, end_dates, normalized)
+    return ExactVectorIndex(vectors, region_tokens, start_dates, end_dates, normalized)
@@ -0,0 +1,181 @@
+"""
+일자리 추천 서비스 - 상주 워커 프로세스에서 추천 시스템 실행
+통화 종료 시 매번 새 파이썬 프로세스를 띄우지 않고, 공고 데이터와 추천 엔진을 올려 둔 워커에 작업을 넘깁니다.
+추천은 CPU/블로킹 I/O 작업이므로 이벤트 루프가 아닌 별도 프로세스에서 실행되어 다른 통화를 막지 않습니다.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RECOMMENDATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recommendation")
+
+# 상주 워커 수와 추천 한 건의 최대 실행 시간 (초, 워커를 기다린 시간은 제외)
+RECOMMENDATION_WORKERS = max(1, int(os.environ.get("RECOMMENDATION_WORKERS", 1)))
+RECOMMENDATION_TIMEOUT = float(os.environ.get("RECOMMENDATION_TIMEOUT", 180))
+
+
+# ---------------------------WORKER PROCESS--------------------------- #
+
+_worker = {}  # 워커 프로세스 전역 상태 (추천 모듈, JobOpeningService, JobRecommender, 초기화 오류)
+
+
+def _init_worker():
+    """
+    워커 시작 시 한 번만 추천 모듈을 import하고 공고 데이터를 로드
+    초기화 오류(pkl 없음, API 키 없음 등)는 예외로 올리지 않고 기록만 함
+    (initializer가 예외를 내면 풀 전체가 깨지므로, 추천 작업 단위로 실패 처리)
+    """
+    # recommendation/ 모듈들은 같은 폴더 기준 import를 사용
+    if RECOMMENDATION_DIR not in sys.path:
+        sys.path.insert(0, RECOMMENDATION_DIR)
+    try:
+        recommendation_main = importlib.import_module("main")
+        job_filter = recommendation_main.JobOpeningService()
+        job_filter.load_job_openings_from_pkl()
+        job_recommender = recommendation_main.JobRecommender()
+    except Exception as e:
+        _worker["error"] = f"{type(e).__name__}: {e}"
+        print(f"Recommendation worker init failed (pid {os.getpid()}): {_worker['error']}")
+        return
+
+    _worker.pop("error", None)
+    _worker["main"] = recommendation_main
+    _worker["job_filter"] = job_filter
+    _worker["job_recommender"] = job_recommender
+    print(f"Recommendation worker ready (pid {os.getpid()}).")
+
+
+def _ping() -> tuple:
+    """워커 예열용 (initializer 실행을 보장), 반환: (pid, 초기화 오류 또는 None)"""
+    return os.getpid(), _worker.get("error")
+
+
+def _run_job(session_dir: str) -> dict:
+    """워커에서 추천 실행, 반환: {"result_path": 결과 JSON 경로} 또는 {"error": 오류}"""
+    if "main" not in _worker:
+        # 초기화에 실패한 워커는 작업마다 다시 시도 (그 사이 pkl/API 키가 준비됐을 수 있음)
+        _init_worker()
+        if "main" not in _worker:
+            return {"error": _worker.get("error", "worker not initialized")}
+    return {
+        "result_path": _worker["main"].run_recommendation(
+            session_dir, _worker["job_filter"], _worker["job_recommender"]
+        )
+    }
+
+
+# ---------------------------SERVICE--------------------------- #
+
+
+class RecommendationService:
+    """추천 작업 제출과 세션별 상태 조회를 담당 (서버 프로세스에서 사용)"""
+
+    def __init__(self, workers: int = RECOMMENDATION_WORKERS, timeout: float = RECOMMENDATION_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+        self._jobs = {}  # session_id → 작업 상태
+        self._tasks = set()
+        # 워커 수만큼만 작업을 풀에 넘겨, 풀 안에서 대기하는 작업이 없도록 함
+        # (대기 중인 작업은 queued로 남고 실행 시간 제한도 워커에서 시작한 뒤부터 적용)
+        self._slots = asyncio.Semaphore(workers)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 서버 프로세스의 이벤트 루프/스레드를 복제하지 않도록 spawn 사용
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    async def start(self):
+        """
+        워커를 미리 띄워 첫 추천에서 프로세스 시작/데이터 로드 비용을 없앰
+        예열에 실패해도 서버 시작은 계속 진행 (추천 작업만 failed로 기록됨)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            pool = self._get_pool()
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, _ping) for _ in range(self.workers))
+            )
+        except Exception as e:
+            print(f"Recommendation workers failed to start: {e}")
+            return
+        workers = dict(results)
+        failed = {pid: error for pid, error in workers.items() if error}
+        print(f"Recommendation workers started: {sorted(workers)}")
+        for pid, error in failed.items():
+            print(f"Recommendation worker {pid} not ready, will retry on first job: {error}")
+
+    def submit(self, session_dir: str) -> str:
+        """추천 작업을 제출하고 바로 반환 (session_id = 녹음 폴더명)"""
+        session_id = os.path.basename(os.path.normpath(session_dir))
+        self._jobs[session_id] = {
+            "status": "queued",
+            "session_dir": session_dir,
+            "submitted_at": time.time(),
+        }
+        task = asyncio.create_task(self._run(session_id, session_dir))
+        # 완료 전에 태스크가 GC되지 않도록 참조 유지
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        print(f"[{session_id}] Recommendation job submitted.")
+        return session_id
+
+    async def _run(self, session_id: str, session_dir: str):
+        job = self._jobs[session_id]
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            future = loop.run_in_executor(self._get_pool(), _run_job, session_dir)
+        except Exception:
+            self._slots.release()
+            raise
+        # 시간 초과로 기다림을 멈춰도 워커는 작업을 계속하므로, 실제로 끝났을 때 자리를 반납
+        future.add_done_callback(lambda _: self._slots.release())
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # 워커 작업은 중단할 수 없으므로 상태만 기록 (결과 파일은 늦게라도 저장될 수 있음)
+            job["status"] = "timeout"
+            print(f"[{session_id}] Recommendation timed out ({self.timeout:.0f}초 초과)")
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"[{session_id}] Recommendation failed: {e}")
+        else:
+            result_path = result.get("result_path")
+            job["status"] = "completed" if result_path else "failed"
+            job["result_path"] = result_path
+            if result.get("error"):
+                job["error"] = result["error"]
+            print(f"[{session_id}] Recommendation {job['status']}: {result_path or result.get('error')}")
+        finally:
+            job["finished_at"] = time.time()
+            job["elapsed"] = round(job["finished_at"] - job["submitted_at"], 2)
+
+    def status(self, session_id: str) -> dict | None:
+        """세션별 추천 작업 상태 (제출된 적 없으면 None)"""
+        job = self._jobs.get(session_id)
+        return dict(job) if job is not None else None
+
+    async def shutdown(self):
+        """진행 중인 작업을 취소하고 워커 프로세스 종료"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+recommendation_service = RecommendationService()
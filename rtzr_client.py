@@ -1,125 +1,159 @@
 import os
-import requests
+import httpx
 import json
 import time
+import asyncio
 from dotenv import load_dotenv
 
 class RTZRClient:
     """
-    RTZR STT API 클라이언트
+    RTZR STT API 비동기 클라이언트
     JWT 토큰 인증과 sommers 모델을 사용한 STT
+    - 프로세스 전체가 하나의 httpx.AsyncClient(커넥션 풀)와 JWT 토큰을 공유
     """
-    
+
+    # 프로세스 공유 상태
+    _http_client = None
+    _access_token = None
+    _token_expires_at = None
+    _token_lock = None
+
+    # 결과 폴링 간격 (짧게 시작해서 지수적으로 증가)
+    POLL_INITIAL_INTERVAL = 0.2
+    POLL_MAX_INTERVAL = 2.0
+    POLL_BACKOFF = 1.5
+
     def __init__(self):
         load_dotenv() # 환경 변수 로드
         self.api_id = os.getenv("RTZR_API_ID")
         self.api_key = os.getenv("RTZR_API_KEY")
         self.base_url = "https://openapi.vito.ai/v1"
-        self.access_token = None
-        self.token_expires_at = None
-        
+
         if not self.api_id or not self.api_key:
             raise ValueError("RTZR_API_ID와 RTZR_API_KEY가 .env 파일에 설정되어야 합니다.")
-    
-    def _get_access_token(self) -> str:
+
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        """공유 HTTP 클라이언트 반환 (최초 호출 시 생성)"""
+        if cls._http_client is None:
+            cls._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return cls._http_client
+
+    @classmethod
+    async def aclose(cls):
+        """공유 HTTP 클라이언트 종료"""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
+
+    async def _get_access_token(self) -> str:
         """
         JWT 액세스 토큰을 획득합니다.
-        토큰이 만료되었거나 없는 경우 새로 발급받습니다.
+        토큰이 만료되었거나 없는 경우 새로 발급받습니다. (동시 갱신은 한 번만 수행)
         """
-        # 토큰이 유효한지 확인 (5분 여유)
-        if self.access_token and self.token_expires_at and time.time() < self.token_expires_at - 300:
-            return self.access_token
-        
-        # 새 토큰 요청
-        auth_url = f"{self.base_url}/authenticate"
-        payload = {
-            "client_id": self.api_id,
-            "client_secret": self.api_key
-        }
-        
-        try:
-            # application/x-www-form-urlencoded 형식으로 전송
-            response = requests.post(auth_url, data=payload)
-            response.raise_for_status()
-            
-            auth_data = response.json()
-            self.access_token = auth_data["access_token"]
-            # 토큰 만료 시간 설정 (일반적으로 1시간, 안전하게 50분으로 설정)
-            self.token_expires_at = time.time() + 3000
-            
-            return self.access_token
-            
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"RTZR 인증 실패: {str(e)}")
-    
-    def transcribe_file(self, audio_file_path: str, model_name: str = "sommers") -> str:
+        cls = type(self)
+        if cls._token_lock is None:
+            cls._token_lock = asyncio.Lock()
+
+        async with cls._token_lock:
+            # 토큰이 유효한지 확인 (5분 여유)
+            if cls._access_token and cls._token_expires_at and time.time() < cls._token_expires_at - 300:
+                return cls._access_token
+
+            # 새 토큰 요청
+            auth_url = f"{self.base_url}/authenticate"
+            payload = {
+                "client_id": self.api_id,
+                "client_secret": self.api_key
+            }
+
+            try:
+                # application/x-www-form-urlencoded 형식으로 전송
+                response = await self._get_http_client().post(auth_url, data=payload)
+                response.raise_for_status()
+
+                auth_data = response.json()
+                cls._access_token = auth_data["access_token"]
+                # 토큰 만료 시간 설정 (일반적으로 1시간, 안전하게 50분으로 설정)
+                cls._token_expires_at = time.time() + 3000
+
+                return cls._access_token
+
+            except httpx.HTTPError as e:
+                raise Exception(f"RTZR 인증 실패: {str(e)}")
+
+    async def transcribe_file(self, audio_file_path: str, model_name: str = "sommers") -> str:
         """
         오디오 파일을 텍스트로 변환합니다.
-        
+
         Args:
             audio_file_path: 변환할 오디오 파일 경로
             model_name: 사용할 모델 (기본값: sommers)
-            
+
         Returns:
             변환된 텍스트
         """
-        # 액세스 토큰 획득
-        token = self._get_access_token()
-        
         # 파일 존재 확인
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"오디오 파일을 찾을 수 없습니다: {audio_file_path}")
-        
+
+        # 액세스 토큰 획득
+        token = await self._get_access_token()
+
         # STT 요청 시작
-        transcribe_id = self._start_transcription(audio_file_path, token, model_name)
-        
+        transcribe_id = await self._start_transcription(audio_file_path, token, model_name)
+
         # 결과 폴링
-        result = self._poll_transcription_result(transcribe_id, token)
-        
+        result = await self._poll_transcription_result(transcribe_id, token)
+
         return result
-    
-    def _start_transcription(self, audio_file_path: str, token: str, model_name: str) -> str:
+
+    async def _start_transcription(self, audio_file_path: str, token: str, model_name: str) -> str:
         """
         음성 인식 작업을 시작하고 transcribe_id를 반환합니다.
+        파일은 메모리에 한 번에 올리지 않고 multipart 스트림으로 전송합니다.
         """
         transcribe_url = f"{self.base_url}/transcribe"
-        
+
         headers = {
             "Authorization": f"Bearer {token}"
         }
-        
+
         config = {
             "model_name": model_name,
             "language": "ko"
         }
-        
+
         try:
             with open(audio_file_path, 'rb') as audio_file:
                 files = {
-                    'file': audio_file,
+                    'file': (os.path.basename(audio_file_path), audio_file, 'audio/wav'),
                     'config': (None, json.dumps(config))
                 }
-                
-                response = requests.post(transcribe_url, headers=headers, files=files)
+
+                response = await self._get_http_client().post(transcribe_url, headers=headers, files=files)
                 response.raise_for_status()
-                
+
                 result = response.json()
                 return result["id"]
-                
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             raise Exception(f"음성 인식 요청 실패: {str(e)}")
-    
-    def _poll_transcription_result(self, transcribe_id: str, token: str, 
-                                 max_wait_time: int = 300, poll_interval: int = 2) -> str:
+
+    async def _poll_transcription_result(self, transcribe_id: str, token: str,
+                                         max_wait_time: int = 300) -> str:
         """
         음성 인식 결과를 폴링하여 완료될 때까지 대기하고 결과를 반환합니다.
-        
+        녹음이 20초 이내로 짧기 때문에 0.2초 간격부터 시작해 최대 2초까지 늘려가며 조회합니다.
+
         Args:
             transcribe_id: 음성 인식 작업 ID
             token: 액세스 토큰
             max_wait_time: 최대 대기 시간 (초)
-            poll_interval: 폴링 간격 (초)
-            
+
         Returns:
             인식된 텍스트
         """
@@ -127,39 +161,40 @@ class RTZRClient:
         headers = {
             "Authorization": f"Bearer {token}"
         }
-        
+
         start_time = time.time()
-        
+        poll_interval = self.POLL_INITIAL_INTERVAL
+
         while time.time() - start_time < max_wait_time:
             try:
-                response = requests.get(result_url, headers=headers)
+                response = await self._get_http_client().get(result_url, headers=headers)
                 response.raise_for_status()
-                
-                result = response.json()
-                status = result.get("status")
-                
-                if status == "completed":
-                    # 결과에서 텍스트 추출
-                    utterances = result.get("results", {}).get("utterances", [])
-                    if utterances:
-                        # 모든 발화를 하나의 텍스트로 결합
-                        full_text = " ".join([utterance.get("msg", "") for utterance in utterances])
-                        return full_text.strip()
-                    else:
-                        return ""
-                
-                elif status == "failed":
-                    raise Exception(f"음성 인식 실패: {result.get('message', '알 수 없는 오류')}")
-                
-                elif status == "transcribing":
-                    # 계속 대기
-                    time.sleep(poll_interval)
-                    continue
-                
-                else:
-                    raise Exception(f"알 수 없는 상태: {status}")
-                    
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 raise Exception(f"결과 조회 실패: {str(e)}")
-        
-        raise Exception(f"음성 인식 시간 초과 ({max_wait_time}초)")
\ No newline at end of file
+
+            result = response.json()
+            status = result.get("status")
+
+            if status == "completed":
+                # 결과에서 텍스트 추출
+                utterances = result.get("results", {}).get("utterances", [])
+                if utterances:
+                    # 모든 발화를 하나의 텍스트로 결합
+                    full_text = " ".join([utterance.get("msg", "") for utterance in utterances])
+                    return full_text.strip()
+                else:
+                    return ""
+
+            elif status == "failed":
+                raise Exception(f"음성 인식 실패: {result.get('message', '알 수 없는 오류')}")
+
+            elif status == "transcribing":
+                # 계속 대기 (지수 백오프)
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(poll_interval * self.POLL_BACKOFF, self.POLL_MAX_INTERVAL)
+                continue
+
+            else:
+                raise Exception(f"알 수 없는 상태: {status}")
+
+        raise Exception(f"음성 인식 시간 초과 ({max_wait_time}초)")
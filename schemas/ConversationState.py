@@ -1,8 +1,10 @@
-from typing import TypedDict, List
+from typing import TypedDict, List, Optional
 
 class ConversationState(TypedDict):
     phase: int
     history: List[str]
     last_response: str
     ai_prefix: str
-    call_sid: str
\ No newline at end of file
+    call_sid: str
+    validation: Optional[dict]
+    speculative_ack: bool
\ No newline at end of file
@@ -0,0 +1,7 @@
+from pydantic import Field
+
+from schemas.ValidationResponse import ValidationResponse
+
+
+class NormalizedValidationResponse(ValidationResponse):
+    normalized_text: str = Field(description="STT 원문에서 잘못 인식된 단어를 문맥에 맞게 교정한 답변 문장")
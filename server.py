@@ -3,25 +3,53 @@ Twilio 음성 통화 서버 - 고령자 구직 상담 시스템
 FastAPI 기반으로 Twilio webhook을 처리하고 대화 플로우를 관리합니다.
 """
 
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from fastapi.responses import Response
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, FileResponse
 from pydantic import BaseModel
-from twilio.twiml.voice_response import VoiceResponse
+from twilio.twiml.voice_response import VoiceResponse, Start
 import os
+import base64
+import json
 import uvicorn
 import asyncio
+import httpx
 from dotenv import load_dotenv
 
-from conversation_logic import conversation_logic
-from client import TwilioClient
+from conversation_logic import conversation_logic, get_workflow, speculation_stats
+from client import TwilioClient, InProcessTransport
+from call_session import CallSession, Say, Record, Listen, Hangup
+from prompt_audio_cache import PromptAudioCache
+from prompt_registry import prompt_registry
+from streaming_stt import create_streaming_adapter
+from recommendation_service import recommendation_service
+import client_pool
 
 load_dotenv()
 app = FastAPI()
 
 # 전역 상태 관리
-active_conversations = {}  # Call SID별 대화 로직 인스턴스 저장
-active_calls_text_queue = {}  # Call SID별 TTS 메시지 큐
-active_calls_recording_url = {}  # Call SID별 녹음 URL 정보
+active_sessions: dict[str, CallSession] = {}  # Call SID별 통화 상태
+prompt_audio = PromptAudioCache()  # 고정 문구 사전 합성 음성 캐시
+shared_http_client = None  # 모든 통화가 공유하는 HTTP 커넥션 풀 (startup에서 생성)
+
+# 대화 로직 → 서버 명령 전달 방식 ("inprocess": 직접 큐에 추가, "http": /say-text 등 API 호출)
+CALL_TRANSPORT = os.environ.get("CALL_TRANSPORT", "inprocess")
+
+# 하나의 TwiML 응답에 합칠 최대 <Say> 개수 (1이면 webhook 한 번에 한 문장씩 처리)
+SAY_BATCH_LIMIT = max(1, int(os.environ.get("SAY_BATCH_LIMIT", 5)))
+
+# 큐가 비어 있을 때 /voice가 다음 명령을 기다리는 최대 시간 (Twilio webhook 제한 15초 이내)
+VOICE_LONG_POLL_TIMEOUT = float(os.environ.get("VOICE_LONG_POLL_TIMEOUT", 8))
+# long-poll 시간 안에 명령이 없을 때 재생할 짧은 pause 길이 (초)
+VOICE_IDLE_PAUSE = int(os.environ.get("VOICE_IDLE_PAUSE", 1))
+
+# 사용자 답변 인식 방식 ("batch": <Record> 후 파일 STT, "streaming": Media Streams 실시간 STT)
+STT_MODE = os.environ.get("STT_MODE", "batch")
+# 스트리밍 STT에서 한 번의 답변을 기다리는 최대 시간 (<Record maxLength>와 동일)
+STREAM_LISTEN_MAX_SECONDS = int(os.environ.get("STREAM_LISTEN_MAX_SECONDS", 20))
+
+# 프롬프트 설정 파일 변경 확인 주기 (초)
+PROMPT_RELOAD_INTERVAL = float(os.environ.get("PROMPT_RELOAD_INTERVAL", 5))
 
 
 class SayTextRequest(BaseModel):
@@ -35,91 +63,131 @@ class ListenRequest(BaseModel):
     call_sid: str
 
 
+class HangupRequest(BaseModel):
+    """통화 종료 요청을 위한 데이터 모델"""
+    call_sid: str
+
+
+@app.on_event("startup")
+async def warm_up():
+    """프롬프트, 공유 클라이언트, 워크플로우를 미리 준비하여 첫 webhook에서 파일 I/O와 객체 생성을 없앰"""
+    global shared_http_client
+    prompt_registry.load()
+    speculation_stats.reset()
+    client_pool.warm_up()
+    get_workflow()
+    shared_http_client = httpx.AsyncClient()
+    app.state.prompt_watcher = asyncio.create_task(
+        prompt_registry.watch(PROMPT_RELOAD_INTERVAL)
+    )
+    await recommendation_service.start()
+    print("Prompt registry and shared clients are ready.")
+
+
+@app.on_event("shutdown")
+async def shut_down():
+    app.state.prompt_watcher.cancel()
+    await shared_http_client.aclose()
+    await client_pool.aclose()
+    await recommendation_service.shutdown()
+
+
+def _twiml(response: VoiceResponse) -> Response:
+    """VoiceResponse를 TwiML HTTP 응답으로 변환"""
+    return Response(content=str(response), media_type="text/xml")
+
+
 async def start_logic_for_call(call_sid: str):
     """대화 로직을 시작하는 백그라운드 태스크"""
     print(f"[{call_sid}] [대화 시작] Logic 실행")
-    if call_sid in active_conversations:
-        logic_instance = active_conversations[call_sid]["logic_instance"]
-        await logic_instance.run()
+    session = active_sessions.get(call_sid)
+    if session is not None:
+        await session.logic_instance.run()
     else:
         print(f"[{call_sid}] ERROR: No conversation logic instance found.")
 
 
-async def process_call_say_queue(call_sid: str):
-    """텍스트 큐를 처리하고 TwiML 응답을 생성"""
+async def process_call_say_queue(session: CallSession):
+    """명령 큐를 처리하고 TwiML 응답을 생성"""
+    call_sid = session.call_sid
     response = VoiceResponse()
 
-    # 큐에서 다음 명령어 처리
-    if call_sid in active_calls_text_queue and active_calls_text_queue[call_sid]:
-        instruction = active_calls_text_queue[call_sid].pop(0)
+    server_url = os.environ.get("SERVER_URL")
+    if not server_url:
+        print("ERROR: SERVER_URL environment variable is not set. Hanging up call.")
+        response.hangup()
+        return _twiml(response)
 
-        # 녹음 시작 명령어 처리
-        if instruction == "__START_RECORDING__":
-            print(f"[{call_sid}] Processing '__START_RECORDING__' instruction.")
+    # 큐가 비어 있으면 대화 로직이 다음 명령을 만들 때까지 대기 (long-poll)
+    if not session.instructions:
+        session.mark_idle()
+        await session.wait_for_instruction(VOICE_LONG_POLL_TIMEOUT)
 
-            server_url = os.environ.get("SERVER_URL")
-            if not server_url:
-                print(
-                    "ERROR: SERVER_URL environment variable is not set for Record action."
-                )
-                response.hangup()
-                twiml_response_str = str(response)
-                return Response(content=twiml_response_str, media_type="text/xml")
+    # 스트리밍 모드에서는 통화당 한 번 Media Stream을 열어 둠 (이후 통화 음성이 계속 전달됨)
+    if STT_MODE == "streaming" and not session.stream_started:
+        start = Start()
+        start.stream(url=_media_stream_url(server_url))
+        response.append(start)
+        session.stream_started = True
+
+    # 큐에서 대기 중인 명령어를 한 번에 처리 (연속된 Say는 최대 SAY_BATCH_LIMIT개까지 병합)
+    instructions = session.drain(SAY_BATCH_LIMIT)
+
+    if instructions:
+        dead_air = session.mark_active()
+        if dead_air is not None:
+            print(f"[{call_sid}] [TIMING] Dead air: {dead_air:.2f}초")
+
+    for instruction in instructions:
+        # 일반 TTS 메시지 처리
+        if isinstance(instruction, Say):
+            audio_file = prompt_audio.lookup(instruction.text)
+            if audio_file:
+                # 사전 합성된 고정 문구는 TTS 없이 바로 재생
+                print(f"[{call_sid}] Dequeuing and playing cached audio: '{instruction.text}'")
+                response.play(f"{server_url}/prompt-audio/{audio_file}")
+            else:
+                print(f"[{call_sid}] Dequeuing and saying: '{instruction.text}'")
+                response.say(instruction.text, voice="alice", language="ko-KR")
 
-            record_callback_url = f"{server_url}/recording-callback"
+        # 녹음 시작 명령어 처리
+        elif isinstance(instruction, Record):
+            print(f"[{call_sid}] Processing Record instruction.")
             response.record(
-                action=record_callback_url,
+                action=f"{server_url}/recording-callback",
                 maxLength=20,
                 finishOnKey="#",
                 trim="trim-silence",
                 playBeep=True,
             )
 
-        # 일반 TTS 메시지 처리
-        else:
-            print(f"[{call_sid}] Dequeuing and saying: '{instruction}'")
-            response.say(instruction, voice="alice", language="ko-KR")
+        # 스트리밍 인식 명령어 처리 (답변이 끝나면 REST API로 <Pause>를 중단시킴)
+        elif isinstance(instruction, Listen):
+            print(f"[{call_sid}] Processing Listen instruction (streaming STT).")
+            session.stt_task = asyncio.create_task(_run_stream_turn(session))
+            response.pause(length=STREAM_LISTEN_MAX_SECONDS)
 
-            server_url = os.environ.get("SERVER_URL")
-            if not server_url:
-                print(
-                    "ERROR: SERVER_URL environment variable is not set. Hanging up call."
-                )
-                response.hangup()
-                twiml_response_str = str(response)
-                return Response(content=twiml_response_str, media_type="text/xml")
-
-            response.redirect(f"{server_url}/voice")
+        # 통화 종료 명령어 처리
+        elif isinstance(instruction, Hangup):
+            print(f"[{call_sid}] Processing Hangup instruction.")
+            response.hangup()
 
-    else:
+    if not instructions:
         print(
-            f"[{call_sid}] Text queue is empty and no pending recording instruction. Playing a pause."
+            f"[{call_sid}] Instruction queue is still empty after {VOICE_LONG_POLL_TIMEOUT}s. Playing a pause."
         )
-        response.pause(length=10)
-
-        server_url = os.environ.get("SERVER_URL")
-        if not server_url:
-            print("ERROR: SERVER_URL environment variable is not set. Hanging up call.")
-            response.hangup()
-            twiml_response_str = str(response)
-            return Response(content=twiml_response_str, media_type="text/xml")
-
+        response.pause(length=VOICE_IDLE_PAUSE)
+        response.redirect(f"{server_url}/voice")
+    elif isinstance(instructions[-1], (Say, Listen)):
         response.redirect(f"{server_url}/voice")
 
-    twiml_response_str = str(response)
+    session.voice_event.set()
 
-    if call_sid in active_conversations:
-        active_conversations[call_sid]["voice_event"].set()
-    else:
-        print(
-            f"[{call_sid}] WARNING: Call SID not in active_conversations when setting voice event."
-        )
-
-    return Response(content=twiml_response_str, media_type="text/xml")
+    return _twiml(response)
 
 
 @app.post("/voice")
-async def handle_voice_call(request: Request, background_tasks: BackgroundTasks):
+async def handle_voice_call(request: Request):
     """Twilio 음성 통화 webhook 처리"""
     form_data = await request.form()
     call_sid = form_data.get("CallSid")
@@ -130,71 +198,117 @@ async def handle_voice_call(request: Request, background_tasks: BackgroundTasks)
 
     print(f"Received Twilio webhook for Call SID: {call_sid}")
 
+    session = active_sessions.get(call_sid)
+
     # 새로운 통화인 경우 대화 로직 초기화
-    if call_sid not in active_conversations:
-        voice_event = asyncio.Event()
-        recording_event = asyncio.Event()
+    if session is None:
+        session = CallSession(call_sid)
 
         # Twilio 클라이언트 인스턴스 생성
-        client_instance = TwilioClient(
+        session.client = TwilioClient(
             server_base_url=os.environ.get("SERVER_URL"),
-            voice_event=voice_event,
-            recording_event=recording_event,
+            voice_event=session.voice_event,
+            recording_queue=session.recording_queue,
+            transport=_create_transport(),
+            coalesce_say=SAY_BATCH_LIMIT > 1,
+            http_client=shared_http_client,
+            stt_mode=STT_MODE,
         )
 
         # 대화 로직 인스턴스 생성
-        logic_instance = conversation_logic(
-            call_sid=call_sid, client_instance=client_instance
+        session.logic_instance = conversation_logic(
+            call_sid=call_sid, client_instance=session.client
         )
+        active_sessions[call_sid] = session
+        print(f"[{call_sid}] New conversation logic instance created.")
 
-        active_conversations[call_sid] = {
-            "logic_instance": logic_instance,
-            "voice_event": voice_event,
-            "recording_event": recording_event,
-        }
-        active_conversations[call_sid]["logic_instance"].compose_workflow()
-        print(
-            f"[{call_sid}] New conversation logic instance created and workflow composed."
-        )
+        # 응답 전에 로직을 시작해야 첫 webhook의 long-poll이 인사말을 받을 수 있음
+        session.logic_task = asyncio.create_task(start_logic_for_call(call_sid))
 
-        background_tasks.add_task(start_logic_for_call, call_sid)
-    else:
-        active_conversations[call_sid]["voice_event"].set()
+    return await process_call_say_queue(session)
 
-    return await process_call_say_queue(call_sid)
 
+def _create_transport():
+    """CALL_TRANSPORT 설정에 따라 TwilioClient의 명령 전달 방식 생성"""
+    if CALL_TRANSPORT == "http":
+        return None  # TwilioClient 기본값 (HTTPTransport)
+    return InProcessTransport(
+        say_handler=enqueue_say_text,
+        listen_handler=enqueue_listen,
+        hangup_handler=enqueue_hangup,
+    )
+
+
+def _unknown_call(call_sid: str) -> dict:
+    print(f"[{call_sid}] ERROR: No active session for this Call SID.")
+    return {"status": "error", "message": "No active call for this Call SID."}
 
-@app.post("/say-text")
-async def receive_say_text(request_data: SayTextRequest):
-    """TTS 텍스트를 큐에 추가"""
-    call_sid = request_data.call_sid
-    text = request_data.text
 
-    if call_sid not in active_calls_text_queue:
-        active_calls_text_queue[call_sid] = []
-        print(f"[{call_sid}] New call SID registered for text queue.")
+def enqueue_say_text(call_sid: str, text: str) -> dict:
+    """TTS 텍스트를 통화별 큐에 추가"""
+    session = active_sessions.get(call_sid)
+    if session is None:
+        return _unknown_call(call_sid)
 
-    active_calls_text_queue[call_sid].append(text)
+    session.enqueue(Say(text))
     print(f"[{call_sid}] Enqueued text: '{text}'")
     return {"status": "success", "message": "Text enqueued"}
 
 
+def enqueue_listen(call_sid: str) -> dict:
+    """녹음 시작 명령을 통화별 큐에 추가"""
+    session = active_sessions.get(call_sid)
+    if session is None:
+        return _unknown_call(call_sid)
+
+    if STT_MODE == "streaming":
+        session.enqueue(Listen())
+        print(f"[{call_sid}] Listen request received. Added Listen to instruction queue.")
+    else:
+        session.recording_info = {"status": "pending"}
+        session.enqueue(Record())
+        print(f"[{call_sid}] Recording request received. Added Record to instruction queue.")
+    return {"status": "success", "message": "Recording initiated"}
+
+
+def enqueue_hangup(call_sid: str) -> dict:
+    """통화 종료 명령을 통화별 큐에 추가 (앞선 TTS가 모두 재생된 뒤 종료)"""
+    session = active_sessions.get(call_sid)
+    if session is None:
+        return _unknown_call(call_sid)
+
+    session.hangup_requested = True
+    session.enqueue(Hangup())
+    print(f"[{call_sid}] Hangup request received. Added Hangup to instruction queue.")
+    return {"status": "success", "message": "Hangup enqueued"}
+
+
+@app.post("/say-text")
+async def receive_say_text(request_data: SayTextRequest):
+    """TTS 텍스트를 큐에 추가"""
+    return enqueue_say_text(request_data.call_sid, request_data.text)
+
+
 @app.post("/listen-to-user")
 async def listen_to_user(request_data: ListenRequest):
     """사용자 음성 녹음 시작"""
-    call_sid = request_data.call_sid
+    return enqueue_listen(request_data.call_sid)
 
-    active_calls_recording_url[call_sid] = {"status": "pending"}
 
-    if call_sid not in active_calls_text_queue:
-        active_calls_text_queue[call_sid] = []
+@app.post("/hangup")
+async def hangup_call(request_data: HangupRequest):
+    """통화 종료 예약"""
+    return enqueue_hangup(request_data.call_sid)
 
-    active_calls_text_queue[call_sid].insert(0, "__START_RECORDING__")
 
-    print(
-        f"[{call_sid}] Recording request received. Added '__START_RECORDING__' to text queue."
-    )
-    return {"status": "success", "message": "Recording initiated"}
+@app.get("/prompt-audio/{filename}")
+async def get_prompt_audio(filename: str):
+    """사전 합성된 고정 문구 음성 파일 제공 (Twilio <Play>용)"""
+    path = prompt_audio.path_for(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Prompt audio not found")
+    media_type = "audio/mpeg" if filename.endswith(".mp3") else "audio/wav"
+    return FileResponse(path, media_type=media_type)
 
 
 @app.post("/recording-callback")
@@ -215,14 +329,17 @@ async def handle_recording_callback(request: Request):
         f"[{call_sid}] Recording completed! URL: {recording_url}, Duration: {recording_duration}s"
     )
 
-    active_calls_recording_url[call_sid] = {
-        "status": "ready",
-        "recording_url": recording_url,
-        "duration": recording_duration,
-    }
-
-    if call_sid in active_conversations:
-        active_conversations[call_sid]["recording_event"].set()
+    session = active_sessions.get(call_sid)
+    if session is not None:
+        recording_info = {
+            "status": "ready",
+            "recording_url": recording_url,
+            "duration": recording_duration,
+        }
+        # 외부 조회용 (/get-recording-url)
+        session.recording_info = recording_info
+        # 같은 프로세스의 TwilioClient.listen에 녹음 정보를 직접 전달
+        session.recording_queue.put_nowait(recording_info)
 
     response = VoiceResponse()
     server_url = os.environ.get("SERVER_URL")
@@ -234,14 +351,105 @@ async def handle_recording_callback(request: Request):
     else:
         response.redirect(f"{server_url}/voice")
 
-    twiml_response_str = str(response)
-    return Response(content=twiml_response_str, media_type="text/xml")
+    return _twiml(response)
+
+
+def _media_stream_url(server_url: str) -> str:
+    """SERVER_URL(https)을 Media Streams용 websocket 주소(wss)로 변환"""
+    if server_url.startswith("https://"):
+        ws_base = "wss://" + server_url[len("https://"):]
+    elif server_url.startswith("http://"):
+        ws_base = "ws://" + server_url[len("http://"):]
+    else:
+        ws_base = server_url
+    return f"{ws_base}/media-stream"
+
+
+async def _run_stream_turn(session: CallSession):
+    """한 번의 답변을 스트리밍 STT로 인식하고 결과를 대화 로직에 전달"""
+    call_sid = session.call_sid
+    turn = session.stt_turns
+    session.stt_turns += 1
+    text = None
+    adapter = None
+    try:
+        adapter = await create_streaming_adapter(turn)
+        session.stt_stream = adapter
+        try:
+            text = await asyncio.wait_for(adapter.result(), STREAM_LISTEN_MAX_SECONDS)
+        except asyncio.TimeoutError:
+            # 발화 종료가 감지되지 않으면 지금까지의 음성으로 결과 확정
+            await adapter.finish()
+            text = await asyncio.wait_for(adapter.result(), 5)
+    except Exception as e:
+        print(f"[{call_sid}] Streaming STT failed: {e}")
+    finally:
+        session.stt_stream = None
+        if adapter is not None:
+            await adapter.close()
+
+    print(f"[{call_sid}] Streaming STT result: '{text}'")
+    session.recording_queue.put_nowait({"transcript": text})
+    # 남은 <Pause>를 건너뛰고 다음 TwiML로 이동
+    if session.client is not None:
+        await session.client.redirect(call_sid)
+
+
+@app.websocket("/media-stream")
+async def handle_media_stream(websocket: WebSocket):
+    """Twilio Media Streams 수신 - 답변 대기 중인 턴의 STT 어댑터로 오디오 전달"""
+    await websocket.accept()
+    session = None
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            event = message.get("event")
+
+            if event == "start":
+                call_sid = message["start"]["callSid"]
+                session = active_sessions.get(call_sid)
+                print(f"[{call_sid}] Media stream started.")
+
+            elif event == "media":
+                # 답변을 기다리는 턴이 없을 때(질문 재생 중 등)의 음성은 버림
+                if session is not None and session.stt_stream is not None:
+                    chunk = base64.b64decode(message["media"]["payload"])
+                    await session.stt_stream.feed(chunk)
+
+            elif event == "stop":
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if session is not None and session.stt_stream is not None:
+            await session.stt_stream.finish()
+        if session is not None:
+            print(f"[{session.call_sid}] Media stream closed.")
+
+
+@app.get("/recommendations/{session_id}")
+async def get_recommendation_status(session_id: str):
+    """통화 세션(녹음 폴더명)별 추천 작업 상태 조회"""
+    status = recommendation_service.status(session_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No recommendation job for this session")
+    return status
+
+
+@app.get("/speculation-stats")
+async def get_speculation_stats():
+    """
+    서버 시작 이후 질문별 감사 인사 선행 재생의 적중/실패 횟수 (실패 = 감사 인사 후 재질문)
+    speculating이 false인 질문은 실패율이 높아 검증 결과를 기다린 뒤 감사 인사를 재생
+    """
+    return speculation_stats.summary()
 
 
 @app.get("/get-recording-url/{call_sid}")
 async def get_recording_url(call_sid: str):
-    """녹음 URL 조회"""
-    recording_info = active_calls_recording_url.get(call_sid)
+    """녹음 URL 조회 (외부 소비자용, 내부 대화 로직은 recording_queue를 사용)"""
+    session = active_sessions.get(call_sid)
+    recording_info = session.recording_info if session is not None else None
 
     if recording_info:
         if recording_info["status"] == "ready":
@@ -265,16 +473,25 @@ async def handle_call_status(request: Request):
     print(f"Call SID: {call_sid}, Status: {call_status}")
 
     if call_status in ["completed", "failed", "busy", "no-answer"]:
-        if call_sid in active_calls_text_queue:
-            del active_calls_text_queue[call_sid]
-            print(f"[{call_sid}] Call ended. Cleaned up text queue.")
-        if call_sid in active_calls_recording_url:
-            del active_calls_recording_url[call_sid]
-            print(f"[{call_sid}] Call ended. Cleaned up recording URL.")
-        if call_sid in active_conversations:
-            del active_conversations[call_sid]
+        session = active_sessions.pop(call_sid, None)
+        if session is not None:
+            if session.stt_task is not None:
+                session.stt_task.cancel()
+            # 대화 도중 끊긴 통화는 로직(및 질문별 추출 태스크)을 중단
+            # 로직이 직접 종료를 요청한 경우에는 프로필 조립/파일 생성/추천 제출이 이어지도록 둠
+            if (session.logic_task is not None and not session.logic_task.done()
+                    and not session.hangup_requested):
+                session.logic_task.cancel()
+                print(f"[{call_sid}] Call ended mid-conversation. Cancelled conversation logic.")
+            if session.dead_air:
+                total = sum(session.dead_air)
+                print(
+                    f"[{call_sid}] [TIMING] Dead air: {len(session.dead_air)}턴, "
+                    f"합계 {total:.2f}초, 평균 {total / len(session.dead_air):.2f}초, "
+                    f"최대 {max(session.dead_air):.2f}초"
+                )
             print(
-                f"[{call_sid}] Call ended. Cleaned up conversation logic instance and events."
+                f"[{call_sid}] Call ended. Cleaned up call session (logic, queue, events)."
             )
 
     return ""
@@ -0,0 +1,215 @@
+"""
+스트리밍 STT - Twilio Media Streams 오디오를 실시간으로 인식
+통화 음성(8kHz μ-law)을 받는 즉시 STT 엔진으로 흘려보내, 어르신이 말을 마치는 시점에 인식 결과를 준비합니다.
+
+- RTZRStreamingAdapter: RTZR 스트리밍 STT (websocket)
+- ReplaySTTAdapter: 로컬 파일의 전사 결과를 재생하는 테스트용 대체 구현
+"""
+
+import asyncio
+import json
+import os
+import aiohttp
+from abc import ABC, abstractmethod
+from dotenv import load_dotenv
+
+from rtzr_client import RTZRClient
+
+load_dotenv()
+
+SAMPLE_RATE = 8000  # Twilio Media Streams: 8kHz μ-law, 20ms(160바이트) 프레임
+
+
+def _ulaw_to_linear(value: int) -> int:
+    """μ-law 1바이트를 16bit PCM 샘플로 변환"""
+    value = ~value & 0xFF
+    sign = value & 0x80
+    exponent = (value >> 4) & 0x07
+    mantissa = value & 0x0F
+    sample = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return -sample if sign else sample
+
+
+_ULAW_MAGNITUDE = [abs(_ulaw_to_linear(i)) for i in range(256)]
+
+
+class EndpointDetector:
+    """
+    에너지 기반 발화 종료 감지기
+    - 발화가 시작된 뒤 silence_ms 동안 조용하면 말을 마친 것으로 판단
+    """
+
+    def __init__(self, silence_ms: int = 1200, threshold: int = 500, min_speech_ms: int = 60):
+        self.threshold = threshold
+        self.silence_samples = silence_ms * SAMPLE_RATE // 1000
+        self.min_speech_samples = min_speech_ms * SAMPLE_RATE // 1000
+        self._speech = 0
+        self._silence = 0
+
+    @property
+    def speech_started(self) -> bool:
+        return self._speech >= self.min_speech_samples
+
+    def update(self, chunk: bytes) -> bool:
+        """프레임을 반영하고 발화가 끝났으면 True 반환"""
+        if not chunk:
+            return False
+        energy = sum(_ULAW_MAGNITUDE[b] for b in chunk) / len(chunk)
+        if energy >= self.threshold:
+            self._speech += len(chunk)
+            self._silence = 0
+        elif self.speech_started:
+            self._silence += len(chunk)
+        return self.speech_started and self._silence >= self.silence_samples
+
+
+class StreamingSTTAdapter(ABC):
+    """스트리밍 STT 어댑터 인터페이스 (한 번의 답변 = 하나의 어댑터)"""
+
+    def __init__(self, silence_ms: int = 1200):
+        self._detector = EndpointDetector(silence_ms=silence_ms)
+        self._result = asyncio.get_running_loop().create_future()
+        self._finished = False
+
+    async def start(self):
+        """STT 엔진 연결"""
+
+    async def feed(self, chunk: bytes):
+        """μ-law 오디오 프레임 전달 (발화 종료가 감지되면 입력 종료)"""
+        if self._finished:
+            return
+        await self._send_audio(chunk)
+        if self._detector.update(chunk):
+            await self.finish()
+
+    async def finish(self):
+        """입력 종료 (이후 최종 인식 결과가 확정됨)"""
+        if self._finished:
+            return
+        self._finished = True
+        await self._end_of_stream()
+
+    async def result(self) -> str:
+        """최종 인식 결과 대기"""
+        return await self._result
+
+    async def close(self):
+        """STT 엔진 연결 정리"""
+
+    def _set_result(self, text: str):
+        if not self._result.done():
+            self._result.set_result(text.strip())
+
+    @abstractmethod
+    async def _send_audio(self, chunk: bytes):
+        """오디오 프레임을 STT 엔진으로 전송"""
+
+    @abstractmethod
+    async def _end_of_stream(self):
+        """STT 엔진에 입력 종료를 알림 (최종 결과는 _set_result로 확정)"""
+
+
+class RTZRStreamingAdapter(StreamingSTTAdapter):
+    """RTZR 스트리밍 STT (websocket으로 μ-law 오디오를 그대로 전송)"""
+
+    STREAMING_URL = "wss://openapi.vito.ai/v1/transcribe:streaming"
+
+    def __init__(self, silence_ms: int = 1200):
+        super().__init__(silence_ms=silence_ms)
+        self._session = None
+        self._ws = None
+        self._reader = None
+        self._finals = []
+
+    async def start(self):
+        token = await RTZRClient()._get_access_token()
+        params = {
+            "sample_rate": str(SAMPLE_RATE),
+            "encoding": "MULAW",
+            "use_itn": "true",
+        }
+        self._session = aiohttp.ClientSession()
+        self._ws = await self._session.ws_connect(
+            self.STREAMING_URL,
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self._reader = asyncio.create_task(self._read_results())
+
+    async def _read_results(self):
+        """확정(final) 구간의 텍스트를 모으고, 서버가 연결을 닫으면 결과 확정"""
+        try:
+            async for message in self._ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(message.data)
+                if data.get("final"):
+                    alternatives = data.get("alternatives") or [{}]
+                    text = alternatives[0].get("text", "")
+                    if text:
+                        self._finals.append(text)
+        except Exception as e:
+            print(f"[RTZR Streaming 오류] {e}")
+        finally:
+            self._set_result(" ".join(self._finals))
+
+    async def _send_audio(self, chunk: bytes):
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_bytes(chunk)
+
+    async def _end_of_stream(self):
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.send_str("EOS")
+        else:
+            self._set_result(" ".join(self._finals))
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+
+class ReplaySTTAdapter(StreamingSTTAdapter):
+    """
+    테스트용 대체 구현 - 실제 STT 대신 미리 준비한 전사 결과를 반환
+    발화 종료 감지는 실제 어댑터와 동일하게 동작합니다.
+    """
+
+    def __init__(self, transcript: str, silence_ms: int = 1200):
+        super().__init__(silence_ms=silence_ms)
+        self.transcript = transcript
+        self.received_bytes = 0
+
+    async def _send_audio(self, chunk: bytes):
+        self.received_bytes += len(chunk)
+
+    async def _end_of_stream(self):
+        self._set_result(self.transcript)
+
+
+def _load_replay_transcripts(path: str) -> list[str]:
+    """턴별 전사 결과 파일 (한 줄 = 한 답변)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def create_streaming_adapter(turn: int) -> StreamingSTTAdapter:
+    """
+    STREAMING_STT_BACKEND 설정에 따라 어댑터 생성 및 연결
+    - rtzr(기본값): RTZR 스트리밍 STT
+    - replay: STREAMING_STT_REPLAY_FILE의 turn번째 줄을 인식 결과로 사용
+    """
+    backend = os.getenv("STREAMING_STT_BACKEND", "rtzr")
+    silence_ms = int(os.getenv("STREAMING_STT_SILENCE_MS", 1200))
+
+    if backend == "replay":
+        transcripts = _load_replay_transcripts(os.environ["STREAMING_STT_REPLAY_FILE"])
+        adapter = ReplaySTTAdapter(transcripts[turn % len(transcripts)], silence_ms=silence_ms)
+    else:
+        adapter = RTZRStreamingAdapter(silence_ms=silence_ms)
+
+    await adapter.start()
+    return adapter
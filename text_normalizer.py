@@ -0,0 +1,144 @@
+"""
+STT 원문 정제 보조 - 규칙 기반 정리, LLM 교정 생략 판단, 교정 결과 캐시
+규칙 정리가 공백/문장부호만 고친 깨끗한 원문은 LLM 교정을 생략하고,
+LLM 교정 결과는 원문+프롬프트 해시로 저장해 재사용합니다.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+NORMALIZATION_CACHE_PATH = os.environ.get(
+    "NORMALIZATION_CACHE_PATH", "./cache/normalization.sqlite3"
+)
+NORMALIZATION_CACHE_SIZE = int(os.environ.get("NORMALIZATION_CACHE_SIZE", 1024))
+
+# 답변 앞뒤에 붙는 간투사 (문장 중간에서는 의미가 있을 수 있어 앞뒤만 제거)
+_FILLERS = ("음", "으음", "어", "아", "에", "흠")
+_FILLER_EDGE = re.compile(
+    rf"^(?:(?:{'|'.join(_FILLERS)})+[.,…~\s]+)+|(?:[\s,]+(?:{'|'.join(_FILLERS)})+)+[.…~]*$"
+)
+_SPACES = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([.,?!])")
+_REPEATED_PUNCT = re.compile(r"([.,?!~])\1+")
+_REPEATED_WORD = re.compile(r"\b(\S+)(?:\s+\1\b)+")
+_QUOTES = "\"'“”‘’"
+# 규칙 정리 전후 비교에서 무시하는 문자 (공백, 문장부호, 따옴표)
+_TRIVIAL = re.compile(rf"[\s.,?!~…{_QUOTES}]")
+
+# LLM 교정이 필요할 수 있는 흔적: 영문/자모 조각, 인식 불가 표시
+_SUSPICIOUS = re.compile(r"[A-Za-z]|[ㄱ-ㅎㅏ-ㅣ]|\*")
+
+
+def rule_normalize(text: str) -> str:
+    """공백·문장부호·간투사·반복 어절을 규칙으로 정리 (LLM 호출 없음)"""
+    text = text.strip().strip(_QUOTES)
+    text = _SPACES.sub(" ", text)
+    text = _FILLER_EDGE.sub("", text).strip()
+    text = _SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    text = _REPEATED_PUNCT.sub(r"\1", text)
+    text = _REPEATED_WORD.sub(r"\1", text)  # "네 네" → "네"
+    return text
+
+
+def needs_llm_correction(raw_text: str, cleaned: str) -> bool:
+    """
+    규칙 정리가 원문에서 실제로 바꾼 내용으로 LLM 교정 필요 여부 판단 (답변 길이/문자 종류는 보지 않음)
+    - 공백·문장부호만 바뀌었고 잘못 인식된 흔적이 없으면 원문이 이미 깨끗하므로 생략
+    - 간투사나 반복 어절을 지웠다면 매끄럽지 않은 발화라 인식 오류 가능성이 높으므로 교정
+
+    >>> needs_llm_correction("  네,, 맞아요 .", "네, 맞아요.")
+    False
+    >>> needs_llm_correction("음... 칠십 칠십 살이요", "칠십 살이요")
+    True
+    >>> needs_llm_correction("서울 강남구 OO동", "서울 강남구 OO동")
+    True
+    """
+    if not cleaned:
+        return False
+    if _SUSPICIOUS.search(cleaned):
+        return True
+    return _TRIVIAL.sub("", raw_text) != _TRIVIAL.sub("", cleaned)
+
+
+def cache_key(raw_text: str, prompt: str) -> str:
+    """교정 결과 캐시 키 (원문과 교정 프롬프트의 SHA-256)"""
+    return hashlib.sha256(f"{prompt}\0{raw_text}".encode("utf-8")).hexdigest()
+
+
+class NormalizationCache:
+    """
+    교정 결과 캐시 - 메모리 LRU + 디스크(SQLite)
+    프롬프트가 바뀌면 키가 달라지므로 이전 결과는 자연스럽게 사용되지 않습니다.
+    """
+
+    def __init__(self, path: str = NORMALIZATION_CACHE_PATH, maxsize: int = NORMALIZATION_CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        # asyncio.to_thread의 여러 스레드에서 접근하므로 하나의 연결을 잠금으로 보호
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS normalization (key TEXT PRIMARY KEY, text TEXT NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key: str, text: str):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return text
+            try:
+                row = self._connect().execute(
+                    "SELECT text FROM normalization WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"Normalization cache read failed: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            self._remember(key, text)
+            try:
+                db = self._connect()
+                db.execute(
+                    "INSERT OR REPLACE INTO normalization (key, text) VALUES (?, ?)", (key, text)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                # 디스크 캐시 실패는 교정 결과에 영향을 주지 않음
+                print(f"Normalization cache write failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None